@@ -0,0 +1,69 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.onboarding import CREATED, INVALID, STATUSES, onboard_users, read_accounts
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users in bulk from a CSV file with a username,email,first_name,last_name,password "
+        "header, and give each one their group, permissions, collection, index page and boxes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file of accounts, or '-' to read from stdin.")
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Number of users to validate and set up at a time."
+        )
+        parser.add_argument(
+            '--boxes',
+            type=int,
+            default=5,
+            help="Number of boxes to create for each user."
+        )
+        parser.add_argument(
+            '--hash-workers',
+            type=int,
+            default=4,
+            help="Number of threads hashing passwords."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            stream = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8-sig', newline='')
+        except OSError as e:
+            raise CommandError(f"Could not open {options['path']}: {e}")
+
+        summary = dict.fromkeys(STATUSES, 0)
+        started = time.perf_counter()
+        with stream:
+            try:
+                rows = read_accounts(stream)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+            results = onboard_users(
+                rows,
+                batch_size=options['batch_size'],
+                num_boxes=options['boxes'],
+                hash_workers=options['hash_workers']
+            )
+            for result in results:
+                summary[result['status']] += 1
+                if result['status'] == INVALID:
+                    self.stderr.write(f"Line {result['line']}: {' '.join(result['errors'])}")
+                elif options['verbosity'] > 1:
+                    self.stdout.write(json.dumps(result))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Onboarded {summary[CREATED]} users in {elapsed:.1f}s "
+            f"({summary[CREATED] / elapsed if elapsed else 0:.1f} users/s; "
+            f"{', '.join(f'{count} {status}' for status, count in summary.items() if status != CREATED)})"
+        ))
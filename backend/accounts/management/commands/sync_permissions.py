@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.utils import sync_all_permissions
+
+
+class Command(BaseCommand):
+    help = (
+        "Give the Trainers group and every user's group exactly the permissions they should have, "
+        "adding missing ones and removing any others."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Number of users to sync at a time."
+        )
+        parser.add_argument(
+            '--keep-extra',
+            action='store_true',
+            help="Only add missing permissions; keep permissions that were granted by hand."
+        )
+
+    def handle(self, *args, **options):
+        users = created = deleted = 0
+        started = time.perf_counter()
+        for batch_users, batch_created, batch_deleted in sync_all_permissions(
+            batch_size=options['batch_size'],
+            prune=not options['keep_extra']
+        ):
+            users += batch_users
+            created += batch_created
+            deleted += batch_deleted
+            if options['verbosity'] > 1:
+                self.stdout.write(f"{users} users synced")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Synced {users} users in {time.perf_counter() - started:.1f}s: "
+            f"{created} permissions added, {deleted} removed"
+        ))
@@ -45,16 +45,16 @@ class User(AbstractUser):
         super().delete(*args, **kwargs)
 
     def get_page(self):
-        from inventory.models import InventoryIndexPage
-        return InventoryIndexPage.get_for_user(self)
+        from inventory.models import InventoryIndex
+        return InventoryIndex.get_for_user(self)
 
     def get_collection(self):
         from inventory.models import InventoryIndexCollection
-        return InventoryIndexCollection.get_for_user(self)
+        return InventoryIndexCollection.get_for_user(self).collection
 
     def get_boxes(self):
-        from inventory.models import InventoryBoxPage
-        return InventoryBoxPage.objects.filter(owner=self)
+        from inventory.resolver import get_user_inventory
+        return get_user_inventory(self).boxes
 
     def get_group(self):
         group, created = Group.objects.get_or_create(name=self.uuid)
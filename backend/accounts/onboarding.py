@@ -0,0 +1,257 @@
+import csv
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+from wagtail.models import Collection
+
+from base.permissions import PermissionSet, sync_permissions
+from base.tree import bulk_add_children
+from inventory.models import (
+    InventoryBox, InventoryBucket, InventoryCollectionBucket,
+    InventoryIndex, InventoryIndexCollection
+)
+from .utils import add_user_permissions, get_trainer_group
+
+CREATED = 'created'
+EXISTS = 'exists'
+DUPLICATE = 'duplicate'
+INVALID = 'invalid'
+STATUSES = (CREATED, EXISTS, DUPLICATE, INVALID)
+
+FIELDS = ('username', 'email', 'first_name', 'last_name', 'password')
+
+
+def read_accounts(lines):
+    """
+    Returns an iterator of (line number, account) for every row of a CSV
+    file whose header names some of `username,email,first_name,last_name,password`.
+    Accounts without a password get an unusable one.
+    """
+    reader = csv.DictReader(lines)
+    if reader.fieldnames is None or 'username' not in [name.strip().lower() for name in reader.fieldnames]:
+        raise ValueError("The first line must be a header with a 'username' column.")
+    return _iter_accounts(reader)
+
+
+def _iter_accounts(reader):
+    for row in reader:
+        account = {key.strip().lower(): (value or '').strip() for key, value in row.items() if key}
+        if not any(account.values()):
+            continue
+        yield reader.line_num, {field: account.get(field, '') for field in FIELDS}
+
+
+def onboard_users(rows, batch_size=500, num_boxes=5, hash_workers=4):
+    """
+    Creates users from (line number, account) rows and sets each one up the
+    way `setup_new_trainer` does: group, trainer membership, collection,
+    index page, boxes and collection and page permissions. Yields one result
+    per row.
+
+    Work is done a batch at a time with bulk inserts, so a batch costs about
+    the same number of queries whatever its size. Passwords are hashed on
+    `hash_workers` threads, as hashing releases the GIL and is otherwise the
+    slowest step.
+    """
+    context = _OnboardingContext(num_boxes)
+
+    with ThreadPoolExecutor(max_workers=hash_workers) as executor:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield from _onboard_batch(context, executor, batch)
+                batch = []
+
+        if batch:
+            yield from _onboard_batch(context, executor, batch)
+
+
+class _OnboardingContext:
+    """
+    State shared by every batch: the trainer group and bucket parents, each
+    looked up once.
+    """
+
+    def __init__(self, num_boxes):
+        self.num_boxes = num_boxes
+        self.trainer_group = get_trainer_group()
+        self.users_collection = InventoryIndexCollection.get_parent_collection()
+        self.root_page = InventoryIndex.get_root_page()
+        self._collection_buckets = {}
+        self._page_buckets = {}
+
+    def get_parent_collection(self, user):
+        key = InventoryCollectionBucket.get_key(user)
+        if not key:
+            return self.users_collection
+        if key not in self._collection_buckets:
+            self._collection_buckets[key] = InventoryCollectionBucket.get_for_key(
+                key, self.users_collection
+            ).collection
+        return self._collection_buckets[key]
+
+    def get_parent_page(self, user):
+        key = InventoryBucket.get_key(user)
+        if not key:
+            return self.root_page
+        if key not in self._page_buckets:
+            self._page_buckets[key] = InventoryBucket.get_for_key(key, self.root_page)
+        return self._page_buckets[key]
+
+
+def _onboard_batch(context, executor, rows):
+    User = get_user_model()
+    results = []
+    valid = {}
+    slugs = set()
+
+    for line, account in rows:
+        username = User.normalize_username(account['username'])
+        result = {'line': line, 'username': username, 'status': None}
+        results.append(result)
+
+        errors = []
+        for field in FIELDS[:-1]:
+            try:
+                User._meta.get_field(field).clean(account[field], None)
+            except ValidationError as e:
+                errors.extend(e.messages)
+        slug = slugify(username)
+        if username and not slug:
+            errors.append("The username does not make a valid page slug.")
+
+        if errors:
+            result.update(status=INVALID, errors=errors)
+        elif username in valid or slug in slugs:
+            result['status'] = DUPLICATE
+        else:
+            valid[username] = account
+            slugs.add(slug)
+
+    existing = set()
+    if valid:
+        existing.update(User.objects.filter(username__in=list(valid)).values_list('username', flat=True))
+        taken = set(InventoryIndex.objects.filter(slug__in=slugs).values_list('slug', flat=True))
+        existing.update(username for username in valid if slugify(username) in taken)
+
+    accounts = {username: account for username, account in valid.items() if username not in existing}
+    if accounts:
+        passwords = executor.map(lambda account: make_password(account['password'] or None), accounts.values())
+        users = [
+            User(
+                username=username,
+                email=User.objects.normalize_email(account['email']),
+                first_name=account['first_name'],
+                last_name=account['last_name'],
+                password=password
+            )
+            for (username, account), password in zip(accounts.items(), passwords)
+        ]
+        with transaction.atomic():
+            _setup_users(context, users)
+
+    for result in results:
+        if result['status'] is None:
+            result['status'] = EXISTS if result['username'] in existing else CREATED
+    return results
+
+
+def _setup_users(context, users):
+    """
+    Saves the new users and gives them everything `setup_new_trainer` would.
+    Bulk inserts skip post_save, so the per-user signal does not run.
+    """
+    User = get_user_model()
+    now = timezone.now()
+
+    User.objects.bulk_create(users)
+    _ensure_pks(User, users, 'username')
+
+    groups = [Group(name=str(user.uuid)) for user in users]
+    Group.objects.bulk_create(groups)
+    _ensure_pks(Group, groups, 'name')
+
+    User.groups.through.objects.bulk_create(
+        [User.groups.through(user_id=user.pk, group_id=context.trainer_group.pk) for user in users]
+        + [User.groups.through(user_id=user.pk, group_id=group.pk) for user, group in zip(users, groups)]
+    )
+
+    # Collections, grouped under each user's bucket
+    collections = {}
+    children_by_parent = {}
+    for user in users:
+        parent = context.get_parent_collection(user)
+        collections[user.pk] = Collection(name=str(user.uuid))
+        children_by_parent.setdefault(parent, []).append(collections[user.pk])
+    bulk_add_children(children_by_parent)
+
+    index_collections = [
+        InventoryIndexCollection(user=user, collection=collections[user.pk]) for user in users
+    ]
+    InventoryIndexCollection.objects.bulk_create(index_collections)
+    _ensure_pks(InventoryIndexCollection, index_collections, 'user_id')
+
+    # Index pages, grouped under each user's bucket. Buckets are left out of
+    # URLs, so every index page's URL path is under the home page.
+    pages = {}
+    children_by_parent = {}
+    for user, index_collection in zip(users, index_collections):
+        parent = context.get_parent_page(user)
+        pages[user.pk] = _new_page(
+            InventoryIndex, parent, context.root_page.url_path, now,
+            title=user.username,
+            slug=slugify(user.username),
+            owner=user,
+            user_collection=index_collection
+        )
+        children_by_parent.setdefault(parent, []).append(pages[user.pk])
+    bulk_add_children(children_by_parent)
+
+    children_by_parent = {
+        page: [
+            _new_page(InventoryBox, page, page.url_path, now, title=f"Box {i}", slug=f"box-{i}", owner=page.owner)
+            for i in range(1, context.num_boxes + 1)
+        ]
+        for page in pages.values()
+    }
+    bulk_add_children(children_by_parent)
+
+    permission_set = PermissionSet()
+    for user, group in zip(users, groups):
+        add_user_permissions(permission_set, group, collections[user.pk], pages[user.pk])
+    sync_permissions(permission_set)
+
+
+def _new_page(page_class, parent, parent_url_path, published_at, **kwargs):
+    """
+    Builds an unsaved, live page the way `add_child` and a first publish
+    would leave it, minus the revision.
+    """
+    return page_class(
+        draft_title=kwargs['title'],
+        locale_id=parent.locale_id,
+        url_path=f"{parent_url_path}{kwargs['slug']}/",
+        live=True,
+        first_published_at=published_at,
+        last_published_at=published_at,
+        **kwargs
+    )
+
+
+def _ensure_pks(model, objs, field):
+    # Backends that can't return ids from a bulk insert
+    missing = [obj for obj in objs if obj.pk is None]
+    if missing:
+        pks = dict(
+            model.objects.filter(**{f'{field}__in': [getattr(obj, field) for obj in missing]})
+            .values_list(field, 'pk')
+        )
+        for obj in missing:
+            obj.pk = pks[getattr(obj, field)]
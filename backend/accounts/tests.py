@@ -0,0 +1,83 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from wagtail.models import Collection, GroupCollectionPermission, GroupPagePermission, Page
+
+from home.models import HomePage
+from inventory.models import InventoryBox, InventoryBucket, InventoryIndex
+
+from .onboarding import CREATED, DUPLICATE, EXISTS, INVALID, onboard_users, read_accounts
+from .utils import get_trainer_group
+
+ACCOUNTS = """username,email,password
+alice,alice@example.com,secret
+bob,bob@example.com,
+alice,alice@example.org,
+carol,not-an-email,
+"""
+
+
+@override_settings(INVENTORY_BUCKETS={'PAGES': 2, 'COLLECTIONS': 2})
+class OnboardUsersTest(TestCase):
+    def setUp(self):
+        """
+        Set up the home page and onboard a few users.
+        """
+        self.home = Page.get_first_root_node().add_child(instance=HomePage(title="Home", slug="home-test"))
+        self.results = list(onboard_users(read_accounts(io.StringIO(ACCOUNTS)), batch_size=2))
+
+    def assertTreesAreValid(self):
+        for model in (Page, Collection):
+            self.assertEqual([list(problems) for problems in model.find_problems()], [[]] * 5)
+
+    def test_results(self):
+        self.assertEqual(
+            [(result['line'], result['username'], result['status']) for result in self.results],
+            [(2, 'alice', CREATED), (3, 'bob', CREATED), (4, 'alice', EXISTS), (5, 'carol', INVALID)]
+        )
+
+    def test_duplicates_and_existing_users(self):
+        rows = [(2, {'username': 'bob', 'email': '', 'first_name': '', 'last_name': '', 'password': ''})]
+        rows.append((3, dict(rows[0][1], username='dave')))
+        rows.append((4, dict(rows[0][1], username='dave')))
+
+        results = list(onboard_users(rows))
+        self.assertEqual([result['status'] for result in results], [EXISTS, CREATED, DUPLICATE])
+        self.assertEqual(get_user_model().objects.filter(username='dave').count(), 1)
+
+    def test_trees_are_valid(self):
+        self.assertTreesAreValid()
+
+    def test_pages_are_bucketed_but_urls_are_not(self):
+        user = get_user_model().objects.get(username='alice')
+        page = InventoryIndex.objects.get(owner=user)
+
+        self.assertIsInstance(page.get_parent().specific, InventoryBucket)
+        self.assertEqual(page.url_path, f"{self.home.url_path}alice/")
+        self.assertEqual(
+            sorted(InventoryBox.objects.child_of(page).values_list('url_path', flat=True)),
+            [f"{self.home.url_path}alice/box-{i}/" for i in range(1, 6)]
+        )
+
+    def test_user_is_set_up_like_a_new_trainer(self):
+        user = get_user_model().objects.get(username='alice')
+        page = InventoryIndex.objects.get(owner=user)
+        group = user.groups.get(name=str(user.uuid))
+
+        self.assertTrue(user.check_password('secret'))
+        self.assertFalse(get_user_model().objects.get(username='bob').has_usable_password())
+        self.assertTrue(user.groups.filter(pk=get_trainer_group().pk).exists())
+        self.assertEqual(page.user_collection.collection.name, str(user.uuid))
+        self.assertTrue(GroupPagePermission.objects.filter(group=group, page=page).exists())
+        self.assertTrue(
+            GroupCollectionPermission.objects.filter(group=group, collection=page.user_collection.collection).exists()
+        )
+
+    def test_pages_can_be_added_afterwards(self):
+        page = InventoryIndex.objects.get(slug='alice')
+        page.add_child(instance=InventoryBox(title="Box 6", slug="box-6"))
+
+        user = get_user_model().objects.create_user(username='erin', password='password')
+        self.assertEqual(user.get_page().url_path, f"{self.home.url_path}erin/")
+        self.assertTreesAreValid()
@@ -1,23 +1,25 @@
 from django.db import transaction
 from django.contrib.auth.models import Group
 
-from base.utils import assign_group_permissions, assign_wagtail_group_permissions
+from base.permissions import PermissionSet, sync_permissions
 
 NTAG_PERMISSIONS = (
-    'change_nfctag', 'view_nfctagscan'
+    'ntags.change_nfctag', 'ntags.view_nfctagscan'
 )
 
 BOTANY_PERMISSIONS = (
-    'add_plant', 'change_plant', 'delete_plant', 'view_plant'
+    'botany.add_userplant', 'botany.change_userplant', 'botany.delete_userplant', 'botany.view_userplant'
 )
 
+# Wagtail checks image and document permissions against its own models,
+# whichever custom models are configured
 COLLECTION_PERMISSIONS = (
-    'add_image', 'change_image', 'choose_image',
-    'add_document', 'change_document', 'choose_document'
+    'wagtailimages.add_image', 'wagtailimages.change_image', 'wagtailimages.choose_image',
+    'wagtaildocs.add_document', 'wagtaildocs.change_document', 'wagtaildocs.choose_document'
 )
 
 PAGE_PERMISSIONS = (
-    'add_page', 'publish_page'
+    'wagtailcore.add_page', 'wagtailcore.publish_page'
 )
 
 
@@ -35,22 +37,78 @@ def setup_new_trainer(user):
 def assign_user_permissions(user):
 
     assign_trainer_permissions(user)
-    group = user.get_group()
 
-    collection = user.get_collection()
-    assign_wagtail_group_permissions(group, collection, COLLECTION_PERMISSIONS)
-
-    page = user.get_page()
-    assign_wagtail_group_permissions(group, page, PAGE_PERMISSIONS)
+    permission_set = PermissionSet()
+    add_user_permissions(permission_set, user.get_group(), user.get_collection(), user.get_page())
+    sync_permissions(permission_set)
 
 
 def assign_trainer_permissions(user):
 
+    group = get_trainer_group()
+    user.groups.add(group)
+
+
+def get_trainer_group():
+
     group, created = Group.objects.get_or_create(name='Trainers')
     if created:
-        # Assign botany permissions for all trainers
-        assign_group_permissions(group, BOTANY_PERMISSIONS)
-
-        # Assign ntag permissions for all trainers
-        assign_group_permissions(group, NTAG_PERMISSIONS)
-    user.groups.add(group)
+        permission_set = PermissionSet()
+        add_trainer_permissions(permission_set, group)
+        sync_permissions(permission_set)
+    return group
+
+
+def add_user_permissions(permission_set, group, collection, page):
+    """
+    Adds the permissions a user's own group has on their collection and page.
+    """
+    permission_set.add_collection_permissions(group, collection, COLLECTION_PERMISSIONS)
+    permission_set.add_page_permissions(group, page, PAGE_PERMISSIONS)
+
+
+def add_trainer_permissions(permission_set, group):
+    """
+    Adds the botany and ntag permissions shared by all trainers.
+    """
+    permission_set.add_model_permissions(group, BOTANY_PERMISSIONS + NTAG_PERMISSIONS)
+
+
+def sync_all_permissions(batch_size=1000, prune=True):
+    """
+    Re-syncs the trainer group and every user's group with the permissions
+    they should have, a batch of users at a time. Yields the number of users
+    and rows (created, deleted) for each batch. Users without a group,
+    collection or page are skipped.
+    """
+    from django.contrib.auth import get_user_model
+
+    permission_set = PermissionSet()
+    add_trainer_permissions(permission_set, get_trainer_group())
+    yield (0, *sync_permissions(permission_set, prune=prune))
+
+    users = get_user_model().objects.filter(
+        index_collection__collection__isnull=False,
+        index_collection__page__isnull=False
+    ).values_list('uuid', 'index_collection__collection_id', 'index_collection__page__pk')
+
+    last_uuid = None
+    while True:
+        # Keyset pagination keeps every batch as cheap as the first
+        batch = users.filter(uuid__gt=last_uuid) if last_uuid else users
+        batch = list(batch.order_by('uuid')[:batch_size])
+        if not batch:
+            break
+        last_uuid = batch[-1][0]
+
+        groups = dict(Group.objects.filter(name__in=[str(row[0]) for row in batch]).values_list('name', 'pk'))
+        permission_set = PermissionSet()
+        count = 0
+        for uuid, collection_id, page_id in batch:
+            group_id = groups.get(str(uuid))
+            if group_id is not None:
+                add_user_permissions(permission_set, group_id, collection_id, page_id)
+                count += 1
+        with transaction.atomic():
+            created, deleted = sync_permissions(permission_set, prune=prune)
+        yield count, created, deleted
@@ -6,6 +6,11 @@ class BaseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'base'
 
+    def ready(self):
+        from django.db.models.signals import post_migrate
+        from .permissions import clear_permission_ids
+        post_migrate.connect(clear_permission_ids, dispatch_uid='base.clear_permission_ids')
+
 
 class BaseImagesAppConfig(WagtailImagesAppConfig):
     default_attrs = {"decoding": "async", "loading": "lazy"}
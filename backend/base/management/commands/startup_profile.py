@@ -0,0 +1,137 @@
+import json
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PHASES = ('import', 'models', 'ready')
+
+
+def profile_startup():
+    """
+    Runs django.setup() and imports the URLconf in this (fresh) interpreter,
+    recording the time taken and the queries issued by each app, and prints
+    the results as JSON.
+    """
+    import django
+    from django.apps.config import AppConfig
+    from django.db import connections
+
+    timings = defaultdict(float)
+    queries = defaultdict(list)
+    current = ['django']
+
+    def record(execute, sql, params, many, context):
+        queries[current[-1]].append(sql)
+        return execute(sql, params, many, context)
+
+    def timed(label, phase, func, *args, **kwargs):
+        current.append(label)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings[(label, phase)] += time.perf_counter() - started
+            current.pop()
+
+    create = AppConfig.create.__func__
+    import_models = AppConfig.import_models
+
+    def create_app_config(cls, entry):
+        app_config = timed(entry, 'import', create, cls, entry)
+        if app_config.label != entry:
+            timings[(app_config.label, 'import')] += timings.pop((entry, 'import'))
+            queries[app_config.label].extend(queries.pop(entry, []))
+        ready = app_config.ready
+        app_config.ready = lambda: timed(app_config.label, 'ready', ready)
+        return app_config
+
+    def import_app_models(app_config):
+        return timed(app_config.label, 'models', import_models, app_config)
+
+    AppConfig.create = classmethod(create_app_config)
+    AppConfig.import_models = import_app_models
+
+    for alias in settings.DATABASES:
+        connections[alias].execute_wrappers.append(record)
+
+    started = time.perf_counter()
+    django.setup()
+    setup_time = time.perf_counter() - started
+
+    timed('urls', 'import', __import__, settings.ROOT_URLCONF)
+    total_time = time.perf_counter() - started
+
+    apps = {}
+    for (label, phase), elapsed in timings.items():
+        apps.setdefault(label, {'queries': queries.get(label, [])})[phase] = elapsed
+
+    json.dump({
+        'setup_time': setup_time,
+        'total_time': total_time,
+        'apps': apps,
+        'unattributed_queries': queries.get('django', []),
+    }, sys.stdout)
+
+
+class Command(BaseCommand):
+    help = (
+        "Start Django in a fresh interpreter and report the import time and database "
+        "queries of each app during django.setup() and URLconf loading."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help="Print the raw results as JSON.")
+        parser.add_argument('--show-queries', action='store_true', help="Print the SQL of every startup query.")
+        parser.add_argument(
+            '--fail-on-queries',
+            action='store_true',
+            help="Exit with an error if any query is issued during startup."
+        )
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [sys.executable, '-c', f'from {__name__} import profile_startup; profile_startup()'],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True
+        )
+        if result.returncode:
+            raise CommandError(f"Django failed to start:\n{result.stderr}")
+        profile = json.loads(result.stdout)
+
+        if options['json']:
+            self.stdout.write(json.dumps(profile, indent=2))
+        else:
+            self.write_report(profile, options['show_queries'])
+
+        query_count = len(profile['unattributed_queries']) + sum(
+            len(app['queries']) for app in profile['apps'].values()
+        )
+        if options['fail_on_queries'] and query_count:
+            raise CommandError(f"{query_count} queries were issued during startup.")
+
+    def write_report(self, profile, show_queries):
+        self.stdout.write(f"{'app':<24}{'import':>10}{'models':>10}{'ready':>10}{'queries':>10}")
+        apps = sorted(profile['apps'].items(), key=lambda item: -sum(item[1].get(phase, 0) for phase in PHASES))
+        for label, app in apps:
+            self.stdout.write(
+                f"{label:<24}"
+                + ''.join(f"{app.get(phase, 0) * 1000:>8.1f}ms" for phase in PHASES)
+                + f"{len(app['queries']):>10}"
+            )
+            if show_queries:
+                for sql in app['queries']:
+                    self.stdout.write(f"    {sql}")
+
+        self.stdout.write(
+            f"django.setup() took {profile['setup_time'] * 1000:.1f}ms, "
+            f"{profile['total_time'] * 1000:.1f}ms including the URLconf"
+        )
+        if profile['unattributed_queries']:
+            self.stdout.write(self.style.WARNING(
+                f"{len(profile['unattributed_queries'])} queries outside any app"
+            ))
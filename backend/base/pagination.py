@@ -0,0 +1,44 @@
+class KeysetPage:
+    """
+    One page of a queryset ordered by a unique key, plus the cursor for the
+    next page. Iterating and testing truthiness work like a list.
+    """
+
+    def __init__(self, object_list, next_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def keyset_paginate(queryset, cursor=None, per_page=30, key='pk'):
+    """
+    Returns the page of `queryset` that follows `cursor`, newest `key` first.
+
+    The page is fetched with `key < cursor ORDER BY key DESC LIMIT per_page + 1`,
+    so later pages cost the same as the first and no COUNT(*) is needed. The
+    extra row only tells whether there is a next page.
+    """
+    queryset = queryset.order_by(f'-{key}')
+    if cursor is not None:
+        try:
+            queryset = queryset.filter(**{f'{key}__lt': int(cursor)})
+        except (TypeError, ValueError):
+            pass  # An invalid cursor starts from the first page
+
+    object_list = list(queryset[:per_page + 1])
+    if len(object_list) > per_page:
+        object_list = object_list[:per_page]
+        return KeysetPage(object_list, getattr(object_list[-1], key))
+    return KeysetPage(object_list)
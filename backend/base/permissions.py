@@ -0,0 +1,146 @@
+import threading
+
+from django.db import transaction
+from django.db.models import Q
+
+_permission_ids = {}
+_permission_ids_lock = threading.Lock()
+
+
+def get_permission_ids(names):
+    """
+    Returns the ids of permissions named 'app_label.codename'.
+
+    Ids are looked up with one query for any names not seen before and then
+    kept for the life of the process. Raises Permission.DoesNotExist for
+    unknown names.
+    """
+    from django.contrib.auth.models import Permission
+
+    names = list(names)
+    with _permission_ids_lock:
+        missing = [name for name in names if name not in _permission_ids]
+
+    if missing:
+        conditions = []
+        for name in missing:
+            app_label, _, codename = name.partition('.')
+            conditions.append(Q(content_type__app_label=app_label, codename=codename))
+        found = {
+            f'{app_label}.{codename}': pk
+            for pk, app_label, codename in Permission.objects.filter(Q(*conditions, _connector=Q.OR)).values_list(
+                'pk', 'content_type__app_label', 'codename'
+            )
+        }
+        unknown = set(missing) - set(found)
+        if unknown:
+            raise Permission.DoesNotExist(f"Unknown permissions: {', '.join(sorted(unknown))}")
+        with _permission_ids_lock:
+            _permission_ids.update(found)
+
+    with _permission_ids_lock:
+        return [_permission_ids[name] for name in names]
+
+
+def clear_permission_ids(**kwargs):
+    """
+    Forgets cached permission ids. Connected to post_migrate, which may
+    create or remove permissions.
+    """
+    with _permission_ids_lock:
+        _permission_ids.clear()
+
+
+class PermissionSet:
+    """
+    The permissions a set of groups should have: model permissions, and
+    wagtail page and collection permissions. Groups, pages and collections
+    may be given as instances or ids.
+    """
+
+    def __init__(self):
+        self.groups = set()
+        self.model_permissions = set()
+        self.page_permissions = set()
+        self.collection_permissions = set()
+
+    def add_group(self, group):
+        """
+        Marks a group as managed by this set even if it has no permissions,
+        so syncing removes everything it has.
+        """
+        self.groups.add(_pk(group))
+
+    def add_model_permissions(self, group, names):
+        group_id = _pk(group)
+        self.groups.add(group_id)
+        self.model_permissions.update((group_id, pk) for pk in get_permission_ids(names))
+
+    def add_page_permissions(self, group, page, names):
+        group_id = _pk(group)
+        self.groups.add(group_id)
+        self.page_permissions.update((group_id, _pk(page), pk) for pk in get_permission_ids(names))
+
+    def add_collection_permissions(self, group, collection, names):
+        group_id = _pk(group)
+        self.groups.add(group_id)
+        self.collection_permissions.update((group_id, _pk(collection), pk) for pk in get_permission_ids(names))
+
+
+def sync_permissions(permission_set, prune=True, batch_size=1000):
+    """
+    Makes the groups in `permission_set` have exactly its permissions.
+
+    The groups' current permissions are read with one query per permission
+    model, missing rows are bulk created and, if `prune` is set, rows the
+    set does not list are deleted in one query per model. Returns the number
+    of rows (created, deleted).
+
+    The groups are locked until the sync commits, so concurrent syncs of the
+    same groups take turns instead of both counting the same rows.
+    """
+    from django.contrib.auth.models import Group
+    from wagtail.models import GroupCollectionPermission, GroupPagePermission
+
+    if not permission_set.groups:
+        return 0, 0
+
+    targets = (
+        (Group.permissions.through, ('group_id', 'permission_id'), permission_set.model_permissions),
+        (GroupPagePermission, ('group_id', 'page_id', 'permission_id'), permission_set.page_permissions),
+        (
+            GroupCollectionPermission,
+            ('group_id', 'collection_id', 'permission_id'),
+            permission_set.collection_permissions
+        ),
+    )
+
+    created = deleted = 0
+    with transaction.atomic():
+        list(Group.objects.select_for_update().filter(pk__in=permission_set.groups).order_by('pk').values_list('pk'))
+
+        for model, fields, desired in targets:
+            current = {
+                row[1:]: row[0]
+                for row in model.objects.filter(group_id__in=permission_set.groups).values_list('pk', *fields)
+            }
+
+            missing = desired - current.keys()
+            if missing:
+                model.objects.bulk_create(
+                    [model(**dict(zip(fields, row))) for row in missing],
+                    batch_size=batch_size,
+                    ignore_conflicts=True
+                )
+                # Count the rows the insert added rather than those it was sent
+                created += model.objects.filter(group_id__in=permission_set.groups).count() - len(current)
+
+            extra = current.keys() - desired
+            if prune and extra:
+                deleted += model.objects.filter(pk__in=[current[row] for row in extra]).delete()[0]
+
+    return created, deleted
+
+
+def _pk(obj):
+    return getattr(obj, 'pk', obj)
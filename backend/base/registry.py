@@ -0,0 +1,91 @@
+import warnings
+
+from django.db.models import Q
+
+
+class ModelRegistry:
+    """
+    The models named by a list-of-model-strings setting, resolved once.
+
+    Model classes and the content type query are built when the owning
+    app is ready. Content type ids need the database, so they are looked up
+    on first use and kept for the life of the process.
+    """
+
+    def __init__(self, setting_name):
+        self.setting_name = setting_name
+        self._model_strings = None
+        self._models = None
+        self._query = None
+        self._content_type_ids = None
+
+    def build(self):
+        """
+        Resolve the setting to model classes. Called from AppConfig.ready().
+        """
+        from django.apps import apps
+        from django.conf import settings
+
+        model_strings = getattr(settings, self.setting_name, None)
+        if model_strings is None:
+            warnings.warn(
+                f"{self.setting_name} is not set. Defaulting to an empty list.",
+                UserWarning
+            )
+            model_strings = []
+
+        models = []
+        for model_string in model_strings:
+            try:
+                models.append(apps.get_model(model_string))
+            except (ValueError, LookupError):
+                warnings.warn(f"Could not find model: {model_string}", UserWarning)
+
+        conditions = [Q(app_label=model._meta.app_label, model=model._meta.model_name) for model in models]
+
+        self._model_strings = list(model_strings)
+        self._models = models
+        self._query = Q(*conditions, _connector=Q.OR) if conditions else Q()
+        self._content_type_ids = None
+
+    @property
+    def model_strings(self):
+        self._ensure_built()
+        return self._model_strings
+
+    @property
+    def models(self):
+        self._ensure_built()
+        return self._models
+
+    @property
+    def query(self):
+        """
+        A Q object matching the registered models' content types.
+        """
+        self._ensure_built()
+        return self._query
+
+    @property
+    def content_type_ids(self):
+        if self._content_type_ids is None:
+            from django.contrib.contenttypes.models import ContentType
+
+            content_types = ContentType.objects.get_for_models(*self.models)
+            self._content_type_ids = [content_types[model].pk for model in self.models]
+        return self._content_type_ids
+
+    def content_types(self):
+        """
+        Returns a queryset of the registered models' content types.
+        """
+        from django.contrib.contenttypes.models import ContentType
+
+        if not self.models:
+            return ContentType.objects.none()
+        return ContentType.objects.filter(id__in=self.content_type_ids)
+
+    def _ensure_built(self):
+        # Migrations and scripts may ask before the app registry is ready
+        if self._models is None:
+            self.build()
@@ -0,0 +1,178 @@
+import json
+import subprocess
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import Group
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+from wagtail.models import Collection, Page
+
+from .pagination import keyset_paginate
+from .permissions import PermissionSet, sync_permissions
+from .tree import bulk_add_children
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        """
+        Set up seven groups, paged newest first.
+        """
+        self.pks = [Group.objects.create(name=f"Group {i}").pk for i in range(7)][::-1]
+
+    def get_pages(self, per_page):
+        pages = []
+        cursor = None
+        while True:
+            page = keyset_paginate(Group.objects.all(), cursor=cursor, per_page=per_page)
+            pages.append([group.pk for group in page])
+            if not page.has_next:
+                return pages
+            cursor = page.next_cursor
+
+    def test_pages_follow_each_other(self):
+        self.assertEqual(self.get_pages(3), [self.pks[:3], self.pks[3:6], self.pks[6:]])
+
+    def test_full_last_page_has_no_next_page(self):
+        Group.objects.filter(pk=self.pks[-1]).delete()
+        self.assertEqual(self.get_pages(3), [self.pks[:3], self.pks[3:6]])
+
+    def test_cursor_is_the_last_key_on_the_page(self):
+        page = keyset_paginate(Group.objects.all(), per_page=3)
+        self.assertEqual(page.next_cursor, self.pks[2])
+
+    def test_each_page_is_one_query(self):
+        with self.assertNumQueries(1):
+            keyset_paginate(Group.objects.all(), cursor=str(self.pks[2]), per_page=3)
+
+    def test_invalid_cursor_starts_from_the_first_page(self):
+        page = keyset_paginate(Group.objects.all(), cursor='not-a-key', per_page=3)
+        self.assertEqual([group.pk for group in page], self.pks[:3])
+
+
+class SyncPermissionsTest(TestCase):
+    def setUp(self):
+        """
+        Set up a group with one permission the set does not list.
+        """
+        self.group = Group.objects.create(name="Trainers")
+        self.permission_set = PermissionSet()
+        self.permission_set.add_model_permissions(self.group, ['auth.view_group', 'auth.view_permission'])
+
+        sync_permissions(self.permission_set, prune=False)
+        extra = PermissionSet()
+        extra.add_model_permissions(self.group, ['auth.change_group'])
+        sync_permissions(extra, prune=False)
+
+    def get_codenames(self):
+        return set(self.group.permissions.values_list('codename', flat=True))
+
+    def test_missing_permissions_are_created(self):
+        self.group.permissions.clear()
+
+        self.assertEqual(sync_permissions(self.permission_set, prune=False), (2, 0))
+        self.assertEqual(sync_permissions(self.permission_set, prune=False), (0, 0))
+        self.assertEqual(self.get_codenames(), {'view_group', 'view_permission'})
+
+    def test_extra_permissions_are_kept_without_prune(self):
+        self.assertEqual(sync_permissions(self.permission_set, prune=False), (0, 0))
+        self.assertEqual(self.get_codenames(), {'view_group', 'view_permission', 'change_group'})
+
+    def test_extra_permissions_are_pruned(self):
+        self.assertEqual(sync_permissions(self.permission_set), (0, 1))
+        self.assertEqual(self.get_codenames(), {'view_group', 'view_permission'})
+
+    def test_empty_group_is_cleared(self):
+        empty = PermissionSet()
+        empty.add_group(self.group)
+
+        self.assertEqual(sync_permissions(empty), (0, 3))
+        self.assertEqual(self.get_codenames(), set())
+
+
+class BulkAddChildrenTest(TestCase):
+    def assertTreeIsValid(self, model):
+        self.assertEqual([list(problems) for problems in model.find_problems()], [[]] * 5)
+
+    def test_children_are_appended(self):
+        parent = Page.get_first_root_node().add_child(instance=Page(title="Parent", slug="parent"))
+        parent.add_child(instance=Page(title="B", slug="b"))
+
+        nodes = bulk_add_children({
+            parent: [Page(title=slug.upper(), slug=slug, locale_id=parent.locale_id) for slug in ('c', 'a')]
+        })
+        self.assertEqual(list(parent.get_children().values_list('slug', flat=True)), ['b', 'c', 'a'])
+        self.assertEqual([node.path for node in nodes], [page.path for page in parent.get_children()[1:]])
+        self.assertEqual(parent.numchild, 3)
+        self.assertTreeIsValid(Page)
+
+    def test_ordered_children_are_sorted(self):
+        other = Collection.get_first_root_node().add_child(instance=Collection(name="Other"))
+        parent = Collection.get_first_root_node().add_child(instance=Collection(name="Parent"))
+        for name in ('b', 'd'):
+            parent.add_child(instance=Collection(name=name))
+
+        nodes = bulk_add_children({
+            parent: [Collection(name=name) for name in ('e', 'a', 'c')],
+            other: [Collection(name='f')],
+        })
+        self.assertEqual(list(parent.get_children().values_list('name', flat=True)), ['a', 'b', 'c', 'd', 'e'])
+        self.assertEqual(
+            [node.path for node in nodes], [Collection.objects.get(pk=node.pk).path for node in nodes]
+        )
+        self.assertEqual(parent.numchild, 5)
+        self.assertTreeIsValid(Collection)
+
+
+class StartupProfileTest(SimpleTestCase):
+    def profile(self, queries=()):
+        return {
+            'setup_time': 0.25,
+            'total_time': 0.5,
+            'apps': {
+                'ntags': {'queries': list(queries), 'import': 0.01, 'models': 0.02, 'ready': 0.03},
+                'botany': {'queries': [], 'import': 0.001},
+            },
+            'unattributed_queries': [],
+        }
+
+    def run_command(self, profile, *args, returncode=0):
+        stdout = StringIO()
+        completed = subprocess.CompletedProcess([], returncode, stdout=json.dumps(profile), stderr="Traceback")
+        with mock.patch('base.management.commands.startup_profile.subprocess.run', return_value=completed):
+            call_command('startup_profile', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_report(self):
+        lines = self.run_command(self.profile(["SELECT 1"]), '--show-queries').splitlines()
+
+        self.assertEqual(lines[0].split(), ['app', 'import', 'models', 'ready', 'queries'])
+        self.assertEqual(lines[1].split(), ['ntags', '10.0ms', '20.0ms', '30.0ms', '1'])
+        self.assertEqual(lines[2].strip(), "SELECT 1")
+        self.assertEqual(lines[3].split(), ['botany', '1.0ms', '0.0ms', '0.0ms', '0'])
+        self.assertEqual(lines[4], "django.setup() took 250.0ms, 500.0ms including the URLconf")
+
+    def test_json(self):
+        profile = self.profile()
+        self.assertEqual(json.loads(self.run_command(profile, '--json')), profile)
+
+    def test_fail_on_queries(self):
+        self.run_command(self.profile(), '--fail-on-queries')
+
+        with self.assertRaisesMessage(CommandError, "1 queries were issued during startup."):
+            self.run_command(self.profile(["SELECT 1"]), '--fail-on-queries')
+
+    def test_queries_are_allowed_by_default(self):
+        self.run_command(self.profile(["SELECT 1"]))
+
+    def test_startup_is_profiled(self):
+        stdout = StringIO()
+        call_command('startup_profile', '--json', '--fail-on-queries', stdout=stdout)
+
+        profile = json.loads(stdout.getvalue())
+        self.assertIn('ntags', profile['apps'])
+        self.assertGreaterEqual(profile['total_time'], profile['setup_time'])
+
+    def test_failed_startup(self):
+        with self.assertRaisesMessage(CommandError, "Django failed to start:\nTraceback"):
+            self.run_command(self.profile(), returncode=1)
@@ -0,0 +1,131 @@
+from collections import defaultdict
+
+from django.db import models
+from django.db.models.functions import Substr
+from treebeard.exceptions import PathOverflow
+
+
+def bulk_add_children(children_by_parent, batch_size=1000):
+    """
+    Adds each parent's children where repeated `parent.add_child(instance=child)`
+    calls would, and returns the new nodes.
+
+    The whole batch costs one query to lock the parents, one per tree depth
+    to find where their children end, batched INSERTs and one UPDATE of the
+    parents' numchild. Must be called inside a transaction. Nodes are saved
+    without signals, so pages get no revisions or search index entries.
+
+    Trees with `node_order_by`, such as collections, keep siblings sorted,
+    so their children are added one at a time through `add_child` instead.
+    """
+    children_by_parent = {parent: children for parent, children in children_by_parent.items() if children}
+    if not children_by_parent:
+        return []
+
+    tree_model = next(iter(children_by_parent))._meta.get_field('path').model
+    locked = tree_model.objects.select_for_update().in_bulk([parent.pk for parent in children_by_parent])
+    if tree_model.node_order_by:
+        return _add_sorted_children(tree_model, children_by_parent)
+
+    parents_by_depth = defaultdict(list)
+    for parent in locked.values():
+        parents_by_depth[parent.depth].append(parent.path)
+
+    last_paths = {}
+    for depth, paths in parents_by_depth.items():
+        last_paths.update(
+            tree_model.objects.filter(depth=depth + 1)
+            .annotate(parent_path=Substr('path', 1, depth * tree_model.steplen))
+            .filter(parent_path__in=paths)
+            .values('parent_path')
+            .annotate(last_path=models.Max('path'))
+            .values_list('parent_path', 'last_path')
+        )
+
+    max_step = len(tree_model.alphabet) ** tree_model.steplen - 1
+    nodes = []
+    added = {}
+    for parent, children in children_by_parent.items():
+        current = locked[parent.pk]
+        last_path = last_paths.get(current.path)
+        step = tree_model._str2int(last_path[-tree_model.steplen:]) if last_path else 0
+        if step + len(children) > max_step:
+            raise PathOverflow(f"Node {current.pk} has no room for {len(children)} more children")
+
+        for child in children:
+            step += 1
+            child.depth = current.depth + 1
+            child.path = tree_model._get_path(current.path, child.depth, step)
+            child.numchild = 0
+            nodes.append(child)
+
+        added[parent.pk] = len(children)
+        parent.path = current.path
+        parent.depth = current.depth
+        parent.numchild = current.numchild + len(children)
+
+    bulk_insert_nodes(tree_model, nodes, batch_size)
+
+    tree_model.objects.filter(pk__in=added).update(
+        numchild=models.F('numchild') + models.Case(
+            *[models.When(pk=pk, then=models.Value(count)) for pk, count in added.items()],
+            default=models.Value(0),
+            output_field=models.IntegerField()
+        )
+    )
+    return nodes
+
+
+def _add_sorted_children(tree_model, children_by_parent):
+    nodes = []
+    for parent, children in children_by_parent.items():
+        # Earlier inserts may have shifted this parent along with its siblings
+        current = tree_model.objects.get(pk=parent.pk)
+        for child in children:
+            nodes.append(current.add_child(instance=child))
+
+    # Each sorted insert shifts the paths of the siblings after it
+    parents = list(children_by_parent)
+    fresh = tree_model.objects.in_bulk([node.pk for node in nodes + parents])
+    for node in nodes + parents:
+        current = fresh[node.pk]
+        node.path, node.depth, node.numchild = current.path, current.depth, current.numchild
+    return nodes
+
+
+def bulk_insert_nodes(tree_model, nodes, batch_size=1000):
+    """
+    Inserts nodes that already have their tree fields set. Nodes may be
+    instances of direct multi-table subclasses of the tree model, such as
+    page types, in which case each subclass table gets its own INSERTs.
+    """
+    tree_model.objects.bulk_create(nodes, batch_size=batch_size)
+
+    pk_attname = tree_model._meta.pk.attname
+    missing = [node for node in nodes if getattr(node, pk_attname) is None]
+    if missing:
+        # Backends that can't return ids from a bulk insert
+        ids = dict(
+            tree_model.objects.filter(path__in=[node.path for node in missing]).values_list('path', 'pk')
+        )
+        for node in missing:
+            setattr(node, pk_attname, ids[node.path])
+
+    nodes_by_model = defaultdict(list)
+    for node in nodes:
+        if type(node)._meta.concrete_model is not tree_model:
+            nodes_by_model[type(node)._meta.concrete_model].append(node)
+
+    for model, model_nodes in nodes_by_model.items():
+        if list(model._meta.parents) != [tree_model]:
+            raise ValueError(f"{model.__name__} must be a direct subclass of {tree_model.__name__}")
+
+        parent_link = model._meta.parents[tree_model]
+        for node in model_nodes:
+            setattr(node, parent_link.attname, getattr(node, pk_attname))
+
+        # bulk_create() refuses multi-table models, so insert the subclass
+        # table the same way Model.save() does.
+        fields = model._meta.local_concrete_fields
+        for start in range(0, len(model_nodes), batch_size):
+            model._base_manager._insert(model_nodes[start:start + batch_size], fields=fields)
@@ -1,51 +1,26 @@
-from django.contrib.auth.models import Permission
+from .permissions import PermissionSet, sync_permissions
 
 
 def assign_group_permissions(group, permissions):
     """
-    Assigns the passed permissions for the given group.
+    Assigns the passed permissions, named 'app_label.codename', for the given group.
     """
-    _permissions = Permission.objects.filter(
-        codename__in=permissions
-    )
-    group.permissions.add(*_permissions)
-    group.save()
+    permission_set = PermissionSet()
+    permission_set.add_model_permissions(group, permissions)
+    sync_permissions(permission_set, prune=False)
     return group
 
 
 def assign_wagtail_group_permissions(group, obj, permissions):
-    from wagtail.models import (
-        Page, GroupPagePermission,
-        Collection, GroupCollectionPermission
-    )
+    """
+    Assigns the passed permissions, named 'app_label.codename', for the given
+    group on a wagtail page or collection.
+    """
+    from wagtail.models import Page, Collection
 
+    permission_set = PermissionSet()
     if isinstance(obj, Page):
-        for perm in permissions:
-            permission = Permission.objects.get(codename=perm)
-
-            if not GroupPagePermission.objects.filter(
-                group=group,
-                page=obj,
-                permission=permission
-            ).exists():
-                GroupPagePermission.objects.create(
-                    group=group,
-                    page=obj,
-                    permission=permission
-                )
-        return
+        permission_set.add_page_permissions(group, obj, permissions)
     elif isinstance(obj, Collection):
-        for perm in permissions:
-            permission = Permission.objects.get(codename=perm)
-
-            if not GroupCollectionPermission.objects.filter(
-                    group=group,
-                    collection=obj,
-                    permission=permission
-            ).exists():
-                GroupCollectionPermission.objects.create(
-                    group=group,
-                    collection=obj,
-                    permission=permission
-                )
-        return
+        permission_set.add_collection_permissions(group, obj, permissions)
+    sync_permissions(permission_set, prune=False)
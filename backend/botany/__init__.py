@@ -0,0 +1,77 @@
+GBIF = 'gbif'
+LOCAL = 'local'
+TAXONOMY_BACKENDS = (GBIF, LOCAL)
+
+DEFAULT_TAXONOMY = {
+    'BACKEND': GBIF,
+    'FUZZY_MIN_LENGTH': 3,
+}
+
+DEFAULT_GBIF_CACHE = {
+    'TIMEOUT': 60 * 60 * 24,
+    'STALE_TIMEOUT': 60 * 60 * 24 * 30,
+    'MAX_ENTRIES': 1024,
+    'BACKGROUND_REFRESH': True,
+}
+
+DEFAULT_GBIF_CLIENT = {
+    'BASE_URL': 'https://api.gbif.org/v1/',
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': 10,
+    'POOL_SIZE': 10,
+    'FAN_OUT': 4,
+    'PAGE_SIZE': 100,
+    'FAILURE_THRESHOLD': 5,
+    'RECOVERY_TIMEOUT': 30,
+}
+
+DEFAULT_SPECIES_AUTOCOMPLETE = {
+    'FETCH_LIMIT': 100,
+    'MAX_ENTRIES': 512,
+    'TIMEOUT': 60 * 10,
+}
+
+
+def get_gbif_cache_settings():
+    """
+    Returns the settings for the GBIF response cache.
+    """
+    from django.conf import settings
+
+    cache_settings = dict(DEFAULT_GBIF_CACHE)
+    cache_settings.update(getattr(settings, 'GBIF_CACHE', {}))
+    return cache_settings
+
+
+def get_gbif_client_settings():
+    """
+    Returns the settings for the HTTP client used to call the GBIF API.
+    """
+    from django.conf import settings
+
+    client_settings = dict(DEFAULT_GBIF_CLIENT)
+    client_settings.update(getattr(settings, 'GBIF_CLIENT', {}))
+    return client_settings
+
+
+def get_species_autocomplete_settings():
+    """
+    Returns the settings for species autocomplete.
+    """
+    from django.conf import settings
+
+    autocomplete_settings = dict(DEFAULT_SPECIES_AUTOCOMPLETE)
+    autocomplete_settings.update(getattr(settings, 'SPECIES_AUTOCOMPLETE', {}))
+    return autocomplete_settings
+
+
+def get_taxonomy_settings():
+    """
+    Returns the settings for species search: whether it uses the GBIF API
+    or the local taxonomy imported with `manage.py import_taxonomy`.
+    """
+    from django.conf import settings
+
+    taxonomy_settings = dict(DEFAULT_TAXONOMY)
+    taxonomy_settings.update(getattr(settings, 'TAXONOMY', {}))
+    return taxonomy_settings
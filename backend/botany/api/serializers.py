@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from wagtail.images.api.fields import ImageRenditionField
 
+from ..cloning import MAX_COPIES
 from ..models import UserPlant
 
 
@@ -15,3 +16,22 @@ class UserPlantSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserPlant
         fields = ['id', 'box', 'name', 'description', 'thumbnail', 'featured', 'detail', 'taxon_id', 'substrate', 'notes', 'active']
+
+
+class UserPlantCopiesSerializer(serializers.Serializer):
+    """
+    Options for copying a plant.
+    """
+    copies = serializers.IntegerField(min_value=1, max_value=MAX_COPIES)
+    notes = serializers.BooleanField(default=False)
+    image = serializers.BooleanField(default=True)
+
+
+class UserPlantCopySerializer(serializers.ModelSerializer):
+    """
+    A plant created by copying another, without image renditions.
+    """
+
+    class Meta:
+        model = UserPlant
+        fields = ['id', 'uuid', 'box', 'name', 'slug']
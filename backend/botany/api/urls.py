@@ -0,0 +1,12 @@
+from django.urls import path
+
+from .views import UserPlantViewSet
+
+# Only the copies action is routed; the rest of the viewset is not public
+urlpatterns = [
+    path(
+        'plants/<int:pk>/copies/',
+        UserPlantViewSet.as_view({'post': 'copies'}, detail=True, **UserPlantViewSet.copies.kwargs),
+        name='plant-copies'
+    ),
+]
@@ -1,9 +1,11 @@
-from rest_framework import viewsets
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 
 from ..models import UserPlant
-from .serializers import UserPlantSerializer
+from .serializers import UserPlantCopiesSerializer, UserPlantCopySerializer, UserPlantSerializer
 
 
 class UserPlantViewSet(viewsets.ModelViewSet):
@@ -14,4 +16,22 @@ class UserPlantViewSet(viewsets.ModelViewSet):
     authentication_classes = [JWTAuthentication]
 
     def get_queryset(self):
+        if not self.request.user.is_authenticated:
+            return UserPlant.objects.none()
         return UserPlant.objects.for_user(self.request.user)
+
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def copies(self, request, pk=None):
+        """
+        Create copies of a plant in its box. Accepts `copies`, `notes` (copy
+        the plant's notes too) and `image` (share the plant's image).
+        """
+        plant = self.get_object()
+        options = UserPlantCopiesSerializer(data=request.data)
+        options.is_valid(raise_exception=True)
+
+        plant_copies = plant.create_copies(**options.validated_data)
+        return Response(
+            UserPlantCopySerializer(plant_copies, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
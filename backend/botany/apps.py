@@ -9,6 +9,7 @@ class BotanyConfig(AppConfig):
 
     def ready(self):
         from wagtail.admin.forms.models import register_form_field_override  # noqa
+        from . import signals  # noqa: F401
         # from .models import UserPlant
         # from .widgets import UserPlantChooserWidget
         # register_form_field_override(ForeignKey, to=UserPlant, override={'widget': UserPlantChooserWidget})
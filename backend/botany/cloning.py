@@ -0,0 +1,102 @@
+from django.db import transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+MAX_COPIES = 1000
+
+
+def copy_names(plant, copies, taken_names=(), taken_slugs=()):
+    """
+    Returns `copies` (name, slug) pairs for copies of `plant`, numbered
+    "<name> - <n>" from 1 and skipping any number whose name or slug is
+    already taken, so none can break the box's uniqueness constraints.
+    """
+    name_field = plant._meta.get_field('name')
+    slug_field = plant._meta.get_field('slug')
+    taken_names = set(taken_names)
+    taken_slugs = set(taken_slugs)
+
+    names = []
+    number = 0
+    while len(names) < copies:
+        number += 1
+        suffix = f" - {number}"
+        name = plant.name[:name_field.max_length - len(suffix)] + suffix
+        slug = slugify(name)[:slug_field.max_length]
+        if name in taken_names or slug in taken_slugs:
+            continue
+        taken_names.add(name)
+        taken_slugs.add(slug)
+        names.append((name, slug))
+    return names
+
+
+@transaction.atomic
+def clone_plant(plant, copies, notes=False, image=True, batch_size=500):
+    """
+    Creates `copies` copies of `plant` in its box and returns them.
+
+    Names and slugs are worked out up front from the box's existing plants
+    and every copy is written with one bulk insert. If `notes` is set the
+    plant's notes are copied to each copy the same way. If `image` is set
+    the copies share the plant's image; the file itself is not copied.
+    """
+    from wagtail.models import Page
+    from .models import PlantNote, UserPlant
+
+    if copies < 1:
+        raise ValueError("Number of copies must be at least 1.")
+    if copies > MAX_COPIES:
+        raise ValueError(f"Number of copies must be at most {MAX_COPIES}.")
+
+    # Lock the box so concurrent copies can't pick the same names
+    list(Page.objects.select_for_update().filter(pk=plant.box_id).values_list('pk', flat=True))
+
+    # Every copy's name and slug starts with these, however long the suffix
+    name_prefix = plant.name[:200]
+    slug_prefix = slugify(name_prefix)
+    taken = list(
+        UserPlant.objects.filter(box_id=plant.box_id)
+        .filter(Q(name__startswith=name_prefix) | Q(slug__startswith=slug_prefix))
+        .values_list('name', 'slug')
+    )
+    taken_names = {name for name, slug in taken}
+    taken_slugs = {slug for name, slug in taken}
+
+    plant_copies = UserPlant.objects.bulk_create(
+        [
+            UserPlant(
+                box_id=plant.box_id,
+                name=name,
+                slug=slug,
+                description=plant.description,
+                taxon_id=plant.taxon_id,
+                substrate_id=plant.substrate_id,
+                image_id=plant.image_id if image else None,
+            )
+            for name, slug in copy_names(plant, copies, taken_names, taken_slugs)
+        ],
+        batch_size=batch_size
+    )
+
+    if notes:
+        source_notes = list(PlantNote.objects.filter(plant=plant).values('heading', 'content'))
+        if source_notes:
+            if any(plant_copy.pk is None for plant_copy in plant_copies):
+                # Backends that can't return ids from a bulk insert
+                ids = dict(
+                    UserPlant.objects.filter(uuid__in=[plant_copy.uuid for plant_copy in plant_copies])
+                    .values_list('uuid', 'pk')
+                )
+                for plant_copy in plant_copies:
+                    plant_copy.pk = ids[plant_copy.uuid]
+            PlantNote.objects.bulk_create(
+                [
+                    PlantNote(plant_id=plant_copy.pk, **note)
+                    for plant_copy in plant_copies
+                    for note in source_notes
+                ],
+                batch_size=batch_size
+            )
+
+    return plant_copies
@@ -4,6 +4,7 @@ from django.db import transaction
 from django.core.exceptions import ValidationError
 from wagtail.admin.forms import WagtailAdminModelForm
 
+from .cloning import MAX_COPIES
 from .views import PlantSpecies
 # from .widgets import SpeciesChooserWidget
 
@@ -11,7 +12,7 @@ from .views import PlantSpecies
 class UserPlantAdminForm(WagtailAdminModelForm):
     # Adding a non-model field to the form, defaulting to hidden
     copies = forms.IntegerField(
-        max_value=30,
+        max_value=MAX_COPIES,
         min_value=0,
         initial=0,
         required=False,
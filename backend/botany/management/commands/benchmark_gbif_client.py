@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand
+from queryish.rest import APIQuerySet
+
+from botany import get_gbif_client_settings
+from botany.species.client import GBIFQuerySet, build_gbif_client
+from botany.species.fake import FakeGBIFServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Time listing species from a local fake GBIF server with queryish's own paging against the pooled, "
+        "concurrent GBIF client."
+    )
+
+    def add_arguments(self, parser):
+        client_settings = get_gbif_client_settings()
+        parser.add_argument('--count', type=int, default=2000, help="Number of species the server lists.")
+        parser.add_argument('--latency', type=float, default=50, help="Server latency per request, in ms.")
+        parser.add_argument(
+            '--page-size', type=int, default=FakeGBIFServer.default_limit,
+            help="Page size of the pooled client. Defaults to the page size queryish gets from GBIF."
+        )
+        parser.add_argument(
+            '--fan-out', type=int, default=client_settings['FAN_OUT'],
+            help="Pages the pooled client fetches at a time."
+        )
+
+    def handle(self, *args, **options):
+        with FakeGBIFServer(count=options['count'], latency=options['latency'] / 1000) as server:
+            results = [
+                ('queryish', self.run(server, self.queryish_queryset(server))),
+                ('pooled', self.run(server, self.pooled_queryset(server, options, fan_out=1))),
+                (f"pooled x{options['fan_out']}", self.run(server, self.pooled_queryset(server, options))),
+            ]
+
+        self.stdout.write(f"{options['count']} species, {options['latency']:.0f}ms latency")
+        baseline = results[0][1][0]
+        for label, (elapsed, requests, connections) in results:
+            self.stdout.write(
+                f"{label:>12}: {elapsed * 1000:.1f}ms, {requests} requests, {connections} connections, "
+                f"{baseline / elapsed:.1f}x"
+            )
+
+    def run(self, server, queryset):
+        server.reset_counts()
+        started = time.perf_counter()
+        listed = len(list(queryset))
+        elapsed = time.perf_counter() - started
+        if getattr(queryset, 'client', None) is not None:
+            queryset.client.close()
+        if listed != server.count:
+            self.stderr.write(f"Listed {listed} of {server.count} species")
+        return elapsed, server.requests, server.connections
+
+    def queryish_queryset(self, server):
+        # How PlantSpecies listed species before the pooled client
+        queryset = APIQuerySet()
+        queryset.base_url = f'{server.url}species/search/'
+        queryset.pagination_style = 'offset-limit'
+        return queryset
+
+    def pooled_queryset(self, server, options, fan_out=None):
+        queryset = GBIFQuerySet()
+        queryset.base_url = f'{server.url}species/search/'
+        queryset.pagination_style = 'offset-limit'
+        queryset.client = build_gbif_client(
+            base_url=server.url,
+            page_size=options['page_size'],
+            fan_out=fan_out or options['fan_out']
+        )
+        return queryset
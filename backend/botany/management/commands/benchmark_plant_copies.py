@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from botany.cloning import MAX_COPIES, clone_plant
+from botany.models import PlantNote, UserPlant
+
+
+class Command(BaseCommand):
+    help = (
+        "Time copying a plant one create() at a time against the bulk cloning engine. "
+        "Every copy is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plant', type=int, help="Id of the plant to copy. Defaults to the first plant.")
+        parser.add_argument('--copies', type=int, default=MAX_COPIES, help="Number of copies to make.")
+        parser.add_argument('--notes', action='store_true', help="Copy the plant's notes as well.")
+
+    def handle(self, *args, **options):
+        plants = UserPlant.objects.order_by('pk')
+        plant = plants.filter(pk=options['plant']).first() if options['plant'] else plants.first()
+        if plant is None:
+            raise CommandError("No plant to copy.")
+
+        results = [
+            ('create()', self.run(self.create_copies, plant, options)),
+            ('bulk_create()', self.run(clone_plant, plant, options)),
+        ]
+
+        self.stdout.write(
+            f"{options['copies']} copies of {plant.name!r}"
+            f"{' with notes' if options['notes'] else ''} on {connection.vendor}"
+        )
+        for label, (elapsed, queries) in results:
+            self.stdout.write(
+                f"{label:>14}: {elapsed * 1000:.1f}ms, {queries} queries, "
+                f"{options['copies'] / elapsed:.0f} copies/s"
+            )
+
+    def run(self, clone, plant, options):
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                clone(plant, options['copies'], notes=options['notes'])
+                elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        return elapsed, len(queries)
+
+    def create_copies(self, plant, copies, notes=False):
+        # How copies were made before the cloning engine
+        source_notes = list(PlantNote.objects.filter(plant=plant).values('heading', 'content')) if notes else []
+        for copy_number in range(1, copies + 1):
+            plant_copy = UserPlant.objects.create(
+                box=plant.box,
+                name=f"{plant.name} - {copy_number}",
+                description=plant.description,
+            )
+            for note in source_notes:
+                PlantNote.objects.create(plant=plant_copy, **note)
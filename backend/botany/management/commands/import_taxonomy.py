@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from botany.species.backbone import import_taxonomy, open_backbone
+
+
+class Command(BaseCommand):
+    help = (
+        "Load taxa from a GBIF backbone Darwin Core Archive (or its Taxon.tsv) into the local "
+        "taxonomy used when TAXONOMY['BACKEND'] is 'local'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Backbone archive (.zip) or tab-separated taxon file.")
+        parser.add_argument(
+            '--higher-taxon',
+            type=int,
+            help="Only import this taxon and its descendants, e.g. 6 for Plantae or 2519 for Cactaceae."
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help="Number of taxa to write at a time."
+        )
+        parser.add_argument(
+            '--replace',
+            action='store_true',
+            help="Empty the local taxonomy before importing instead of updating it."
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = 0
+        try:
+            for written in import_taxonomy(
+                open_backbone(options['path']),
+                higher_taxon_key=options['higher_taxon'],
+                batch_size=options['batch_size'],
+                replace=options['replace']
+            ):
+                if options['verbosity'] > 1:
+                    self.stdout.write(f"{written} taxa imported")
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not import {options['path']}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {written} taxa in {time.perf_counter() - started:.1f}s"
+        ))
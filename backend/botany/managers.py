@@ -6,6 +6,12 @@ class UserPlantManager(NFCTaggableManager):
     Custom manager for UserPlant model, extending the abstract NFCTaggableManager.
     """
 
+    def for_nfc_tags(self):
+        """
+        Select the box each plant's URL is built from.
+        """
+        return self.select_related('box')
+
     def for_user(self, user):
         """
         Get a queryset of UserPlant instances for a specific user.
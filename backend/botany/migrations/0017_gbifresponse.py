@@ -0,0 +1,28 @@
+# Generated by Django 5.1 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('botany', '0016_remove_userplant_notes_userplant_image_plantnote_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GBIFResponse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('endpoint', models.CharField(max_length=64)),
+                ('params', models.JSONField(default=dict)),
+                ('data', models.JSONField(null=True)),
+                ('fetched_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'GBIF response',
+                'verbose_name_plural': 'GBIF responses',
+            },
+        ),
+    ]
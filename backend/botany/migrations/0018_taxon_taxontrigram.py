@@ -0,0 +1,55 @@
+# Generated by Django 5.1 on 2026-10-18 12:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('botany', '0017_gbifresponse'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Taxon',
+            fields=[
+                ('key', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('parent_key', models.BigIntegerField(blank=True, null=True)),
+                ('accepted_key', models.BigIntegerField(blank=True, null=True)),
+                ('scientific_name', models.CharField(max_length=255)),
+                ('canonical_name', models.CharField(blank=True, max_length=255)),
+                ('search_name', models.CharField(editable=False, max_length=255)),
+                ('rank', models.CharField(max_length=32)),
+                ('status', models.CharField(max_length=32)),
+                ('kingdom_key', models.BigIntegerField(blank=True, db_index=True, null=True)),
+                ('phylum_key', models.BigIntegerField(blank=True, db_index=True, null=True)),
+                ('class_key', models.BigIntegerField(blank=True, db_index=True, null=True)),
+                ('order_key', models.BigIntegerField(blank=True, db_index=True, null=True)),
+                ('family_key', models.BigIntegerField(blank=True, db_index=True, null=True)),
+                ('genus_key', models.BigIntegerField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'taxon',
+                'verbose_name_plural': 'taxa',
+                'indexes': [
+                    models.Index(fields=['search_name'], name='botany_taxon_search_prefix', opclasses=['varchar_pattern_ops']),
+                    models.Index(fields=['rank', 'status', 'search_name'], name='botany_taxon_rank_status_name'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaxonTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('taxon', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='trigrams', to='botany.taxon')),
+            ],
+            options={
+                'verbose_name': 'taxon trigram',
+                'verbose_name_plural': 'taxon trigrams',
+                'indexes': [models.Index(fields=['trigram', 'taxon'], name='botany_taxontrigram_lookup')],
+                'constraints': [models.UniqueConstraint(fields=('taxon', 'trigram'), name='unique_taxon_trigram')],
+            },
+        ),
+    ]
@@ -1,5 +1,5 @@
 import uuid
-from django.db import models, transaction
+from django.db import models
 from django.conf import settings
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
@@ -179,7 +179,8 @@ class UserPlant(Orderable, ClusterableModel):
         return self.get_parent_collection()
 
     def get_parent_collection(self):
-        return self.user.collection
+        from inventory.resolver import get_user_inventory
+        return get_user_inventory(self.box.owner_id).collection
 
     def get_inventory_form(self, request):
         tasks = {}
@@ -194,24 +195,123 @@ class UserPlant(Orderable, ClusterableModel):
 
         return tasks
 
-    @transaction.atomic
-    def create_copies(self, copies):
+    def create_copies(self, copies, notes=False, image=True):
         """
         Creates specified number of copies of this UserPlant instance.
         """
-        if copies < 1:
-            raise ValueError("Number of copies must be at least 1.")
-
-        plant_copies = []
-
-        for copy_number in range(1, copies + 1):
-            plant_copy = UserPlant.objects.create(
-                box=self.box,
-                name=f"{self.name} - {copy_number}",
-                description=self.description,
-            )
-            plant_copies.append(plant_copy)
-
-        # Bulk create all plant copies for efficiency
-        # UserPlant.objects.bulk_create(plant_copies, ignore_conflicts=True)
-        return plant_copies
+        from .cloning import clone_plant
+        return clone_plant(self, copies, notes=notes, image=image)
+
+
+class GBIFResponse(models.Model):
+    """
+    A cached response from the GBIF API, keyed by a hash of the endpoint
+    and its normalized parameters.
+    """
+    key = models.CharField(
+        max_length=64,
+        unique=True
+    )
+    endpoint = models.CharField(
+        max_length=64
+    )
+    params = models.JSONField(
+        default=dict
+    )
+    data = models.JSONField(
+        null=True
+    )
+    fetched_at = models.DateTimeField(
+        db_index=True
+    )
+
+    class Meta:
+        verbose_name = _('GBIF response')
+        verbose_name_plural = _('GBIF responses')
+
+    def __str__(self):
+        return f"{self.endpoint} {self.params}"
+
+
+class Taxon(models.Model):
+    """
+    A name from the GBIF backbone taxonomy, imported with
+    `manage.py import_taxonomy` so species can be searched locally.
+
+    The keys of the taxon's kingdom down to its genus are stored on it, so
+    "every taxon in this family" is a single indexed lookup.
+    """
+    key = models.BigIntegerField(
+        primary_key=True
+    )
+    parent_key = models.BigIntegerField(
+        null=True,
+        blank=True
+    )
+    accepted_key = models.BigIntegerField(
+        null=True,
+        blank=True
+    )
+    scientific_name = models.CharField(
+        max_length=255
+    )
+    canonical_name = models.CharField(
+        max_length=255,
+        blank=True
+    )
+    search_name = models.CharField(
+        max_length=255,
+        editable=False
+    )
+    rank = models.CharField(
+        max_length=32
+    )
+    status = models.CharField(
+        max_length=32
+    )
+    kingdom_key = models.BigIntegerField(null=True, blank=True, db_index=True)
+    phylum_key = models.BigIntegerField(null=True, blank=True, db_index=True)
+    class_key = models.BigIntegerField(null=True, blank=True, db_index=True)
+    order_key = models.BigIntegerField(null=True, blank=True, db_index=True)
+    family_key = models.BigIntegerField(null=True, blank=True, db_index=True)
+    genus_key = models.BigIntegerField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        verbose_name = _('taxon')
+        verbose_name_plural = _('taxa')
+        indexes = [
+            # opclasses let PostgreSQL use the index for LIKE 'prefix%' under
+            # any collation; other databases ignore them
+            models.Index(fields=['search_name'], name='botany_taxon_search_prefix', opclasses=['varchar_pattern_ops']),
+            models.Index(fields=['rank', 'status', 'search_name'], name='botany_taxon_rank_status_name'),
+        ]
+
+    def __str__(self):
+        return self.scientific_name
+
+
+class TaxonTrigram(models.Model):
+    """
+    One three-letter slice of a taxon's search name, for finding names
+    that are spelled differently from the search terms.
+    """
+    taxon = models.ForeignKey(
+        Taxon,
+        related_name='trigrams',
+        # Trigrams are deleted by the importer, so deleting taxa doesn't
+        # need to collect them first
+        on_delete=models.DO_NOTHING
+    )
+    trigram = models.CharField(
+        max_length=3
+    )
+
+    class Meta:
+        verbose_name = _('taxon trigram')
+        verbose_name_plural = _('taxon trigrams')
+        indexes = [
+            models.Index(fields=['trigram', 'taxon'], name='botany_taxontrigram_lookup'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['taxon', 'trigram'], name='unique_taxon_trigram'),
+        ]
@@ -0,0 +1,29 @@
+from django.core.signals import setting_changed
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from inventory.models import InventoryBox
+from ntags.cache import invalidate_nfc_tags_for
+
+from .models import UserPlant
+from .species.autocomplete import reset_species_autocomplete
+from .species.cache import reset_gbif_cache
+from .species.client import reset_gbif_client
+
+
+@receiver(post_save, sender=InventoryBox)
+@receiver(pre_delete, sender=InventoryBox)
+def box_changed(sender, instance, **kwargs):
+    # A plant's URL is built from its box's URL. Deletion is handled before
+    # the box's plants are deleted with it, while they can still be listed.
+    invalidate_nfc_tags_for(UserPlant, instance.plants.values_list('pk', flat=True))
+
+
+@receiver(setting_changed)
+def species_setting_changed(sender, setting, **kwargs):
+    if setting == 'GBIF_CACHE':
+        reset_gbif_cache()
+    elif setting == 'GBIF_CLIENT':
+        reset_gbif_client()
+    elif setting == 'SPECIES_AUTOCOMPLETE':
+        reset_species_autocomplete()
@@ -0,0 +1,214 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from .. import get_species_autocomplete_settings
+from .cache import get_cache_key, normalize_params
+from .taxonomy import normalize_name
+
+METRICS = ('hits', 'refined', 'misses', 'coalesced')
+
+# Record fields a query is matched against when a cached result set is refined
+NAME_FIELDS = ('canonicalName', 'scientificName')
+
+_species_autocomplete = None
+_species_autocomplete_lock = threading.Lock()
+
+
+class Completion(namedtuple('Completion', ['records', 'count'])):
+    """
+    The records found for a query, in upstream order, and the total number
+    of matches, which is None when upstream does not say.
+    """
+
+    @property
+    def complete(self):
+        return self.count is not None and len(self.records) >= self.count
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+
+def get_record_words(record):
+    """
+    Returns the normalized words of a record's names, including the
+    vernacular names of GBIF species search results.
+    """
+    names = [record.get(field) or '' for field in NAME_FIELDS]
+    names.extend(name.get('vernacularName') or '' for name in record.get('vernacularNames') or ())
+    return normalize_name(' '.join(names)).split()
+
+
+def record_matches(record, query):
+    """
+    Returns whether every word of a normalized query starts one of the words
+    in a record's names.
+    """
+    words = get_record_words(record)
+    return all(any(word.startswith(term) for word in words) for term in query.split())
+
+
+class SpeciesAutocomplete:
+    """
+    Answers species autocomplete queries while a name is being typed.
+
+    Every upstream result set is remembered per query. When a query extends
+    one whose full result set is remembered, that set is filtered here
+    instead of asking upstream again, so once the matches fit in FETCH_LIMIT
+    the following keystrokes never leave the process. This relies on
+    upstream matching names by prefix, so the matches for "mamm" are among
+    those for "mam"; searches that match anywhere in a record, like GBIF's
+    full-text species search, pass `refine=False`. Identical queries arriving
+    while one is in flight wait for its result rather than making their own
+    call.
+    """
+
+    def __init__(self, fetch_limit, max_entries, timeout):
+        self.fetch_limit = fetch_limit
+        self.max_entries = max_entries
+        self.timeout = timeout
+
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._metrics = dict.fromkeys(METRICS, 0)
+
+    def search(self, q, params, fetch, limit=0, refine=True):
+        """
+        Returns the Completion for `q` within the scope set by `params`,
+        holding at least `limit` records unless there are fewer matches.
+        Unless `refine` is False, a remembered result set for a shorter
+        query may be filtered instead of calling upstream.
+
+        `fetch(q, limit)` asks upstream for up to `limit` records and
+        returns them with the total number of matches, or None if that is
+        not known.
+        """
+        query = normalize_name(q)
+        key = (get_cache_key('autocomplete', normalize_params(params)), query)
+
+        while True:
+            with self._lock:
+                completion = self._lookup(key, limit, refine)
+                if completion is not None:
+                    return completion
+                flight = self._in_flight.get(key)
+                if flight is None:
+                    flight = self._in_flight[key] = _Flight()
+                    break
+
+            self._count('coalesced')
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+
+        self._count('misses')
+        try:
+            fetch_limit = max(self.fetch_limit, limit)
+            records, count = fetch(q, fetch_limit)
+            records = list(records)
+            if count is None and len(records) < fetch_limit:
+                count = len(records)
+            completion = Completion(records, count)
+            with self._lock:
+                self._set(key, completion)
+            return completion
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            flight.done.set()
+
+    def metrics(self):
+        """
+        Returns this process's hit, refinement, miss and coalesced counts
+        and the number of result sets held.
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['entries'] = len(self._entries)
+        return metrics
+
+    def clear(self):
+        """
+        Forgets every result set and resets the metrics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._metrics = dict.fromkeys(METRICS, 0)
+
+    def _lookup(self, key, limit, refine):
+        # Called with the lock held
+        scope, query = key
+        completion = self._get(key)
+        if completion is not None and (completion.complete or len(completion.records) >= limit):
+            self._metrics['hits'] += 1
+            return completion
+        if not refine:
+            return None
+
+        for length in range(len(query) - 1, 0, -1):
+            superset = self._get((scope, query[:length]))
+            if superset is not None and superset.complete:
+                records = [record for record in superset.records if record_matches(record, query)]
+                completion = Completion(records, len(records))
+                self._set(key, completion)
+                self._metrics['refined'] += 1
+                return completion
+        return None
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, completion = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return completion
+
+    def _set(self, key, completion):
+        self._entries[key] = (time.monotonic() + self.timeout, completion)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _count(self, metric):
+        with self._lock:
+            self._metrics[metric] += 1
+
+
+def get_species_autocomplete():
+    """
+    Returns the process-wide species autocomplete, built from
+    SPECIES_AUTOCOMPLETE on first use.
+    """
+    global _species_autocomplete
+
+    if _species_autocomplete is None:
+        with _species_autocomplete_lock:
+            if _species_autocomplete is None:
+                autocomplete_settings = get_species_autocomplete_settings()
+                _species_autocomplete = SpeciesAutocomplete(
+                    fetch_limit=autocomplete_settings['FETCH_LIMIT'],
+                    max_entries=autocomplete_settings['MAX_ENTRIES'],
+                    timeout=autocomplete_settings['TIMEOUT']
+                )
+    return _species_autocomplete
+
+
+def reset_species_autocomplete():
+    """
+    Drops the process-wide species autocomplete, so the next use rebuilds
+    it from the current settings.
+    """
+    global _species_autocomplete
+
+    with _species_autocomplete_lock:
+        _species_autocomplete = None
@@ -0,0 +1,225 @@
+import csv
+import io
+import sys
+import zipfile
+
+from defusedxml import ElementTree
+from django.db import transaction
+
+from .taxonomy import RANK_KEY_FIELDS, get_trigrams, normalize_name
+
+DWC_NAMESPACE = '{http://rs.tdwg.org/dwc/text/}'
+
+# Darwin Core columns of the GBIF backbone, and the names used by GBIF's
+# species list downloads, mapped to Taxon fields
+COLUMNS = {
+    'key': ('taxonid', 'taxonkey', 'id'),
+    'parent_key': ('parentnameusageid', 'parentkey'),
+    'accepted_key': ('acceptednameusageid', 'acceptedtaxonkey', 'acceptedkey'),
+    'scientific_name': ('scientificname',),
+    'canonical_name': ('canonicalname',),
+    'rank': ('taxonrank', 'rank'),
+    'status': ('taxonomicstatus', 'status'),
+}
+
+FIELD_LENGTH = 255
+
+
+def open_backbone(path):
+    """
+    Returns a function that opens a fresh stream of lines from a GBIF
+    backbone file each time it is called: a Darwin Core Archive (whose core
+    file is found through meta.xml) or a plain tab-separated file.
+    """
+    if zipfile.is_zipfile(path):
+        def open_lines():
+            archive = zipfile.ZipFile(path)
+            return io.TextIOWrapper(archive.open(_find_core_file(archive)), encoding='utf-8', newline='')
+    else:
+        def open_lines():
+            return open(path, encoding='utf-8-sig', newline='')
+    return open_lines
+
+
+def read_taxa(lines):
+    """
+    Yields a dict of Taxon fields for every row of a tab-separated backbone
+    file with a header row. Rows without a numeric key are skipped.
+    """
+    csv.field_size_limit(sys.maxsize)
+    reader = csv.reader(lines, delimiter='\t', quoting=csv.QUOTE_NONE)
+    header = [name.strip().lower() for name in next(reader, [])]
+    positions = {
+        field: next((header.index(name) for name in names if name in header), None)
+        for field, names in COLUMNS.items()
+    }
+    if positions['key'] is None or positions['scientific_name'] is None:
+        raise ValueError("The file must have taxonID (or taxonKey) and scientificName columns.")
+    rank_key_positions = {
+        field: header.index(f'{rank.lower()}key')
+        for rank, field in RANK_KEY_FIELDS.items()
+        if f'{rank.lower()}key' in header
+    }
+
+    for row in reader:
+        taxon = {}
+        for field, position in positions.items():
+            value = row[position].strip() if position is not None and position < len(row) else ''
+            taxon[field] = value
+        try:
+            taxon['key'] = int(taxon['key'])
+        except ValueError:
+            continue
+        for field in ('parent_key', 'accepted_key'):
+            taxon[field] = _to_int(taxon[field])
+        taxon['rank'] = taxon['rank'].upper()
+        taxon['status'] = taxon['status'].upper()
+        # Species list downloads carry the higher taxon keys themselves
+        taxon['rank_keys'] = {
+            field: _to_int(row[position]) for field, position in rank_key_positions.items() if position < len(row)
+        }
+        yield taxon
+
+
+def import_taxonomy(open_lines, higher_taxon_key=None, batch_size=5000, replace=False):
+    """
+    Loads taxa from a backbone file into the Taxon and TaxonTrigram tables
+    and yields the number of taxa written after each batch.
+
+    The file is read twice: once to learn every taxon's parent and rank, so
+    the keys of its higher taxa can be stored on it, and once to write it.
+    If `higher_taxon_key` is given only that taxon and its descendants are
+    imported. Existing taxa are updated unless `replace` empties the tables
+    first.
+    """
+    from ..models import Taxon, TaxonTrigram
+
+    parents = {}
+    ranks = {}
+    with open_lines() as lines:
+        for taxon in read_taxa(lines):
+            parents[taxon['key']] = taxon['parent_key']
+            ranks[taxon['key']] = taxon['rank']
+    lineages = _Lineages(parents, ranks)
+
+    if replace:
+        with transaction.atomic():
+            TaxonTrigram.objects.all().delete()
+            Taxon.objects.all().delete()
+
+    written = 0
+    batch = []
+    with open_lines() as lines:
+        for taxon in read_taxa(lines):
+            if higher_taxon_key is not None and not lineages.descends_from(taxon['key'], higher_taxon_key):
+                continue
+            batch.append(_build_taxon(taxon, lineages))
+            if len(batch) >= batch_size:
+                written += _write_batch(batch, replace)
+                yield written
+                batch = []
+
+    if batch:
+        written += _write_batch(batch, replace)
+        yield written
+
+
+class _Lineages:
+    """
+    The higher taxon keys of every taxon, worked out from parent links and
+    remembered for taxa that have children.
+    """
+
+    def __init__(self, parents, ranks):
+        self.parents = parents
+        self.ranks = ranks
+        self._parent_keys = set(parents.values())
+        self._memo = {}
+
+    def get(self, key):
+        # Walk up until a remembered ancestor, then fill in on the way down
+        path = []
+        seen = set()
+        while key is not None and key not in self._memo and key not in seen:
+            seen.add(key)
+            path.append(key)
+            key = self.parents.get(key)
+        lineage = self._memo.get(key, {}) if key is not None else {}
+
+        for key in reversed(path):
+            lineage = dict(lineage)
+            field = RANK_KEY_FIELDS.get(self.ranks.get(key))
+            if field:
+                lineage[field] = key
+            lineage['ancestors'] = lineage.get('ancestors', frozenset()) | {key}
+            if key in self._parent_keys:
+                self._memo[key] = lineage
+        return lineage
+
+    def descends_from(self, key, ancestor_key):
+        return ancestor_key in self.get(key).get('ancestors', ())
+
+
+def _build_taxon(taxon, lineages):
+    from ..models import Taxon
+
+    lineage = lineages.get(taxon['key'])
+    rank_keys = {field: lineage.get(field) for field in RANK_KEY_FIELDS.values()}
+    rank_keys.update({field: key for field, key in taxon['rank_keys'].items() if key is not None})
+    return Taxon(
+        key=taxon['key'],
+        parent_key=taxon['parent_key'],
+        accepted_key=taxon['accepted_key'],
+        scientific_name=taxon['scientific_name'][:FIELD_LENGTH],
+        canonical_name=taxon['canonical_name'][:FIELD_LENGTH],
+        search_name=normalize_name(taxon['canonical_name'] or taxon['scientific_name'])[:FIELD_LENGTH],
+        rank=taxon['rank'],
+        status=taxon['status'],
+        **rank_keys
+    )
+
+
+@transaction.atomic
+def _write_batch(taxa, replace):
+    from ..models import Taxon, TaxonTrigram
+
+    keys = [taxon.key for taxon in taxa]
+    if replace:
+        Taxon.objects.bulk_create(taxa)
+    else:
+        TaxonTrigram.objects.filter(taxon_id__in=keys).delete()
+        Taxon.objects.bulk_create(
+            taxa,
+            update_conflicts=True,
+            unique_fields=['key'],
+            update_fields=[field.name for field in Taxon._meta.concrete_fields if not field.primary_key]
+        )
+    TaxonTrigram.objects.bulk_create(
+        [
+            TaxonTrigram(taxon_id=taxon.key, trigram=trigram)
+            for taxon in taxa
+            for trigram in get_trigrams(taxon.search_name)
+        ],
+        batch_size=10000
+    )
+    return len(taxa)
+
+
+def _find_core_file(archive):
+    names = archive.namelist()
+    if 'meta.xml' in names:
+        meta = ElementTree.fromstring(archive.read('meta.xml'))
+        location = meta.find(f'{DWC_NAMESPACE}core/{DWC_NAMESPACE}files/{DWC_NAMESPACE}location')
+        if location is not None and location.text in names:
+            return location.text
+    for name in ('Taxon.tsv', 'taxon.txt', 'Taxon.txt'):
+        if name in names:
+            return name
+    raise ValueError("Could not find the taxon file in the archive.")
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,242 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+from .. import get_gbif_cache_settings
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('memory_hits', 'db_hits', 'misses', 'stale', 'refreshes', 'errors')
+
+# Parameters GBIF matches case-insensitively
+CASE_INSENSITIVE_PARAMS = ('q', 'name')
+
+_gbif_cache = None
+_gbif_cache_lock = threading.Lock()
+
+
+def normalize_params(params):
+    """
+    Returns the parameters that change a GBIF response, in a canonical form:
+    empty values dropped, strings stripped and names lower-cased.
+    """
+    normalized = {}
+    for key, value in params.items():
+        if value is None or value == '':
+            continue
+        if isinstance(value, str):
+            value = ' '.join(value.split())
+            if key in CASE_INSENSITIVE_PARAMS:
+                value = value.casefold()
+        normalized[key] = value
+    return dict(sorted(normalized.items()))
+
+
+def get_cache_key(endpoint, params):
+    """
+    Returns the cache key for an endpoint and its normalized parameters.
+    """
+    payload = json.dumps([endpoint, params], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class GBIFCache:
+    """
+    A two-tier cache of GBIF responses: a per-process LRU in front of the
+    GBIFResponse table, which every process shares.
+
+    Entries younger than TIMEOUT are served as they are. Older entries are
+    served while a refresh runs, until STALE_TIMEOUT, after which the
+    caller waits for GBIF. If GBIF fails, the last response is served if
+    there is one.
+    """
+
+    def __init__(self, timeout, stale_timeout, max_entries, background_refresh=True):
+        self.timeout = timedelta(seconds=timeout)
+        self.stale_timeout = timedelta(seconds=stale_timeout)
+        self.max_entries = max_entries
+        self.background_refresh = background_refresh
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._metrics = dict.fromkeys(METRICS, 0)
+
+    def get(self, endpoint, params, fetch):
+        """
+        Returns the response for `endpoint` with `params`, calling `fetch()`
+        for it only when there is no usable cached copy.
+        """
+        params = normalize_params(params)
+        key = get_cache_key(endpoint, params)
+
+        entry = self._get_memory(key)
+        if entry is not None:
+            self._count('memory_hits')
+        else:
+            entry = self._get_db(key)
+            if entry is not None:
+                self._count('db_hits')
+                self._set_memory(key, entry)
+
+        if entry is None:
+            self._count('misses')
+            return self._fetch(key, endpoint, params, fetch)
+
+        fetched_at, data = entry
+        age = timezone.now() - fetched_at
+        if age <= self.timeout:
+            return data
+        if age <= self.stale_timeout:
+            self._count('stale')
+            self._refresh(key, endpoint, params, fetch)
+            return data
+        return self._fetch(key, endpoint, params, fetch, fallback=entry)
+
+    def metrics(self):
+        """
+        Returns this process's hit, miss and refresh counts and the number
+        of responses held in memory.
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['memory_entries'] = len(self._entries)
+        lookups = metrics['memory_hits'] + metrics['db_hits'] + metrics['misses']
+        metrics['hit_rate'] = (metrics['memory_hits'] + metrics['db_hits']) / lookups if lookups else 0.0
+        return metrics
+
+    def clear(self):
+        """
+        Empties the in-memory tier and resets the metrics. The database tier
+        is left alone.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._metrics = dict.fromkeys(METRICS, 0)
+
+    def _fetch(self, key, endpoint, params, fetch, fallback=None):
+        try:
+            data = fetch()
+        except Exception:
+            self._count('errors')
+            if fallback is None:
+                raise
+            logger.warning("GBIF %s failed, serving a cached response", endpoint, exc_info=True)
+            return fallback[1]
+
+        entry = (timezone.now(), data)
+        self._set_memory(key, entry)
+        self._set_db(key, endpoint, params, entry)
+        return data
+
+    def _refresh(self, key, endpoint, params, fetch):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._fetch(key, endpoint, params, fetch)
+                self._count('refreshes')
+            except Exception:
+                logger.warning("GBIF %s refresh failed", endpoint, exc_info=True)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        if not self.background_refresh:
+            refresh()
+            return
+
+        def refresh_in_thread():
+            try:
+                refresh()
+            finally:
+                connections.close_all()
+
+        threading.Thread(target=refresh_in_thread, daemon=True).start()
+
+    def _get_memory(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _set_memory(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_db(self, key):
+        from ..models import GBIFResponse
+
+        try:
+            return GBIFResponse.objects.filter(key=key).values_list('fetched_at', 'data').first()
+        except DatabaseError:
+            logger.warning("Could not read cached GBIF response", exc_info=True)
+            return None
+
+    def _set_db(self, key, endpoint, params, entry):
+        from ..models import GBIFResponse
+
+        fetched_at, data = entry
+        try:
+            GBIFResponse.objects.bulk_create(
+                [GBIFResponse(key=key, endpoint=endpoint, params=params, data=data, fetched_at=fetched_at)],
+                update_conflicts=True,
+                unique_fields=['key'],
+                update_fields=['data', 'fetched_at']
+            )
+        except DatabaseError:
+            logger.warning("Could not store GBIF response", exc_info=True)
+
+    def _count(self, metric):
+        with self._lock:
+            self._metrics[metric] += 1
+
+
+def get_gbif_cache():
+    """
+    Returns the process-wide GBIF cache, built from GBIF_CACHE on first use.
+    """
+    global _gbif_cache
+
+    if _gbif_cache is None:
+        with _gbif_cache_lock:
+            if _gbif_cache is None:
+                cache_settings = get_gbif_cache_settings()
+                _gbif_cache = GBIFCache(
+                    timeout=cache_settings['TIMEOUT'],
+                    stale_timeout=cache_settings['STALE_TIMEOUT'],
+                    max_entries=cache_settings['MAX_ENTRIES'],
+                    background_refresh=cache_settings['BACKGROUND_REFRESH']
+                )
+    return _gbif_cache
+
+
+def reset_gbif_cache():
+    """
+    Drops the process-wide GBIF cache, so the next use rebuilds it from
+    the current settings.
+    """
+    global _gbif_cache
+
+    with _gbif_cache_lock:
+        _gbif_cache = None
+
+
+def cached_gbif_call(endpoint, func, **params):
+    """
+    Returns `func(**params)`, a pygbif call, through the GBIF cache.
+    """
+    return get_gbif_cache().get(endpoint, params, lambda: func(**params))
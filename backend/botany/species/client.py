@@ -0,0 +1,237 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+from queryish.rest import APIQuerySet
+
+from .. import get_gbif_client_settings
+
+_gbif_client = None
+_gbif_client_lock = threading.Lock()
+
+
+class GBIFUnavailable(requests.RequestException):
+    """
+    Raised instead of calling GBIF while the circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a failing service: after `failure_threshold` failures in
+    a row it opens and refuses calls for `recovery_timeout` seconds, then
+    lets a single trial call through. A success closes it again.
+    """
+
+    def __init__(self, failure_threshold, recovery_timeout):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None
+
+    def allow(self):
+        """
+        Returns whether a call may be made now.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self._opened_at < self.recovery_timeout:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial = False
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class GBIFClient:
+    """
+    Calls the GBIF API over a pool of keep-alive connections, with timeouts
+    and a circuit breaker, and runs independent calls concurrently on a
+    shared pool of threads.
+    """
+
+    def __init__(self, base_url, connect_timeout, read_timeout, pool_size, fan_out, page_size,
+                 failure_threshold, recovery_timeout):
+        self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.fan_out = fan_out
+        self.page_size = page_size
+        self.breaker = CircuitBreaker(failure_threshold, recovery_timeout)
+
+        self.session = requests.Session()
+        self.session.headers.update({'Accept': 'application/json'})
+        adapter = HTTPAdapter(pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='gbif')
+
+    def get(self, url, params=None):
+        """
+        Returns the JSON response to a GET request. `url` may be relative
+        to BASE_URL.
+        """
+        if not self.breaker.allow():
+            raise GBIFUnavailable("GBIF is not being called after repeated failures.")
+
+        try:
+            response = self.session.get(urljoin(self.base_url, url), params=_encode(params), timeout=self.timeout)
+        except requests.RequestException:
+            self.breaker.record_failure()
+            raise
+
+        if response.status_code >= 500 or response.status_code == 429:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        response.raise_for_status()
+        return response.json()
+
+    def map(self, func, items):
+        """
+        Yields `func(item)` for every item, in order, running up to FAN_OUT
+        calls ahead of the consumer.
+        """
+        items = iter(items)
+        if self.fan_out <= 1:
+            yield from map(func, items)
+            return
+
+        pending = deque(self._executor.submit(func, item) for item in islice(items, self.fan_out))
+        while pending:
+            result = pending.popleft().result()
+            pending.extend(self._executor.submit(func, item) for item in islice(items, 1))
+            yield result
+
+    def close(self):
+        self.session.close()
+        self._executor.shutdown(wait=False)
+
+
+class GBIFQuerySet(APIQuerySet):
+    """
+    An APIQuerySet that calls GBIF through the pooled client and fetches the
+    pages of an offset-limit listing concurrently once the first page has
+    given the total count.
+    """
+
+    client = None
+
+    def get_client(self):
+        return self.client or get_gbif_client()
+
+    def fetch_api_response(self, url=None, params=None):
+        if url is None:
+            url = self.base_url
+        if params is None:
+            params = {}
+
+        key = tuple([url] + sorted(params.items(), key=lambda item: item[0]))
+        if key not in self._responses:
+            self._responses[key] = self.get_client().get(url, params=params)
+        return self._responses[key]
+
+    def run_query(self):
+        params = self.get_filters_as_query_dict()
+        if self.pagination_style != 'offset-limit' or list(params.keys()) == [self.pk_field_name]:
+            yield from super().run_query()
+            return
+
+        if self.ordering:
+            params[self.ordering_query_param] = ",".join(self.ordering)
+
+        client = self.get_client()
+        stop = None if self.limit is None else self.offset + self.limit
+
+        def fetch(offset, limit):
+            return self.fetch_api_response(params={
+                self.offset_query_param: offset,
+                self.limit_query_param: limit,
+                **params,
+            })
+
+        first_page = fetch(self.offset, client.page_size if stop is None else min(client.page_size, self.limit))
+        results = self.get_results_from_response(first_page)
+        for result in results:
+            yield self.get_instance(result)
+
+        # GBIF caps the page size, so later pages are as long as the first
+        step = len(results)
+        end = first_page['count'] if stop is None else min(stop, first_page['count'])
+        if step == 0:
+            return
+
+        pages = client.map(lambda offset: fetch(offset, min(step, end - offset)), range(self.offset + step, end, step))
+        for page in pages:
+            for result in self.get_results_from_response(page):
+                yield self.get_instance(result)
+
+
+def get_gbif_client():
+    """
+    Returns the process-wide GBIF client, built from GBIF_CLIENT on first
+    use.
+    """
+    global _gbif_client
+
+    if _gbif_client is None:
+        with _gbif_client_lock:
+            if _gbif_client is None:
+                _gbif_client = build_gbif_client()
+    return _gbif_client
+
+
+def build_gbif_client(**overrides):
+    """
+    Returns a new GBIF client from the GBIF_CLIENT settings, with any of
+    them overridden by lower-cased keyword arguments.
+    """
+    client_settings = {key.lower(): value for key, value in get_gbif_client_settings().items()}
+    client_settings.update(overrides)
+    return GBIFClient(**client_settings)
+
+
+def reset_gbif_client():
+    """
+    Closes the process-wide GBIF client, so the next use builds a new one
+    from the current settings.
+    """
+    global _gbif_client
+
+    with _gbif_client_lock:
+        if _gbif_client is not None:
+            _gbif_client.close()
+        _gbif_client = None
+
+
+def _encode(params):
+    # Leaves out unset parameters and sends booleans the way GBIF expects them
+    return {
+        key: str(value).lower() if isinstance(value, bool) else value
+        for key, value in (params or {}).items()
+        if value is not None
+    }
@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeGBIFServer:
+    """
+    A local stand-in for GBIF's species search endpoint, for benchmarks and
+    tests. It pages through `count` species the way GBIF does, waits
+    `latency` seconds before every response and counts the requests and
+    connections it receives. Setting `failing` makes it answer 503.
+    """
+
+    default_limit = 20
+    max_limit = 1000
+
+    def __init__(self, count=1000, latency=0.0):
+        self.count = count
+        self.latency = latency
+        self.failing = False
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def reset_counts(self):
+        with self._lock:
+            self.requests = 0
+            self.connections = 0
+
+    def search(self, query):
+        offset = int(query.get('offset', [0])[0])
+        limit = min(int(query.get('limit', [self.default_limit])[0]), self.max_limit)
+        keys = range(offset, min(offset + limit, self.count))
+        return {
+            'offset': offset,
+            'limit': limit,
+            'endOfRecords': offset + limit >= self.count,
+            'count': self.count,
+            'results': [
+                {'key': key, 'scientificName': f'Species {key:05d} L.', 'canonicalName': f'Species {key:05d}'}
+                for key in keys
+            ],
+        }
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def do_GET(self):
+                with fake._lock:
+                    fake.requests += 1
+                time.sleep(fake.latency)
+
+                url = urlparse(self.path)
+                if fake.failing:
+                    self.respond(503, {'error': 'unavailable'})
+                elif url.path.rstrip('/') == '/species/search':
+                    self.respond(200, fake.search(parse_qs(url.query)))
+                else:
+                    self.respond(404, {'error': 'not found'})
+
+            def respond(self, status, data):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,56 @@
+"""
+The pygbif.species calls used by the species views, made through the pooled
+GBIF client. They take the same arguments and return the same data.
+"""
+from .client import get_gbif_client
+
+
+def name_suggest(q=None, datasetKey=None, rank=None, limit=100, offset=None):
+    return get_gbif_client().get('species/suggest', params={
+        'q': q,
+        'datasetKey': datasetKey,
+        'rank': rank,
+        'limit': limit,
+        'offset': offset,
+    })
+
+
+def name_backbone(name, rank=None, kingdom=None, phylum=None, clazz=None, order=None, family=None, genus=None,
+                  strict=False, verbose=False, offset=None, limit=100):
+    return get_gbif_client().get('species/match', params={
+        'name': name,
+        'rank': rank,
+        'kingdom': kingdom,
+        'phylum': phylum,
+        'class': clazz,
+        'order': order,
+        'family': family,
+        'genus': genus,
+        'strict': strict,
+        'verbose': verbose,
+        'offset': offset,
+        'limit': limit,
+    })
+
+
+def name_lookup(q=None, rank=None, higherTaxonKey=None, status=None, limit=100, offset=None):
+    return get_gbif_client().get('species/search', params={
+        'q': q,
+        'rank': rank,
+        'higherTaxonKey': higherTaxonKey,
+        'status': status,
+        'limit': limit,
+        'offset': offset,
+    })
+
+
+def name_usage(key=None, name=None, rank=None, language=None, datasetKey=None, limit=100, offset=None):
+    url = 'species' if key is None else f'species/{key}'
+    return get_gbif_client().get(url, params={
+        'name': name,
+        'rank': rank,
+        'language': language,
+        'datasetKey': datasetKey,
+        'limit': limit,
+        'offset': offset,
+    })
@@ -0,0 +1,114 @@
+import unicodedata
+
+from django.db.models import Count
+
+from .. import LOCAL, get_taxonomy_settings
+
+RANK_KEY_FIELDS = {
+    'KINGDOM': 'kingdom_key',
+    'PHYLUM': 'phylum_key',
+    'CLASS': 'class_key',
+    'ORDER': 'order_key',
+    'FAMILY': 'family_key',
+    'GENUS': 'genus_key',
+}
+
+
+def use_local_taxonomy():
+    """
+    Returns whether species search should use the imported local taxonomy.
+    """
+    return get_taxonomy_settings()['BACKEND'] == LOCAL
+
+
+def normalize_name(name):
+    """
+    Returns a name as it is stored for searching: accents removed, case
+    folded and whitespace collapsed.
+    """
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    return ' '.join(name.casefold().split())
+
+
+def get_trigrams(name):
+    """
+    Returns the set of trigrams in a normalized name, with each word padded
+    the way PostgreSQL's pg_trgm does, so short words and word starts count.
+    """
+    trigrams = set()
+    for word in name.split():
+        padded = f"  {word} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def filter_taxa(queryset, rank=None, status=None, higher_taxon_key=None):
+    """
+    Narrows a Taxon queryset the way the GBIF search API's rank, status and
+    higherTaxonKey parameters do.
+    """
+    from ..models import Taxon
+
+    if rank:
+        queryset = queryset.filter(rank=rank.upper())
+    if status:
+        queryset = queryset.filter(status=status.upper())
+    if higher_taxon_key:
+        higher_rank = Taxon.objects.filter(key=higher_taxon_key).values_list('rank', flat=True).first()
+        field = RANK_KEY_FIELDS.get(higher_rank)
+        if field is None:
+            return queryset.none()
+        queryset = queryset.filter(**{field: higher_taxon_key})
+    return queryset
+
+
+def search_taxa(q, rank=None, status=None, higher_taxon_key=None, limit=10, fuzzy=True):
+    """
+    Returns up to `limit` taxa whose names start with `q`, alphabetically.
+    Only if no name starts with `q` are the taxa sharing the most trigrams
+    with it returned instead, so misspellings still find something without
+    padding exact matches with loosely related names.
+    """
+    from ..models import Taxon, TaxonTrigram
+
+    search_name = normalize_name(q)
+    taxa = filter_taxa(Taxon.objects.all(), rank, status, higher_taxon_key)
+    results = list(taxa.filter(search_name__startswith=search_name).order_by('search_name')[:limit])
+
+    if not fuzzy or results or len(search_name) < get_taxonomy_settings()['FUZZY_MIN_LENGTH']:
+        return results
+
+    trigrams = get_trigrams(search_name)
+    matches = (
+        TaxonTrigram.objects.filter(trigram__in=trigrams, taxon__in=taxa)
+        .values('taxon')
+        .annotate(matches=Count('taxon'))
+        .filter(matches__gte=max(1, len(trigrams) // 2))
+        .order_by('-matches', 'taxon')
+        .values_list('taxon', flat=True)[:limit]
+    )
+    matches = list(matches)
+    similar = Taxon.objects.in_bulk(matches)
+    return [similar[key] for key in matches if key in similar]
+
+
+def get_gbif_record(taxon):
+    """
+    Returns a taxon in the shape of a GBIF species search result.
+    """
+    return {
+        'key': taxon.key,
+        'parentKey': taxon.parent_key,
+        'acceptedKey': taxon.accepted_key,
+        'scientificName': taxon.scientific_name,
+        'canonicalName': taxon.canonical_name,
+        'rank': taxon.rank,
+        'taxonomicStatus': taxon.status,
+        'kingdomKey': taxon.kingdom_key,
+        'phylumKey': taxon.phylum_key,
+        'classKey': taxon.class_key,
+        'orderKey': taxon.order_key,
+        'familyKey': taxon.family_key,
+        'genusKey': taxon.genus_key,
+    }
@@ -1,10 +1,11 @@
 from django.urls import path
 
-from .views import NameSuggestView, NameBackboneView, NameLookupView, NameUsageView
+from .views import NameSuggestView, NameBackboneView, NameLookupView, NameUsageView, GBIFCacheStatsView
 
 urlpatterns = [
     path('name_suggest/', NameSuggestView.as_view(), name='name_suggest'),
     path('name_backbone/', NameBackboneView.as_view(), name='name_backbone'),
     path('name_lookup/', NameLookupView.as_view(), name='name_lookup'),
     path('name_usage/', NameUsageView.as_view(), name='name_usage'),
+    path('cache_stats/', GBIFCacheStatsView.as_view(), name='gbif_cache_stats'),
 ]
@@ -1,7 +1,12 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
-from pygbif import species
+from rest_framework.permissions import IsAdminUser
+
+from . import gbif as species
+from .autocomplete import get_species_autocomplete
+from .cache import cached_gbif_call, get_gbif_cache
+from .taxonomy import filter_taxa, get_gbif_record, normalize_name, search_taxa, use_local_taxonomy
 
 
 class NameSuggestView(APIView):
@@ -16,9 +21,20 @@ class NameSuggestView(APIView):
         if not name:
             raise ValidationError("The 'name' parameter is required for name_suggest.")
 
+        if use_local_taxonomy():
+            return Response([get_gbif_record(taxon) for taxon in search_taxa(name, rank=rank, limit=limit)])
+
+        def fetch(q, fetch_limit):
+            return cached_gbif_call('name_suggest', species.name_suggest, q=q, rank=rank, limit=fetch_limit), None
+
         try:
-            results = species.name_suggest(q=name, rank=rank, limit=limit)
-            return Response(results)
+            completion = get_species_autocomplete().search(
+                name,
+                {'endpoint': 'name_suggest', 'rank': rank},
+                fetch,
+                limit=limit
+            )
+            return Response(completion.records[:limit])
         except Exception as e:
             return Response({'error': str(e)}, status=500)
 
@@ -40,7 +56,9 @@ class NameBackboneView(APIView):
             raise ValidationError("The 'name' parameter is required for name_backbone.")
 
         try:
-            results = species.name_backbone(
+            results = cached_gbif_call(
+                'name_backbone',
+                species.name_backbone,
                 name=name,
                 rank=rank,
                 kingdom=kingdom,
@@ -66,12 +84,32 @@ class NameLookupView(APIView):
         if not name:
             raise ValidationError("The 'name' parameter is required for name_lookup.")
 
+        if use_local_taxonomy():
+            return Response(self.local_lookup(name, rank, limit))
+
         try:
-            results = species.name_lookup(q=name, rank=rank, limit=limit)
+            results = cached_gbif_call('name_lookup', species.name_lookup, q=name, rank=rank, limit=limit)
             return Response(results)
         except Exception as e:
             return Response({'error': str(e)}, status=500)
 
+    def local_lookup(self, name, rank, limit):
+        """
+        Searches the local taxonomy and answers in the shape of GBIF's
+        paged species search.
+        """
+        from ..models import Taxon
+
+        taxa = filter_taxa(Taxon.objects.all(), rank=rank).filter(search_name__startswith=normalize_name(name))
+        count = taxa.count()
+        return {
+            'offset': 0,
+            'limit': limit,
+            'endOfRecords': count <= limit,
+            'count': count,
+            'results': [get_gbif_record(taxon) for taxon in taxa.order_by('search_name')[:limit]],
+        }
+
 
 class NameUsageView(APIView):
     """
@@ -86,7 +124,20 @@ class NameUsageView(APIView):
             raise ValidationError("The 'name' parameter is required for name_usage.")
 
         try:
-            results = species.name_usage(name=name, rank=rank, limit=limit)
+            results = cached_gbif_call('name_usage', species.name_usage, name=name, rank=rank, limit=limit)
             return Response(results)
         except Exception as e:
             return Response({'error': str(e)}, status=500)
+
+
+class GBIFCacheStatsView(APIView):
+    """
+    Hit, miss and refresh counts of this process's GBIF cache and species
+    autocomplete.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        metrics = get_gbif_cache().metrics()
+        metrics['autocomplete'] = get_species_autocomplete().metrics()
+        return Response(metrics)
@@ -0,0 +1,353 @@
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
+
+import requests
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from wagtail.models import Page
+
+from home.models import HomePage
+from inventory.models import InventoryBox
+from .cloning import MAX_COPIES
+from .models import GBIFResponse, PlantNote, Taxon, UserPlant
+from .species.autocomplete import SpeciesAutocomplete, get_species_autocomplete, reset_species_autocomplete
+from .species.backbone import import_taxonomy, open_backbone
+from .species.cache import get_gbif_cache, reset_gbif_cache
+from .species.client import GBIFQuerySet, GBIFUnavailable, build_gbif_client
+from .species.fake import FakeGBIFServer
+from .species.taxonomy import search_taxa
+
+BACKBONE = [
+    ('taxonID', 'parentNameUsageID', 'acceptedNameUsageID', 'scientificName', 'canonicalName', 'taxonRank',
+     'taxonomicStatus'),
+    ('6', '', '', 'Plantae', 'Plantae', 'kingdom', 'accepted'),
+    ('1370', '6', '', 'Caryophyllales', 'Caryophyllales', 'order', 'accepted'),
+    ('2519', '1370', '', 'Cactaceae', 'Cactaceae', 'family', 'accepted'),
+    ('3084923', '2519', '', 'Mammillaria Haw.', 'Mammillaria', 'genus', 'accepted'),
+    ('5384069', '3084923', '', 'Mammillaria bocasana Poselg.', 'Mammillaria bocasana', 'species', 'accepted'),
+    ('5384070', '3084923', '', 'Mammillaria elongata DC.', 'Mammillaria elongata', 'species', 'accepted'),
+    ('3085094', '2519', '', 'Opuntia Mill.', 'Opuntia', 'genus', 'accepted'),
+    ('5383920', '3085094', '', 'Opúntia ficus-indica (L.) Mill.', 'Opúntia ficus-indica', 'species', 'accepted'),
+    ('3054', '1370', '', 'Amaranthaceae', 'Amaranthaceae', 'family', 'accepted'),
+]
+
+SPECIES_NAMES = [
+    'Mammillaria bocasana',
+    'Mammillaria elongata',
+    'Mammillaria spinosissima',
+    'Matucana madisoniorum',
+    'Opuntia ficus-indica',
+]
+
+
+class StubGBIF:
+    """
+    Stands in for pygbif's species module, recording every call.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+        self.version = 1
+
+    def _respond(self, endpoint, **params):
+        self.calls.append((endpoint, params))
+        if self.fail:
+            raise ConnectionError("GBIF is down")
+        return {'endpoint': endpoint, 'version': self.version, 'results': [{'canonicalName': params.get('q')}]}
+
+    def name_suggest(self, **params):
+        self.calls.append(('name_suggest', params))
+        if self.fail:
+            raise ConnectionError("GBIF is down")
+        matches = [
+            {'key': key, 'canonicalName': name, 'version': self.version}
+            for key, name in enumerate(SPECIES_NAMES)
+            if name.casefold().startswith(params['q'].casefold())
+        ]
+        return matches[:params['limit']]
+
+    def name_lookup(self, **params):
+        return self._respond('name_lookup', **params)
+
+
+@override_settings(GBIF_CACHE={
+    'TIMEOUT': 60,
+    'STALE_TIMEOUT': 600,
+    'MAX_ENTRIES': 2,
+    'BACKGROUND_REFRESH': False,
+})
+class GBIFCacheTest(TestCase):
+    def setUp(self):
+        reset_gbif_cache()
+        self.gbif = StubGBIF()
+        patcher = mock.patch('botany.species.views.species', self.gbif)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def lookup(self, name):
+        response = self.client.get(reverse('botany:name_lookup'), {'name': name})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def age_entries(self, seconds):
+        GBIFResponse.objects.update(fetched_at=GBIFResponse.objects.get().fetched_at - timedelta(seconds=seconds))
+        get_gbif_cache().clear()
+
+    def test_repeated_lookup_is_served_from_memory(self):
+        self.assertEqual(self.lookup('Mammillaria'), self.lookup('Mammillaria'))
+        self.assertEqual(len(self.gbif.calls), 1)
+        self.assertEqual(get_gbif_cache().metrics()['memory_hits'], 1)
+
+    def test_parameters_are_normalized(self):
+        self.lookup('Mammillaria')
+        self.lookup('  mammillaria ')
+        self.assertEqual(len(self.gbif.calls), 1)
+
+    def test_database_tier_is_shared(self):
+        self.lookup('Mammillaria')
+        reset_gbif_cache()
+        self.lookup('Mammillaria')
+        self.assertEqual(len(self.gbif.calls), 1)
+        self.assertEqual(get_gbif_cache().metrics()['db_hits'], 1)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        for name in ('Mammillaria', 'Echinopsis', 'Opuntia'):
+            self.lookup(name)
+        self.assertEqual(get_gbif_cache().metrics()['memory_entries'], 2)
+
+    def test_stale_entry_is_served_while_refreshed(self):
+        self.lookup('Mammillaria')
+        self.age_entries(120)
+        self.gbif.version = 2
+
+        self.assertEqual(self.lookup('Mammillaria')['version'], 1)
+        self.assertEqual(len(self.gbif.calls), 2)
+        self.assertEqual(self.lookup('Mammillaria')['version'], 2)
+        self.assertEqual(get_gbif_cache().metrics()['refreshes'], 1)
+
+    def test_expired_entry_is_served_when_gbif_fails(self):
+        self.lookup('Mammillaria')
+        self.age_entries(3600)
+        self.gbif.fail = True
+
+        self.assertEqual(self.lookup('Mammillaria')['version'], 1)
+        self.assertEqual(get_gbif_cache().metrics()['errors'], 1)
+
+
+class TaxonomyImportTest(TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.tsv')
+        with os.fdopen(handle, 'w', encoding='utf-8') as backbone:
+            backbone.writelines('\t'.join(row) + '\n' for row in BACKBONE)
+        self.addCleanup(os.remove, self.path)
+
+    def test_subset_is_imported_with_higher_taxon_keys(self):
+        list(import_taxonomy(open_backbone(self.path), higher_taxon_key=2519, batch_size=2))
+
+        self.assertEqual(Taxon.objects.count(), 6)
+        self.assertFalse(Taxon.objects.filter(key=3054).exists())
+        species = Taxon.objects.get(key=5384069)
+        self.assertEqual((species.kingdom_key, species.family_key, species.genus_key), (6, 2519, 3084923))
+
+    def test_reimport_updates_taxa(self):
+        list(import_taxonomy(open_backbone(self.path)))
+        list(import_taxonomy(open_backbone(self.path)))
+        self.assertEqual(Taxon.objects.count(), len(BACKBONE) - 1)
+
+    def test_prefix_and_fuzzy_search(self):
+        list(import_taxonomy(open_backbone(self.path)))
+
+        self.assertEqual(
+            [taxon.key for taxon in search_taxa('mammillaria b', rank='species')],
+            [5384069]
+        )
+        self.assertEqual(
+            [taxon.key for taxon in search_taxa('opuntia', rank='species', fuzzy=False)],
+            [5383920]
+        )
+        self.assertIn(5384070, [taxon.key for taxon in search_taxa('mamilaria elongata', rank='species')])
+
+    @override_settings(TAXONOMY={'BACKEND': 'local'})
+    def test_name_suggest_uses_local_taxonomy(self):
+        list(import_taxonomy(open_backbone(self.path)))
+
+        with mock.patch('botany.species.views.species') as gbif:
+            response = self.client.get(reverse('botany:name_suggest'), {'name': 'Mammillaria', 'rank': 'species'})
+        gbif.name_suggest.assert_not_called()
+        self.assertEqual([result['key'] for result in response.json()], [5384069, 5384070])
+
+
+@override_settings(SPECIES_AUTOCOMPLETE={'FETCH_LIMIT': 4, 'MAX_ENTRIES': 16, 'TIMEOUT': 600})
+class SpeciesAutocompleteTest(TestCase):
+    def setUp(self):
+        reset_gbif_cache()
+        reset_species_autocomplete()
+        self.gbif = StubGBIF()
+        patcher = mock.patch('botany.species.views.species', self.gbif)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def suggest(self, name, limit=2):
+        response = self.client.get(reverse('botany:name_suggest'), {'name': name, 'limit': limit})
+        self.assertEqual(response.status_code, 200)
+        return [result['canonicalName'] for result in response.json()]
+
+    def test_longer_queries_refine_a_complete_result_set(self):
+        self.suggest('Mamm')
+        self.assertEqual(self.suggest('Mammi'), SPECIES_NAMES[:2])
+        self.assertEqual(self.suggest('Mammillaria e'), ['Mammillaria elongata'])
+        self.assertEqual(self.suggest('mammillaria  SPIN'), ['Mammillaria spinosissima'])
+
+        self.assertEqual(len(self.gbif.calls), 1)
+        self.assertEqual(get_species_autocomplete().metrics()['refined'], 3)
+
+    def test_incomplete_result_set_is_not_refined(self):
+        self.assertEqual(self.suggest('Ma'), SPECIES_NAMES[:2])
+        self.assertEqual(self.suggest('Mat'), ['Matucana madisoniorum'])
+        self.assertEqual(len(self.gbif.calls), 2)
+
+    def test_scope_is_not_shared_between_ranks(self):
+        self.suggest('Mamm')
+        self.client.get(reverse('botany:name_suggest'), {'name': 'Mammi', 'rank': 'genus'})
+        self.assertEqual(len(self.gbif.calls), 2)
+
+    def test_full_text_results_are_not_refined(self):
+        autocomplete = SpeciesAutocomplete(fetch_limit=10, max_entries=16, timeout=600)
+        calls = []
+
+        def fetch(q, limit):
+            calls.append(q)
+            return [{'canonicalName': 'Mammillaria bocasana'}], 1
+
+        autocomplete.search('Mam', {}, fetch, refine=False)
+        autocomplete.search('Mamm', {}, fetch, refine=False)
+        autocomplete.search('Mamm', {}, fetch, refine=False)
+        self.assertEqual(calls, ['Mam', 'Mamm'])
+
+    def test_concurrent_identical_queries_share_one_call(self):
+        autocomplete = SpeciesAutocomplete(fetch_limit=10, max_entries=16, timeout=600)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def fetch(q, limit):
+            calls.append(q)
+            started.set()
+            release.wait(5)
+            return [{'canonicalName': 'Mammillaria bocasana'}], None
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(autocomplete.search('Mamm', {}, fetch)))
+            for _ in range(3)
+        ]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        while autocomplete.metrics()['coalesced'] < 2:
+            release.wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(calls, ['Mamm'])
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(result.complete for result in results))
+
+
+class GBIFClientTest(SimpleTestCase):
+    def setUp(self):
+        self.server = FakeGBIFServer(count=95).start()
+        self.addCleanup(self.server.stop)
+        self.client_ = build_gbif_client(base_url=self.server.url, page_size=20, fan_out=3, failure_threshold=2)
+        self.addCleanup(self.client_.close)
+
+    def queryset(self):
+        queryset = GBIFQuerySet()
+        queryset.base_url = f'{self.server.url}species/search/'
+        queryset.pagination_style = 'offset-limit'
+        queryset.client = self.client_
+        return queryset
+
+    def test_pages_are_fetched_concurrently_in_order(self):
+        self.assertEqual([species['key'] for species in self.queryset()], list(range(95)))
+        self.assertEqual(self.server.requests, 5)
+        self.assertLessEqual(self.server.connections, 3)
+
+    def test_slices_fetch_only_their_pages(self):
+        self.assertEqual([species['key'] for species in self.queryset()[30:75]], list(range(30, 75)))
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(self.queryset().count(), 95)
+
+    def test_circuit_opens_after_repeated_failures(self):
+        self.server.failing = True
+        for _ in range(2):
+            with self.assertRaises(requests.HTTPError):
+                self.client_.get('species/search')
+        with self.assertRaises(GBIFUnavailable):
+            self.client_.get('species/search')
+        self.assertEqual(self.server.requests, 2)
+
+
+class PlantCopiesAPITest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Page.get_first_root_node().add_child(instance=HomePage(title="Home", slug="home-test"))
+        User = get_user_model()
+        cls.owner = User.objects.create_user(username='owner', password='password')
+        cls.other = User.objects.create_user(username='other', password='password')
+        cls.box = InventoryBox.objects.child_of(cls.owner.get_page()).first()
+        cls.plant = UserPlant.objects.create(box=cls.box, name='Mammillaria')
+        PlantNote.objects.create(plant=cls.plant, heading='Watering', content='<p>Sparingly</p>')
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.owner)
+        self.url = reverse('plant-copies', args=[self.plant.pk])
+
+    def test_copies_skip_taken_names_and_slugs(self):
+        UserPlant.objects.create(box=self.box, name='Mammillaria - 1')
+        UserPlant.objects.create(box=self.box, name='Mammillaria - 3')
+
+        response = self.api.post(self.url, {'copies': 3}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [(plant['name'], plant['slug']) for plant in response.json()],
+            [('Mammillaria - 2', 'mammillaria-2'), ('Mammillaria - 4', 'mammillaria-4'),
+             ('Mammillaria - 5', 'mammillaria-5')]
+        )
+        self.assertFalse(PlantNote.objects.filter(plant__name='Mammillaria - 2').exists())
+
+    def test_notes_are_copied(self):
+        response = self.api.post(self.url, {'copies': 2, 'notes': True}, format='json')
+        self.assertEqual(response.status_code, 201)
+        for plant in response.json():
+            self.assertEqual(
+                list(PlantNote.objects.filter(plant_id=plant['id']).values_list('heading', flat=True)),
+                ['Watering']
+            )
+
+    def test_copies_are_bounded(self):
+        response = self.api.post(self.url, {'copies': MAX_COPIES + 1}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UserPlant.objects.filter(box=self.box).count(), 1)
+
+    def test_other_users_plants_cannot_be_copied(self):
+        self.api.force_authenticate(self.other)
+        self.assertEqual(self.api.post(self.url, {'copies': 1}, format='json').status_code, 404)
+
+    def test_anonymous_users_cannot_copy(self):
+        self.api.force_authenticate(None)
+        self.assertIn(self.api.post(self.url, {'copies': 1}, format='json').status_code, (401, 403))
+
+    def test_only_the_copies_action_is_routed(self):
+        self.assertEqual(self.api.get('/api/plants/').status_code, 404)
+        self.assertEqual(self.api.get(f'/api/plants/{self.plant.pk}/').status_code, 404)
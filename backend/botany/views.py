@@ -1,8 +1,13 @@
-from queryish.rest import APIModel, APIQuerySet
+from queryish.rest import APIModel
 from wagtail.admin.viewsets.chooser import ChooserViewSet
 
+from .species.autocomplete import get_species_autocomplete
+from .species.cache import cached_gbif_call
+from .species.client import GBIFQuerySet
+from .species.taxonomy import filter_taxa, get_gbif_record, normalize_name, use_local_taxonomy
 
-class PlantSpeciesQuerySet(APIQuerySet):
+
+class PlantSpeciesQuerySet(GBIFQuerySet):
     """
     Custom QuerySet to include 'kingdomKey' as a default filter for the plant kingdom.
     """
@@ -19,6 +24,88 @@ class PlantSpeciesQuerySet(APIQuerySet):
             ('higherTaxonKey', 2519)   # 2519 is the key for the Cactaceae family
         ])
 
+    def run_query(self):
+        if not use_local_taxonomy():
+            completion = self.get_completion(self.offset + (self.limit or 0))
+            if completion is None or (self.limit is None and not completion.complete):
+                yield from super().run_query()
+                return
+            stop = None if self.limit is None else self.offset + self.limit
+            for record in completion.records[self.offset:stop]:
+                yield self.get_instance(record)
+            return
+
+        params = self.get_filters_as_query_dict()
+        if list(params.keys()) == [self.pk_field_name]:
+            taxon = self.get_local_queryset({}).filter(key=params[self.pk_field_name]).first()
+            if taxon is not None:
+                yield self.get_individual_instance(get_gbif_record(taxon))
+            return
+
+        stop = None if self.limit is None else self.offset + self.limit
+        for taxon in self.get_local_queryset(params)[self.offset:stop]:
+            yield self.get_instance(get_gbif_record(taxon))
+
+    def run_count(self):
+        if use_local_taxonomy():
+            count = self.get_local_queryset(self.get_filters_as_query_dict()).count()
+        else:
+            completion = self.get_completion()
+            if completion is None or completion.count is None:
+                return super().run_count()
+            count = completion.count
+
+        if self.limit is not None:
+            count = min(count, self.limit)
+        return max(0, count - self.offset)
+
+    def get_completion(self, limit=0):
+        """
+        Returns the species autocomplete's Completion for a search, holding
+        at least `limit` results, or None if this is not a plain search.
+        """
+        params = self.get_filters_as_query_dict()
+        q = params.pop('q', None)
+        if not q or not isinstance(q, str) or self.ordering:
+            return None
+
+        def fetch(q, fetch_limit):
+            response = cached_gbif_call(
+                'species_search',
+                lambda **query: self.fetch_api_response(params=query),
+                q=q,
+                offset=0,
+                limit=fetch_limit,
+                **params
+            )
+            return self.get_results_from_response(response), response['count']
+
+        # The species search matches words anywhere in a record, including
+        # descriptions, so its results for "mam" need not hold those for "mamm"
+        completion = get_species_autocomplete().search(
+            q, {'endpoint': 'species_search', **params}, fetch, limit, refine=False
+        )
+        if not completion.complete and len(completion.records) < limit:
+            return None
+        return completion
+
+    def get_local_queryset(self, params):
+        """
+        Returns the local Taxon queryset matching the same filters as the
+        GBIF search API, with `q` matching the start of the name.
+        """
+        from .models import Taxon
+
+        taxa = filter_taxa(
+            Taxon.objects.all(),
+            rank=params.get('rank'),
+            status=params.get('status'),
+            higher_taxon_key=params.get('higherTaxonKey')
+        )
+        if params.get('q'):
+            taxa = taxa.filter(search_name__startswith=normalize_name(params['q']))
+        return taxa.order_by('search_name')
+
 
 class PlantSpecies(APIModel):
 
@@ -79,6 +79,7 @@ MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "wagtail.contrib.redirects.middleware.RedirectMiddleware",
     "allauth.account.middleware.AccountMiddleware",
+    "inventory.resolver.InventoryResolverMiddleware",
 ]
 
 TEMPLATES = [
@@ -333,6 +334,40 @@ WAGTAILSEARCH_BACKENDS = {
 # ------------------------------------------------------------------------
 NFC_TAG_LINK_URL = WAGTAILADMIN_BASE_URL + '/link'
 
+# Buffer scans in-process and write them in batches from a background thread
+NFC_TAG_SCAN_QUEUE = {
+    'ENABLED': os.getenv('NFC_TAG_SCAN_QUEUE_ENABLED', 'False') == 'True',
+    'MAX_SIZE': 10000,
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 1.0,
+}
+
+# Cache UID -> tag/destination resolutions so warm scans skip the database.
+# Changes are only invalidated in the worker that made them unless ALIAS is
+# shared by all workers, so a per-process cache keeps entries for at most
+# LOCAL_TIMEOUT seconds.
+NFC_TAG_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 60 * 60,
+    'LOCAL_TIMEOUT': 30,
+}
+
+# Reject unknown UIDs in memory. Needs a cache shared by all workers so they
+# learn about newly created tags; with a local memory cache it stays off.
+NFC_TAG_UID_FILTER = {
+    'ENABLED': os.getenv('NFC_TAG_UID_FILTER_ENABLED', 'False') == 'True',
+    'ERROR_RATE': 0.001,
+    'CAPACITY': 100000,
+    'MAX_AGE': 60 * 60,
+    'CACHE_ALIAS': 'default',
+}
+
+# Raw scans older than DAYS are folded into the hourly/daily rollups and
+# deleted by `manage.py compact_nfc_tag_scans`
+NFC_TAG_SCAN_RETENTION = {
+    'DAYS': int(os.getenv('NFC_TAG_SCAN_RETENTION_DAYS', '90')),
+}
+
 # ------------------------------------------------------------------------
 # Wagtail-Inventory Configuration
 # ------------------------------------------------------------------------
@@ -340,6 +375,63 @@ INVENTORY_MODELS = NFC_TAGGABLE_MODELS = [
     'botany.UserPlant'
 ]
 
+# Seconds a worker may reuse a user's index collection, page and boxes
+# across requests. 0 keeps them for a single request only.
+INVENTORY_RESOLVER = {
+    'TIMEOUT': 0,
+}
+
+# Spread per-user index pages and collections over containers keyed by the
+# first PAGES / COLLECTIONS hex digits of the user's uuid. Run
+# `manage.py rebucket_inventory_pages` / `rebucket_inventory_collections`
+# after changing them.
+INVENTORY_BUCKETS = {
+    'PAGES': 2,
+    'COLLECTIONS': 2,
+}
+
+# Search species through the GBIF API ('gbif') or the backbone subset loaded
+# with `manage.py import_taxonomy` ('local'). Misspelled names are matched
+# by trigrams once the search is FUZZY_MIN_LENGTH characters long.
+TAXONOMY = {
+    'BACKEND': os.getenv('TAXONOMY_BACKEND', 'gbif'),
+    'FUZZY_MIN_LENGTH': 3,
+}
+
+# GBIF species lookups are kept in memory (up to MAX_ENTRIES) and in the
+# database. Entries older than TIMEOUT seconds are served while they are
+# refreshed, until STALE_TIMEOUT, after which they are fetched again first.
+GBIF_CACHE = {
+    'TIMEOUT': 60 * 60 * 24,
+    'STALE_TIMEOUT': 60 * 60 * 24 * 30,
+    'MAX_ENTRIES': 1024,
+    'BACKGROUND_REFRESH': True,
+}
+
+# Every GBIF API call shares one pool of keep-alive connections (POOL_SIZE).
+# Species listings fetch up to FAN_OUT pages of PAGE_SIZE at a time. After
+# FAILURE_THRESHOLD failures in a row GBIF is not called again for
+# RECOVERY_TIMEOUT seconds, so a slow GBIF cannot tie up every worker.
+GBIF_CLIENT = {
+    'BASE_URL': os.getenv('GBIF_API_URL', 'https://api.gbif.org/v1/'),
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': 10,
+    'POOL_SIZE': 10,
+    'FAN_OUT': 4,
+    'PAGE_SIZE': 100,
+    'FAILURE_THRESHOLD': 5,
+    'RECOVERY_TIMEOUT': 30,
+}
+
+# Species autocomplete asks GBIF for up to FETCH_LIMIT matches per query.
+# When every match fits, longer queries typed after it are answered by
+# filtering those matches in memory, for TIMEOUT seconds.
+SPECIES_AUTOCOMPLETE = {
+    'FETCH_LIMIT': 100,
+    'MAX_ENTRIES': 512,
+    'TIMEOUT': 60 * 10,
+}
+
 try:
     from .local import *  # noqa
 except ImportError:
@@ -23,6 +23,8 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path("dashboard/", include(dashboard_urls)),
     path('api/v2/', api_router.urls),
+    path('api/', include('ntags.api.urls')),
+    path('api/', include('botany.api.urls')),
     path("", include(wagtail_urls)),
 ]
 
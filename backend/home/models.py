@@ -1,4 +1,5 @@
 from django.db import models
+from django.http import Http404
 from django.utils.translation import gettext_lazy as _
 from wagtail.models import Page
 from wagtail.fields import RichTextField
@@ -25,6 +26,7 @@ class HomePage(Page):
     ]
     child_page_types = [
         'inventory.InventoryIndex',
+        'inventory.InventoryBucket',
         'blog.BlogIndexPage',
         'blog.TagIndexPage',
         'portfolio.PortfolioIndexPage',
@@ -42,3 +44,20 @@ class HomePage(Page):
     class Meta:
         verbose_name = _('home page')
         verbose_name_plural = _('home pages')
+
+    def route(self, request, path_components):
+        try:
+            return super().route(request, path_components)
+        except Http404:
+            if not path_components:
+                raise
+
+        # User pages may live one level down, inside an inventory bucket
+        from inventory.models import InventoryIndex
+        user_page = InventoryIndex.objects.descendant_of(self).filter(
+            depth=self.depth + 2,
+            slug=path_components[0]
+        ).first()
+        if user_page is None:
+            raise Http404
+        return user_page.route(request, path_components[1:])
@@ -8,6 +8,8 @@ class InventoryConfig(AppConfig):
 
     def ready(self):
         from wagtail.admin.forms.models import register_form_field_override
+        from . import inventory_models, signals  # noqa: F401
         from .models import InventoryBox
         from .widgets import BoxChooserWidget
+        inventory_models.build()
         register_form_field_override(ForeignKey, to=InventoryBox, override={'widget': BoxChooserWidget})
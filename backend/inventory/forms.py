@@ -11,7 +11,7 @@ class InventoryFormMixin(forms.Form):
         widget=forms.CheckboxInput()
     )
     content_type = forms.ModelChoiceField(
-        choices=get_inventory_model_classes(),
+        queryset=ContentType.objects.none(),
         required=False,
         label="Linked Object",
         widget=forms.Select()
@@ -32,6 +32,7 @@ class InventoryFormMixin(forms.Form):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.fields['content_type'].queryset = get_inventory_model_classes()
         content_type_id = self.get_content_type_id()
         object_id = self.get_object_id()
 
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from wagtail.models import Collection
+
+from inventory.models import InventoryCollectionBucket, InventoryIndexCollection
+from inventory.resolver import forget_user_inventory
+
+
+class Command(BaseCommand):
+    help = (
+        "Move every user collection under the bucket collection INVENTORY_BUCKETS['COLLECTIONS'] "
+        "assigns it, or back under 'Users' if bucketing is disabled."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report the moves without making them.")
+
+    def handle(self, *args, **options):
+        users_collection = InventoryIndexCollection.get_parent_collection()
+        buckets = {}
+        moved = 0
+
+        index_collections = list(
+            InventoryIndexCollection.objects.filter(collection__isnull=False).values_list('pk', flat=True)
+        )
+        for pk in index_collections:
+            # Re-read both ends of every move, as each one rewrites tree
+            # paths and child counts that treebeard uses to place the next.
+            index_collection = InventoryIndexCollection.objects.select_related('user', 'collection').get(pk=pk)
+            key = InventoryCollectionBucket.get_key(index_collection.user)
+
+            if key and key not in buckets:
+                if options['dry_run']:
+                    buckets[key] = InventoryCollectionBucket.objects.filter(key=key).values_list(
+                        'collection_id', flat=True
+                    ).first()
+                else:
+                    buckets[key] = InventoryCollectionBucket.get_for_key(key, users_collection).collection_id
+            target_id = buckets.get(key) if key else users_collection.pk
+
+            parent = index_collection.collection.get_parent()
+            if parent.pk == target_id:
+                continue
+
+            moved += 1
+            if options['dry_run']:
+                self.stdout.write(f"Would move collection {index_collection.collection.name} into bucket {key or 'Users'}")
+                continue
+
+            # Collections are ordered by name, so treebeard only accepts a
+            # sorted position
+            Collection.objects.get(pk=index_collection.collection_id).move(
+                Collection.objects.get(pk=target_id), pos='sorted-child'
+            )
+            forget_user_inventory(index_collection.user_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Would move' if options['dry_run'] else 'Moved'} {moved} user collections"
+        ))
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from treebeard.mp_tree import MP_MoveHandler
+from wagtail.models import Page
+
+from inventory.models import InventoryBucket, InventoryIndex
+from inventory.resolver import forget_user_inventory
+
+
+class Command(BaseCommand):
+    help = (
+        "Move every user page under the bucket INVENTORY_BUCKETS['PAGES'] assigns it, "
+        "or back under the home page if bucketing is disabled. URLs do not change."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report the moves without making them.")
+
+    def move(self, page, target):
+        # Page.move() sets url_path through the base Page.set_url_path, which
+        # does not skip buckets, and creates redirects for the "changed" URLs.
+        # Move through treebeard instead and let the page set its own path.
+        old_url_path = page.url_path
+        with transaction.atomic():
+            MP_MoveHandler(page, target, 'last-child').process()
+            page = InventoryIndex.objects.get(pk=page.pk)
+            new_url_path = page.set_url_path(target)
+            if new_url_path != old_url_path:
+                page.save(update_fields=['url_path'])
+                page._update_descendant_url_paths(old_url_path, new_url_path)
+
+    def handle(self, *args, **options):
+        root = InventoryIndex.get_root_page()
+        buckets = {}
+        moved = 0
+
+        pages = list(
+            InventoryIndex.objects.descendant_of(root).filter(owner__isnull=False).values_list('pk', flat=True)
+        )
+        for pk in pages:
+            # Re-read the pages every time, as each move rewrites tree paths
+            # and child counts that treebeard uses to place the next one.
+            page = InventoryIndex.objects.select_related('owner').get(pk=pk)
+            key = InventoryBucket.get_key(page.owner)
+            parent = page.get_parent()
+
+            if key:
+                if parent.specific_class is InventoryBucket and parent.specific.key == key:
+                    continue
+                if options['dry_run']:
+                    self.stdout.write(f"Would move {page.url_path} into bucket {key}")
+                else:
+                    if key not in buckets:
+                        buckets[key] = InventoryBucket.get_for_key(key, root).pk
+                    self.move(page, Page.objects.get(pk=buckets[key]))
+            else:
+                if parent.pk == root.pk:
+                    continue
+                if options['dry_run']:
+                    self.stdout.write(f"Would move {page.url_path} under the home page")
+                else:
+                    self.move(page, Page.objects.get(pk=root.pk))
+
+            moved += 1
+            forget_user_inventory(page.owner_id)
+
+        self.stdout.write(self.style.SUCCESS(f"{'Would move' if options['dry_run'] else 'Moved'} {moved} user pages"))
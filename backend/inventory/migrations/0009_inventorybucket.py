@@ -0,0 +1,27 @@
+# Generated by Django 5.1 on 2026-10-18 15:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_rename_inventoryformpage_inventorybox_and_more'),
+        ('wagtailcore', '0094_alter_page_locale'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryBucket',
+            fields=[
+                ('page_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='wagtailcore.page')),
+                ('key', models.CharField(editable=False, max_length=32, unique=True)),
+            ],
+            options={
+                'verbose_name': 'user page bucket',
+                'verbose_name_plural': 'user page buckets',
+            },
+            bases=('wagtailcore.page',),
+        ),
+    ]
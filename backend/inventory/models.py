@@ -3,12 +3,13 @@ from django.db import models, transaction
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger  # noqa
+from django.core.exceptions import ValidationError
+from django.http import Http404
 from django.shortcuts import get_object_or_404, render  # noqa
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 from modelcluster.fields import ParentalKey
-from wagtail.models import Page
+from wagtail.models import Collection, Page
 from wagtail.images import get_image_model
 from wagtail.documents import get_document_model
 from wagtail.fields import RichTextField
@@ -22,7 +23,9 @@ from wagtail.contrib.routable_page.models import RoutablePageMixin, re_path
 from wagtail.api import APIField
 
 from base.models import CollectionMixin
-from . import get_inventory_models
+from base.pagination import keyset_paginate
+from . import get_inventory_bucket_settings, get_inventory_models
+from .resolver import forget_user_inventory, get_user_inventory
 
 
 class InventoryIndexCollection(CollectionMixin, models.Model):
@@ -77,9 +80,13 @@ class InventoryIndexCollection(CollectionMixin, models.Model):
     def get_user_collection(cls, user):
         """
         Gets the user collection and names it after the uuid assigned to the user
-        for the given user.
+        for the given user. It is created in the user's bucket collection
+        unless bucketing is disabled.
         """
         parent_collection = cls.get_parent_collection()
+        key = InventoryCollectionBucket.get_key(user)
+        if key:
+            parent_collection = InventoryCollectionBucket.get_for_key(key, parent_collection).collection
         return cls.get_or_create_collection(name=str(user.uuid), parent=parent_collection)
 
     @classmethod
@@ -89,23 +96,69 @@ class InventoryIndexCollection(CollectionMixin, models.Model):
         with collections like this instead of inheriting from the
         collection model and adding a user field.
         """
-        try:
-            _instance = cls.objects.get(
-                user=user
-            )
-            return _instance
-        except cls.DoesNotExist:
-            user_collection = cls.get_user_collection(user)
-            _instance = cls.objects.create(
-                user=user,
-                collection=user_collection
-            )
+        _instance = get_user_inventory(user).index_collection
+        if _instance is not None:
             return _instance
 
+        user_collection = cls.get_user_collection(user)
+        _instance = cls.objects.create(
+            user=user,
+            collection=user_collection
+        )
+        forget_user_inventory(user)
+        return _instance
+
     def get_user_page(self):
         return InventoryIndex.get_for_user(self.user)
 
 
+class InventoryCollectionBucket(CollectionMixin, models.Model):
+    """
+    Maps a user uuid prefix to the collection holding the collections of
+    every user whose uuid starts with it.
+    """
+    key = models.CharField(
+        max_length=32,
+        unique=True
+    )
+
+    def __str__(self):
+        return f"Users {self.key}"
+
+    class Meta:
+        verbose_name = _('collection bucket')
+        verbose_name_plural = _('collection buckets')
+
+    @staticmethod
+    def get_key(user):
+        """
+        Gets the bucket key for the user, or an empty string if bucketing
+        is disabled.
+        """
+        return user.uuid.hex[:get_inventory_bucket_settings()['COLLECTIONS']]
+
+    @classmethod
+    def get_for_key(cls, key, parent):
+        """
+        Gets or creates the bucket for the given key under the parent collection.
+        """
+        try:
+            return cls.objects.select_related('collection').get(key=key)
+        except cls.DoesNotExist:
+            pass
+
+        with transaction.atomic():
+            # Serialise bucket creation on the parent collection
+            parent = Collection.objects.select_for_update().get(pk=parent.pk)
+            try:
+                return cls.objects.select_related('collection').get(key=key)
+            except cls.DoesNotExist:
+                return cls.objects.create(
+                    key=key,
+                    collection=cls.get_or_create_collection(name=key, parent=parent)
+                )
+
+
 class InventoryIndex(RoutablePageMixin, Page):
 
     user_collection = models.OneToOneField(
@@ -116,7 +169,8 @@ class InventoryIndex(RoutablePageMixin, Page):
     )
 
     parent_page_types = [
-        'home.HomePage'
+        'home.HomePage',
+        'inventory.InventoryBucket'
     ]
     child_page_types = [
         'inventory.InventoryBox'
@@ -143,26 +197,15 @@ class InventoryIndex(RoutablePageMixin, Page):
 
     ajax_template = 'inventory/includes/collection.html'
 
+    plants_per_page = 30
+
     def get_context(self, request, *args, **kwargs):
         context = super().get_context(request, *args, **kwargs)
-        plants = self.get_plants(30)
-
-        # Pagination logic
-        # paginator = Paginator(plants, 30)
-        # page = request.GET.get('page')
-        # try:
-        #     plants = paginator.page(page)
-        # except PageNotAnInteger:
-        #     plants = paginator.page(1)
-        # except EmptyPage:
-        #     plants = paginator.page(paginator.num_pages)
-
-        context['plants'] = plants
-
-        # If AJAX request, render with ajax template
-        # if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        #    return render(request, self.ajax_template, context)
-
+        context['plants'] = keyset_paginate(
+            self.get_plants().select_related('box'),
+            cursor=request.GET.get('after'),
+            per_page=self.plants_per_page
+        )
         return context
 
     @re_path(r'^(?P<box_slug>[\w-]+)/(?P<plant_slug>[\w-]+)')
@@ -213,16 +256,13 @@ class InventoryIndex(RoutablePageMixin, Page):
         from botany.models import UserPlant
         plants_q = UserPlant.objects.for_user(self.owner)
 
-        if not plants_q.exists():
-            return plants_q.none()
-
         if num is not None:
             if isinstance(num, int) and num > 0:
                 return plants_q[:num]
             else:
                 raise ValueError("The 'num' parameter must be a positive, non-zero integer.")
 
-        return plants_q[:30]
+        return plants_q
 
     @staticmethod
     def get_root_page():
@@ -236,12 +276,29 @@ class InventoryIndex(RoutablePageMixin, Page):
         return root
 
     @classmethod
-    def get_parent_page(cls):
+    def get_parent_page(cls, user):
         """
-        Gets the parent page 'Inventory' to group all user pages.
-        Each user page will be a child of this page.
+        Gets the page the user's page belongs under: the bucket for the
+        user's uuid prefix, or the home page when bucketing is disabled.
         """
-        return cls.get_root_page()  # TODO: Update to actual parent page
+        root = cls.get_root_page()
+        key = InventoryBucket.get_key(user)
+        if not key:
+            return root
+        return InventoryBucket.get_for_key(key, root)
+
+    def set_url_path(self, parent):
+        # Buckets are not part of the URL, so user-facing URLs stay the same
+        # wherever the page lives in the tree.
+        if parent is not None and parent.specific_class is InventoryBucket:
+            parent = parent.get_parent()
+        return super().set_url_path(parent)
+
+    def clean(self):
+        super().clean()
+        # Siblings no longer share one parent, so check slugs site-wide
+        if InventoryIndex.objects.filter(slug=self.slug).exclude(pk=self.pk).exists():
+            raise ValidationError({'slug': _("The slug '%(slug)s' is already in use") % {'slug': self.slug}})
 
     @classmethod
     def get_for_user(cls, user):
@@ -249,6 +306,10 @@ class InventoryIndex(RoutablePageMixin, Page):
         Gets the user collection and names it after the slug
         assigned by slugifying the given user's username.
         """
+        page = get_user_inventory(user).page
+        if page is not None:
+            return page
+
         user_collection = InventoryIndexCollection.get_for_user(user)
 
         try:
@@ -262,10 +323,11 @@ class InventoryIndex(RoutablePageMixin, Page):
                 user_collection=user_collection
             )
             # Add it to the parent page
-            parent_page = cls.get_parent_page()
+            parent_page = cls.get_parent_page(user)
             parent_page.add_child(instance=_instance)
             # Save, publish, and return the page
             _instance.save_revision().publish()
+            forget_user_inventory(user)
             return _instance
 
     @property
@@ -273,6 +335,67 @@ class InventoryIndex(RoutablePageMixin, Page):
         return self.user_collection.collection
 
 
+class InventoryBucket(Page):
+    """
+    A container for user pages whose owners' uuids share a prefix, so no
+    single page has every user page as a child. Buckets are skipped in URLs
+    and are never served themselves.
+    """
+    key = models.CharField(
+        max_length=32,
+        unique=True,
+        editable=False
+    )
+
+    parent_page_types = [
+        'home.HomePage'
+    ]
+    child_page_types = [
+        'inventory.InventoryIndex'
+    ]
+
+    is_creatable = False
+
+    def __str__(self):
+        return self.title
+
+    class Meta:
+        verbose_name = _('user page bucket')
+        verbose_name_plural = _('user page buckets')
+
+    def route(self, request, path_components):
+        raise Http404
+
+    def serve(self, request, *args, **kwargs):
+        raise Http404
+
+    @staticmethod
+    def get_key(user):
+        """
+        Gets the bucket key for the user, or an empty string if bucketing
+        is disabled.
+        """
+        return user.uuid.hex[:get_inventory_bucket_settings()['PAGES']]
+
+    @classmethod
+    def get_for_key(cls, key, parent):
+        """
+        Gets or creates the bucket for the given key under the parent page.
+        """
+        try:
+            return cls.objects.get(key=key)
+        except cls.DoesNotExist:
+            pass
+
+        with transaction.atomic():
+            # Serialise bucket creation on the parent page
+            parent = type(parent).objects.select_for_update().get(pk=parent.pk)
+            try:
+                return cls.objects.get(key=key)
+            except cls.DoesNotExist:
+                return parent.add_child(instance=cls(title=f"Users {key}", slug=f"users-{key}", key=key))
+
+
 class InventoryFormField(AbstractFormField):
     page = ParentalKey(
         'InventoryBox',
@@ -329,9 +452,17 @@ class InventoryBox(AbstractForm):
         verbose_name = _('box')
         verbose_name_plural = _('boxes')
 
+    ajax_template = 'inventory/includes/collection.html'
+
+    plants_per_page = 30
+
     def get_context(self, request, *args, **kwargs):
         context = super().get_context(request, *args, **kwargs)
-        context['plants'] = self.get_plants()
+        context['plants'] = keyset_paginate(
+            self.get_plants().select_related('box'),
+            cursor=request.GET.get('after'),
+            per_page=self.plants_per_page
+        )
         return context
 
     def get_form_fields(self):
@@ -346,7 +477,7 @@ class InventoryBox(AbstractForm):
         return self.get_parent_collection()
 
     def get_parent_collection(self):
-        return self.owner.index_collection.collection
+        return get_user_inventory(self.owner_id).collection
 
     def get_submission_class(self):
         return InventoryFormSubmission
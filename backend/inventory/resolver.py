@@ -0,0 +1,119 @@
+import threading
+import time
+from contextvars import ContextVar
+
+from django.utils.functional import cached_property
+
+from . import get_inventory_resolver_settings
+
+_request_inventories = ContextVar('inventory_request_inventories', default=None)
+
+_process_inventories = {}
+_process_inventories_lock = threading.Lock()
+
+
+class UserInventory:
+    """
+    A user's index collection, index page and boxes, each loaded at most once.
+
+    The index collection, its wagtail collection and the index page come
+    from a single query; the boxes from one more on first use.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+
+    @cached_property
+    def index_collection(self):
+        from .models import InventoryIndexCollection
+
+        return InventoryIndexCollection.objects.select_related('collection', 'page').filter(
+            user_id=self.user_id
+        ).first()
+
+    @property
+    def collection(self):
+        if self.index_collection is None:
+            return None
+        return self.index_collection.collection
+
+    @cached_property
+    def page(self):
+        from .models import InventoryIndex
+
+        if self.index_collection is None:
+            return None
+        try:
+            return self.index_collection.page
+        except InventoryIndex.DoesNotExist:
+            return None
+
+    @cached_property
+    def boxes(self):
+        from .models import InventoryBox
+
+        if self.page is None:
+            return []
+        return list(InventoryBox.objects.child_of(self.page).live())
+
+
+def get_user_inventory(user):
+    """
+    Returns the UserInventory for a user or user id.
+
+    Inside a request it is shared by every lookup for that user until the
+    response is returned. If INVENTORY_RESOLVER['TIMEOUT'] is set it is also
+    kept for that many seconds by the process.
+    """
+    user_id = getattr(user, 'pk', user)
+
+    inventories = _request_inventories.get()
+    if inventories is not None and user_id in inventories:
+        return inventories[user_id]
+
+    inventory = None
+    timeout = get_inventory_resolver_settings()['TIMEOUT']
+    if timeout:
+        with _process_inventories_lock:
+            cached = _process_inventories.get(user_id)
+        if cached is not None and cached[0] > time.monotonic():
+            inventory = cached[1]
+
+    if inventory is None:
+        inventory = UserInventory(user_id)
+        if timeout:
+            with _process_inventories_lock:
+                _process_inventories[user_id] = (time.monotonic() + timeout, inventory)
+
+    if inventories is not None:
+        inventories[user_id] = inventory
+    return inventory
+
+
+def forget_user_inventory(user):
+    """
+    Drops any remembered inventory for a user after it changes.
+    """
+    user_id = getattr(user, 'pk', user)
+
+    inventories = _request_inventories.get()
+    if inventories is not None:
+        inventories.pop(user_id, None)
+    with _process_inventories_lock:
+        _process_inventories.pop(user_id, None)
+
+
+class InventoryResolverMiddleware:
+    """
+    Scopes user inventory lookups to a single request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _request_inventories.set({})
+        try:
+            return self.get_response(request)
+        finally:
+            _request_inventories.reset(token)
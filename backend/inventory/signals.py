@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import InventoryBox, InventoryIndex, InventoryIndexCollection
+from .resolver import forget_user_inventory
+
+
+@receiver(post_save, sender=InventoryIndexCollection)
+@receiver(post_delete, sender=InventoryIndexCollection)
+def index_collection_changed(sender, instance, **kwargs):
+    forget_user_inventory(instance.user_id)
+
+
+@receiver(post_save, sender=InventoryIndex)
+@receiver(post_delete, sender=InventoryIndex)
+@receiver(post_save, sender=InventoryBox)
+@receiver(post_delete, sender=InventoryBox)
+def inventory_page_changed(sender, instance, **kwargs):
+    if instance.owner_id is not None:
+        forget_user_inventory(instance.owner_id)
@@ -1,32 +1,41 @@
 document.addEventListener('DOMContentLoaded', function () {
-  const loadMoreBtn = document.getElementById('load-more');
+  const wrapper = document.querySelector('.collection-list-wrapper-posts');
 
-  if (loadMoreBtn) {
-    loadMoreBtn.addEventListener('click', function (e) {
+  if (wrapper) {
+    wrapper.addEventListener('click', function (e) {
+      const loadMoreBtn = e.target.closest('#load-more');
+      if (!loadMoreBtn) {
+        return;
+      }
       e.preventDefault();
-      const page = this.dataset.page;
 
-      // Make an AJAX request
-      fetch(`?page=${page}`, {
+      // Request the next page of plants as an HTML fragment
+      fetch(`?after=${encodeURIComponent(loadMoreBtn.dataset.cursor)}`, {
         headers: {
           'X-Requested-With': 'XMLHttpRequest'
         }
       })
       .then(response => response.text())
       .then(data => {
-        // Replace the plant list with new data
-        const plantListWrapper = document.querySelector('.collection-list-wrapper-posts');
-        plantListWrapper.innerHTML += data;
+        const fragment = document.createElement('template');
+        fragment.innerHTML = data;
 
-        // Update the "Load More" button
-        const newLoadMoreBtn = document.getElementById('load-more');
+        // Append the new plants to the existing list
+        const plantList = wrapper.querySelector('.collection-list-posts');
+        const newPlants = fragment.content.querySelector('.collection-list-posts');
+        if (plantList && newPlants) {
+          plantList.append(...newPlants.children);
+        }
+
+        // Replace the "Load More" button, or remove it on the last page
+        const newLoadMoreBtn = fragment.content.getElementById('load-more');
         if (newLoadMoreBtn) {
-          this.dataset.page = newLoadMoreBtn.dataset.page;
+          loadMoreBtn.replaceWith(newLoadMoreBtn);
         } else {
-          this.remove(); // Remove the button if there are no more pages
+          loadMoreBtn.remove();
         }
       })
       .catch(error => console.error('Error:', error));
     });
   }
-});
\ No newline at end of file
+});
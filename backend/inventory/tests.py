@@ -0,0 +1,182 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from wagtail.contrib.redirects.models import Redirect
+from wagtail.models import Collection, Page
+
+from home.models import HomePage
+
+from .models import InventoryBox, InventoryBucket, InventoryCollectionBucket, InventoryIndex, InventoryIndexCollection
+from .resolver import InventoryResolverMiddleware, forget_user_inventory, get_user_inventory
+
+
+class UserInventoryResolverTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Page.get_first_root_node().add_child(instance=HomePage(title="Home", slug="home-test"))
+        cls.user = get_user_model().objects.create_user(username="resolver", password="password")
+
+    def setUp(self):
+        forget_user_inventory(self.user)
+        self.user = get_user_model().objects.get(pk=self.user.pk)
+
+    def in_request(self, function):
+        return InventoryResolverMiddleware(lambda request: function())(None)
+
+    def test_request_loads_the_inventory_once(self):
+        def lookups():
+            return self.user.get_page(), self.user.get_collection(), self.user.get_boxes(), self.user.get_boxes()
+
+        with self.assertNumQueries(2):
+            page, collection, boxes, _ = self.in_request(lookups)
+
+        self.assertEqual(page.owner_id, self.user.pk)
+        self.assertEqual(collection.name, str(self.user.uuid))
+        self.assertEqual(len(boxes), 5)
+
+    def test_inventory_is_not_shared_between_requests(self):
+        self.in_request(self.user.get_page)
+
+        with self.assertNumQueries(1):
+            self.in_request(self.user.get_page)
+
+    @override_settings(INVENTORY_RESOLVER={'TIMEOUT': 60})
+    def test_process_keeps_inventory_for_timeout(self):
+        self.user.get_page()
+
+        with self.assertNumQueries(0):
+            self.in_request(self.user.get_page)
+
+    @override_settings(INVENTORY_RESOLVER={'TIMEOUT': 60})
+    def test_changes_forget_the_inventory(self):
+        self.assertEqual(len(self.user.get_boxes()), 5)
+
+        page = self.user.get_page()
+        page.add_child(instance=InventoryBox(title="Box 6", slug="box-6", owner=self.user))
+        self.assertEqual(len(get_user_inventory(self.user).boxes), 6)
+
+
+@override_settings(INVENTORY_BUCKETS={'PAGES': 0, 'COLLECTIONS': 0})
+class InventoryPageBucketTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.home = Page.get_first_root_node().add_child(instance=HomePage(title="Home", slug="home-test"))
+        User = get_user_model()
+        cls.users = [User.objects.create_user(username=username, password="password") for username in ('ann', 'ben')]
+
+    def get_pages(self):
+        return InventoryIndex.objects.filter(owner__in=self.users).order_by('slug')
+
+    def rebucket(self, *args):
+        stdout = StringIO()
+        call_command('rebucket_inventory_pages', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def assertPagesAreUnder(self, parents):
+        self.assertEqual([page.get_parent().specific for page in self.get_pages()], parents)
+        self.assertEqual(
+            [page.url_path for page in self.get_pages()],
+            [f"{self.home.url_path}{user.username}/" for user in self.users]
+        )
+        self.assertEqual([list(problems) for problems in Page.find_problems()], [[]] * 5)
+
+    def test_pages_are_under_the_home_page_without_buckets(self):
+        self.assertPagesAreUnder([self.home, self.home])
+
+    @override_settings(INVENTORY_BUCKETS={'PAGES': 1, 'COLLECTIONS': 0})
+    def test_new_pages_are_created_in_their_bucket(self):
+        user = get_user_model().objects.create_user(username='cat', password="password")
+        page = user.get_page()
+
+        self.assertEqual(page.get_parent().specific, InventoryBucket.objects.get(key=user.uuid.hex[:1]))
+        self.assertEqual(page.url_path, f"{self.home.url_path}cat/")
+
+    def test_pages_are_moved_into_buckets_and_back(self):
+        with override_settings(INVENTORY_BUCKETS={'PAGES': 1, 'COLLECTIONS': 0}):
+            self.assertIn("Would move 2 user pages", self.rebucket('--dry-run'))
+            self.assertPagesAreUnder([self.home, self.home])
+
+            self.assertIn("Moved 2 user pages", self.rebucket())
+            self.assertPagesAreUnder([InventoryBucket.objects.get(key=user.uuid.hex[:1]) for user in self.users])
+            self.assertIn("Moved 0 user pages", self.rebucket())
+
+        self.assertIn("Moved 2 user pages", self.rebucket())
+        self.assertPagesAreUnder([self.home, self.home])
+
+    def test_bucketed_pages_keep_their_urls(self):
+        with override_settings(INVENTORY_BUCKETS={'PAGES': 1, 'COLLECTIONS': 0}):
+            self.rebucket()
+
+        page = self.get_pages().first()
+        self.assertIsInstance(page.get_parent().specific, InventoryBucket)
+        self.assertEqual(page.url_path, f"{self.home.url_path}ann/")
+        self.assertEqual(
+            InventoryBox.objects.child_of(page).get(slug='box-1').url_path, f"{self.home.url_path}ann/box-1/"
+        )
+        self.assertFalse(Redirect.objects.exists())
+
+        request = RequestFactory().get('/')
+        self.assertEqual(self.home.specific.route(request, ['ann']).page, page)
+        self.assertEqual(
+            self.home.specific.route(request, ['ann', 'box-1']).page,
+            InventoryBox.objects.child_of(page).get(slug='box-1')
+        )
+
+
+@override_settings(INVENTORY_BUCKETS={'PAGES': 0, 'COLLECTIONS': 0})
+class InventoryCollectionBucketTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Page.get_first_root_node().add_child(instance=HomePage(title="Home", slug="home-test"))
+        User = get_user_model()
+        cls.users = [User.objects.create_user(username=username, password="password") for username in ('ann', 'ben')]
+
+    def get_parents(self):
+        return [
+            InventoryIndexCollection.objects.get(user=user).collection.get_parent().name
+            for user in self.users
+        ]
+
+    def rebucket(self, *args):
+        stdout = StringIO()
+        call_command('rebucket_inventory_collections', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def assertCollectionsAreUnder(self, parents):
+        self.assertEqual(self.get_parents(), parents)
+        self.assertEqual([list(problems) for problems in Collection.find_problems()], [[]] * 5)
+        for user in self.users:
+            names = list(
+                InventoryIndexCollection.objects.get(user=user).collection.get_siblings().values_list('name', flat=True)
+            )
+            self.assertEqual(names, sorted(names))
+
+    def test_collections_are_under_users_without_buckets(self):
+        self.assertCollectionsAreUnder(['Users', 'Users'])
+
+    @override_settings(INVENTORY_BUCKETS={'PAGES': 0, 'COLLECTIONS': 1})
+    def test_new_collections_are_created_in_their_bucket(self):
+        user = get_user_model().objects.create_user(username='cat', password="password")
+        bucket = InventoryCollectionBucket.objects.get(key=user.uuid.hex[:1])
+
+        self.assertEqual(user.get_collection().get_parent(), bucket.collection)
+        self.assertEqual(bucket.collection.get_parent().name, 'Users')
+
+    def test_collections_are_moved_into_buckets_and_back(self):
+        keys = [user.uuid.hex[:1] for user in self.users]
+
+        with override_settings(INVENTORY_BUCKETS={'PAGES': 0, 'COLLECTIONS': 1}):
+            self.assertIn("Would move 2 user collections", self.rebucket('--dry-run'))
+            self.assertCollectionsAreUnder(['Users', 'Users'])
+
+            self.assertIn("Moved 2 user collections", self.rebucket())
+            self.assertCollectionsAreUnder(keys)
+            self.assertEqual(
+                sorted(InventoryCollectionBucket.objects.values_list('key', flat=True)), sorted(set(keys))
+            )
+            self.assertIn("Moved 0 user collections", self.rebucket())
+
+        self.assertIn("Moved 2 user collections", self.rebucket())
+        self.assertCollectionsAreUnder(['Users', 'Users'])
@@ -1,7 +1,39 @@
 import warnings
 
+from base.registry import ModelRegistry
+
 DEFAULT_NFC_TAG_MODEL = 'ntags.NFCTag'
 
+DEFAULT_NFC_TAG_SCAN_QUEUE = {
+    'ENABLED': False,
+    'MAX_SIZE': 10000,
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 1.0,
+}
+
+DEFAULT_NFC_TAG_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 60 * 60,
+    'LOCAL_TIMEOUT': 30,
+}
+
+DEFAULT_NFC_TAG_UID_FILTER = {
+    'ENABLED': False,
+    'ERROR_RATE': 0.001,
+    'CAPACITY': 100000,
+    'MAX_AGE': 60 * 60,
+    'CACHE_ALIAS': 'default',
+}
+
+DEFAULT_NFC_TAG_SCAN_RETENTION = {
+    'DAYS': 90,
+}
+
+# Built in NtagsConfig.ready()
+nfc_taggable_models = ModelRegistry('NFC_TAGGABLE_MODELS')
+
+_nfc_tag_model = None
+
 
 def get_nfc_tag_fallback_url():
     """
@@ -19,6 +51,50 @@ def get_nfc_tag_fallback_url():
     return fallback_url
 
 
+def get_nfc_tag_scan_queue_settings():
+    """
+    Returns the settings for the buffered scan ingestion queue.
+    """
+    from django.conf import settings
+
+    queue_settings = dict(DEFAULT_NFC_TAG_SCAN_QUEUE)
+    queue_settings.update(getattr(settings, 'NFC_TAG_SCAN_QUEUE', {}))
+    return queue_settings
+
+
+def get_nfc_tag_cache_settings():
+    """
+    Returns the settings for the NFC tag resolution cache.
+    """
+    from django.conf import settings
+
+    cache_settings = dict(DEFAULT_NFC_TAG_CACHE)
+    cache_settings.update(getattr(settings, 'NFC_TAG_CACHE', {}))
+    return cache_settings
+
+
+def get_nfc_tag_uid_filter_settings():
+    """
+    Returns the settings for the Bloom filter of registered UIDs.
+    """
+    from django.conf import settings
+
+    filter_settings = dict(DEFAULT_NFC_TAG_UID_FILTER)
+    filter_settings.update(getattr(settings, 'NFC_TAG_UID_FILTER', {}))
+    return filter_settings
+
+
+def get_nfc_tag_scan_retention_settings():
+    """
+    Returns the settings for compacting raw scans into the scan rollups.
+    """
+    from django.conf import settings
+
+    retention_settings = dict(DEFAULT_NFC_TAG_SCAN_RETENTION)
+    retention_settings.update(getattr(settings, 'NFC_TAG_SCAN_RETENTION', {}))
+    return retention_settings
+
+
 def get_nfc_tag_model_string():
     """
     Returns the model string for the NFCTag model.
@@ -39,74 +115,36 @@ def get_nfc_tag_model():
     """
     Returns the model class for the NFCTag model.
     """
-    from django.apps import apps
+    global _nfc_tag_model
 
-    model_string = get_nfc_tag_model_string()
-    try:
-        app_label, model_name = model_string.split('.')
-        return apps.get_model(app_label, model_name)
-    except (ValueError, LookupError):
-        raise ValueError(f"Invalid NFC_TAG_MODEL '{model_string}'")
+    if _nfc_tag_model is None:
+        from django.apps import apps
+
+        model_string = get_nfc_tag_model_string()
+        try:
+            app_label, model_name = model_string.split('.')
+            _nfc_tag_model = apps.get_model(app_label, model_name)
+        except (ValueError, LookupError):
+            raise ValueError(f"Invalid NFC_TAG_MODEL '{model_string}'")
+    return _nfc_tag_model
 
 
 def get_nfc_taggable_model_strings():
     """
     Returns a list of model strings that are taggable by NFC tags.
     """
-    from django.conf import settings
-
-    taggable_models = getattr(settings, 'NFC_TAGGABLE_MODELS', None)
-    if taggable_models is None:
-        warnings.warn(
-            "NFC_TAGGABLE_MODELS is not set. Defaulting to an empty list.",
-            UserWarning
-        )
-        return []
-    return taggable_models
+    return nfc_taggable_models.model_strings
 
 
 def get_nfc_taggable_models():
     """
     Returns a query combining all models that are taggable by NFC tags.
     """
-    from django.db.models import Q as query
-
-    # Return an empty Q object if there are no taggable models
-    taggable_models = get_nfc_taggable_model_strings()
-    if not taggable_models:
-        return query()
-
-    # Build conditions using the taggable models
-    conditions = [
-        query(app_label=app_label, model=model_name.lower()) for app_label, model_name in (model.split('.') for model in taggable_models)
-    ]
-
-    # Combine all conditions with OR
-    return conditions[0] if len(conditions) == 1 else query(*conditions, _connector=query.OR)
+    return nfc_taggable_models.query
 
 
 def get_nfc_taggable_model_classes():
     """
     Returns a list of model classes that are taggable by NFC tags.
     """
-    from django.apps import apps
-    from django.contrib.contenttypes.models import ContentType
-
-    # Get the list of model strings from settings
-    model_strings = get_nfc_taggable_model_strings()
-    if not model_strings:
-        return ContentType.objects.none()
-
-    # Resolve model strings to model classes
-    content_types = []
-    for model_string in model_strings:
-        try:
-            app_label, model_name = model_string.split('.')
-            model_class = apps.get_model(app_label, model_name)
-            if model_class:
-                content_type = ContentType.objects.get_for_model(model_class)
-                content_types.append(content_type)
-        except (ValueError, LookupError):
-            warnings.warn(f"Could not find ContentType for model: {model_string}", UserWarning)
-
-    return ContentType.objects.filter(id__in=[ct.id for ct in content_types])
+    return nfc_taggable_models.content_types()
@@ -1,10 +1,28 @@
-from rest_framework.routers import DefaultRouter
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
 from rest_framework import status, viewsets, permissions
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.response import Response
 
-from ..models import NFCTag
-from .serializers import NFCTagSerializer
+from .. import exports
+from ..models import NFCTag, NFCTagScan, NFCTagScanRollup
+from ..provisioning import FORMATS, STATUSES, guess_format, provision_nfc_tags, read_lines, read_rows
+from ..validators import validate_ascii_mirror_uid
+from .serializers import NFCTagSerializer, NFCTagScanSerializer, NFCTagScanRollupSerializer
+
+
+class NFCTagScanPagination(CursorPagination):
+    """
+    Pages through scans by time, so deep pages cost the same as the first.
+    """
+    ordering = '-scanned_at'
+    page_size = 100
 
 
 class NFCTagAPIViewSet(viewsets.ModelViewSet):
@@ -13,17 +31,29 @@ class NFCTagAPIViewSet(viewsets.ModelViewSet):
     """
     queryset = NFCTag.objects.all()
     serializer_class = NFCTagSerializer
-    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [JWTAuthentication]
     lookup_field = 'uid'
 
     def get_queryset(self):
         if self.request.user.is_superuser:
-            return NFCTag.objects.all()
-        return NFCTag.objects.filter(
-            user=self.request.user,
-            active=True
-        )
+            queryset = NFCTag.objects.all()
+        else:
+            queryset = NFCTag.objects.filter(
+                user=self.request.user,
+                active=True
+            )
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.with_scan_summary().with_content_objects()
+        return queryset
+
+    def get_object(self):
+        # A UID that is not hex can never match a tag
+        try:
+            validate_ascii_mirror_uid(self.kwargs[self.lookup_field])
+        except DjangoValidationError:
+            raise Http404
+        return super().get_object()
 
     def create(self, request, *args, **kwargs):
         """
@@ -33,6 +63,7 @@ class NFCTagAPIViewSet(viewsets.ModelViewSet):
 
         if not uid:
             return Response({"error": "Serial Number not provided."}, status=status.HTTP_400_BAD_REQUEST)
+        uid = self.clean_uids([uid])[0].upper()
 
         nfc_tag, created = NFCTag.objects.update_or_create(
             uid=uid
@@ -57,6 +88,135 @@ class NFCTagAPIViewSet(viewsets.ModelViewSet):
             instance.save()
             return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=True, methods=['get'], pagination_class=NFCTagScanPagination)
+    def scans(self, request, uid=None):
+        """
+        Return the tag's scans, newest first, a page at a time.
+        Accepts ISO 8601 `since` and `until` bounds on the scan time.
+        """
+        nfc_tag = self.get_object()
+        scans = self.filter_time_range(nfc_tag.scans.all(), 'scanned_at')
+
+        page = self.paginate_queryset(scans)
+        if page is not None:
+            serializer = NFCTagScanSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        return Response(NFCTagScanSerializer(scans, many=True).data)
+
+    def filter_time_range(self, queryset, field):
+        """
+        Filter a queryset by the ISO 8601 `since` (inclusive) and `until`
+        (exclusive) query parameters.
+        """
+        for param, lookup in (('since', 'gte'), ('until', 'lt')):
+            value = self.request.query_params.get(param)
+            if value is None:
+                continue
+            parsed = parse_datetime(value)
+            if parsed is None:
+                raise ValidationError({param: "Must be an ISO 8601 date and time."})
+            queryset = queryset.filter(**{f'{field}__{lookup}': parsed})
+        return queryset
+
+    @action(detail=True, methods=['get'])
+    def activity(self, request, uid=None):
+        """
+        Return the tag's scan counts per hour or day, read from the rollups.
+        Accepts `period` (hour or day, default day) and ISO 8601 `since` and
+        `until` bounds on the bucket start.
+        """
+        nfc_tag = self.get_object()
+
+        period = request.query_params.get('period', NFCTagScanRollup.DAY)
+        if period not in (NFCTagScanRollup.HOUR, NFCTagScanRollup.DAY):
+            raise ValidationError({'period': "Must be 'hour' or 'day'."})
+
+        rollups = self.filter_time_range(nfc_tag.scan_rollups.filter(period=period), 'bucket')
+
+        page = self.paginate_queryset(rollups)
+        if page is not None:
+            serializer = NFCTagScanRollupSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        return Response(NFCTagScanRollupSerializer(rollups, many=True).data)
+
+    @action(detail=False, methods=['get'], url_path='scans/export', permission_classes=[permissions.IsAuthenticated])
+    def export_scans(self, request):
+        """
+        Stream every scan of the tags visible to the user as NDJSON or CSV.
+        Accepts `output` (ndjson or csv), `uid` and `scanned_by` filters that
+        may be repeated, and ISO 8601 `since` and `until` bounds.
+        """
+        output = request.query_params.get('output', exports.NDJSON)
+        if output not in exports.FORMATS:
+            raise ValidationError({'output': f"Must be one of: {', '.join(exports.FORMATS)}."})
+
+        scans = NFCTagScan.objects.all()
+        if not request.user.is_superuser:
+            scans = scans.filter(nfc_tag__user=request.user, nfc_tag__active=True)
+        uids = request.query_params.getlist('uid')
+        if uids:
+            scans = scans.filter(nfc_tag__uid__in=self.clean_uids(uids))
+        scanned_by = request.query_params.getlist('scanned_by')
+        if scanned_by:
+            try:
+                scans = scans.filter(scanned_by__in=[int(pk) for pk in scanned_by])
+            except ValueError:
+                raise ValidationError({'scanned_by': "Must be user ids."})
+        scans = self.filter_time_range(scans, 'scanned_at').order_by('scanned_at', 'pk')
+
+        response = StreamingHttpResponse(
+            exports.export_scans(scans, format=output),
+            content_type=exports.CONTENT_TYPES[output]
+        )
+        response['Content-Disposition'] = f'attachment; filename="nfc-tag-scans.{output}"'
+        return response
+
+    def clean_uids(self, uids):
+        try:
+            for uid in uids:
+                validate_ascii_mirror_uid(uid)
+        except DjangoValidationError as e:
+            raise ValidationError({'uid': e.messages})
+        return uids
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def provision(self, request):
+        """
+        Create NFC tags in bulk from a CSV or NDJSON list of UIDs, sent either
+        as a `file` upload or as the raw request body.
+
+        The body is read and written a batch at a time while the response
+        streams back one NDJSON result per row, followed by a summary line.
+        Accepts `input_format` (csv or ndjson), `integrated_circuit` (the default
+        for rows without one) and `batch_size` query parameters.
+        """
+        if request.content_type.startswith('multipart/'):
+            upload = request.FILES.get('file')
+            stream, name, content_type = upload, getattr(upload, 'name', ''), getattr(upload, 'content_type', '')
+        else:
+            stream, name, content_type = request.stream, '', request.content_type
+        if stream is None:
+            raise ValidationError({'file': "No UIDs provided."})
+
+        input_format = request.query_params.get('input_format') or guess_format(name, content_type)
+        if input_format not in FORMATS:
+            raise ValidationError({'input_format': f"Must be one of: {', '.join(FORMATS)}."})
+        try:
+            batch_size = max(1, min(int(request.query_params.get('batch_size', 1000)), 5000))
+        except ValueError:
+            raise ValidationError({'batch_size': "Must be an integer."})
+
+        results = provision_nfc_tags(
+            read_rows(read_lines(stream), format=input_format),
+            integrated_circuit=request.query_params.get('integrated_circuit'),
+            batch_size=batch_size
+        )
+
+        def stream_results():
+            summary = dict.fromkeys(STATUSES, 0)
+            for result in results:
+                summary[result['status']] += 1
+                yield json.dumps(result) + '\n'
+            yield json.dumps({'summary': summary}) + '\n'
 
-router = DefaultRouter()
-router.register(r'nfc-tags', NFCTagAPIViewSet, basename='nfc-tag')  # noqa
\ No newline at end of file
+        return StreamingHttpResponse(stream_results(), content_type='application/x-ndjson')
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from ..models import NFCTag, NFCTagScan
+from ..models import NFCTag, NFCTagScan, NFCTagScanRollup
 
 
 class NFCTagScanSerializer(serializers.ModelSerializer):
@@ -16,22 +16,58 @@ class NFCTagScanSerializer(serializers.ModelSerializer):
         fields = ['id', 'nfc_tag', 'counter', 'scanned_by', 'scanned_at']
 
 
+class NFCTagScanRollupSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the hourly and daily scan counts of an NFC tag.
+    """
+    class Meta:
+        model = NFCTagScanRollup
+        fields = ['period', 'bucket', 'count', 'first_scanned_at', 'last_scanned_at', 'last_counter']
+
+
 class NFCTagSerializer(serializers.ModelSerializer):
     """
     Main serializer for the NFCTag model.
     """
-    scans = NFCTagScanSerializer(
-        many=True,
+    uid = serializers.CharField(
         read_only=True
     )
+    content_object = serializers.SerializerMethodField()
+    scans = serializers.SerializerMethodField()
 
     def get_content_object(self, obj):
-        pass
+        """
+        The object the tag links to. Listings prefetch these with
+        `with_content_objects()`.
+        """
+        content_object = obj.content_object
+        if content_object is None:
+            return None
+        return {
+            'type': content_object._meta.label_lower,
+            'id': content_object.pk,
+            'name': str(content_object),
+            'url': getattr(content_object, 'url', None),
+        }
+
+    def get_scans(self, obj):
+        """
+        A summary of the tag's scans. The full history is available from the
+        paginated `scans` sub-resource.
+        """
+        if not hasattr(obj, 'scan_count'):
+            obj = NFCTag.objects.with_scan_summary().get(pk=obj.pk)
+        return {
+            'count': obj.scan_count,
+            'first_scanned_at': serializers.DateTimeField().to_representation(obj.first_scanned_at),
+            'last_scanned_at': serializers.DateTimeField().to_representation(obj.last_scanned_at),
+            'last_counter': obj.last_counter,
+        }
 
     class Meta:
         model = NFCTag
         fields = [
             'uid', 'integrated_circuit',
-            'user', 'label', 'active',
+            'user', 'active', 'content_object',
             'scans', 'metadata'
         ]
@@ -0,0 +1,20 @@
+from django.urls import path
+
+from .api import NFCTagAPIViewSet
+
+
+def action_view(name, detail):
+    action = getattr(NFCTagAPIViewSet, name)
+    return NFCTagAPIViewSet.as_view(
+        {method: name for method in action.mapping}, detail=detail, **action.kwargs
+    )
+
+
+# Only the scan history, activity, export and provisioning actions are
+# routed; the rest of the viewset is not public
+urlpatterns = [
+    path('nfc-tags/provision/', action_view('provision', detail=False), name='nfc-tag-provision'),
+    path('nfc-tags/scans/export/', action_view('export_scans', detail=False), name='nfc-tag-export-scans'),
+    path('nfc-tags/<str:uid>/scans/', action_view('scans', detail=True), name='nfc-tag-scans'),
+    path('nfc-tags/<str:uid>/activity/', action_view('activity', detail=True), name='nfc-tag-activity'),
+]
@@ -9,5 +9,10 @@ class NtagsConfig(AppConfig):
 
     def ready(self):
         from wagtail.models.reference_index import ReferenceIndex
+        from . import get_nfc_tag_model, nfc_taggable_models
         from .models import NFCTagScan
-        ReferenceIndex.register_model(NFCTagScan)  # noqa
\ No newline at end of file
+        from .signals import register_signal_handlers
+        nfc_taggable_models.build()
+        get_nfc_tag_model()
+        ReferenceIndex.register_model(NFCTagScan)
+        register_signal_handlers()
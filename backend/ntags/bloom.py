@@ -0,0 +1,223 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.db import connection, transaction
+
+from . import get_nfc_tag_model, get_nfc_tag_uid_filter_settings
+from .cache import is_shared_cache
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = 'ntags:uid-filter:version'
+
+_uid_filter = None
+_uid_filter_lock = threading.Lock()
+_unshared_cache_aliases = set()
+
+
+class BloomFilter:
+    """
+    A probabilistic set of UIDs. Membership tests never give false negatives,
+    and give false positives at roughly `error_rate` while the filter holds
+    no more than `capacity` items.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        if capacity < 1:
+            raise ValueError("The capacity must be a positive, non-zero integer.")
+        if not 0 < error_rate < 1:
+            raise ValueError("The error rate must be between 0 and 1.")
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bit_count = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+        self.bits = bytearray((self.bit_count + 7) // 8)
+        self.count = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, uid):
+        for position in self._positions(uid):
+            if not self.bits[position >> 3] & (1 << (position & 7)):
+                self.misses += 1
+                return False
+        self.hits += 1
+        return True
+
+    def add(self, uid):
+        for position in self._positions(uid):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, uids):
+        for uid in uids:
+            self.add(uid)
+
+    @property
+    def memory_size(self):
+        """
+        The size of the bit array in bytes.
+        """
+        return len(self.bits)
+
+    def stats(self):
+        return {
+            'count': self.count,
+            'capacity': self.capacity,
+            'error_rate': self.error_rate,
+            'bit_count': self.bit_count,
+            'hash_count': self.hash_count,
+            'memory_size': self.memory_size,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def _positions(self, uid):
+        # Double hashing: derive every probe from two halves of one digest
+        digest = hashlib.blake2b(uid.upper().encode('ascii'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.bit_count for i in range(self.hash_count)]
+
+
+class SharedUIDFilter:
+    """
+    Keeps a process-local Bloom filter of every registered UID in step with
+    the database.
+
+    A version number in the shared cache is bumped whenever a tag is created.
+    A filter built for an older version is never used to reject a UID; it is
+    rebuilt in the background while lookups fall through to the database.
+    """
+
+    def __init__(self, cache, error_rate, capacity, max_age):
+        self.cache = cache
+        self.error_rate = error_rate
+        self.capacity = capacity
+        self.max_age = max_age
+        self.bloom_filter = None
+        self.version = None
+        self.built_at = None
+        self._rebuilding = threading.Lock()
+
+    def get_version(self):
+        return self.cache.get_or_set(VERSION_CACHE_KEY, 0, None)
+
+    def bump_version(self):
+        try:
+            self.cache.incr(VERSION_CACHE_KEY)
+        except ValueError:
+            self.cache.set(VERSION_CACHE_KEY, 1, None)
+
+    def is_current(self):
+        if self.bloom_filter is None:
+            return False
+        if time.monotonic() - self.built_at > self.max_age:
+            return False
+        return self.version == self.get_version()
+
+    def add(self, uid):
+        """
+        Add a newly created UID and tell other processes to rebuild once
+        the surrounding transaction has committed.
+        """
+        if self.bloom_filter is not None:
+            self.bloom_filter.add(uid)
+        transaction.on_commit(self.bump_version)
+
+    def might_contain(self, uid):
+        """
+        Returns False only if the UID is definitely not registered.
+        """
+        if not self.is_current():
+            self.rebuild_in_background()
+            return True
+        return uid in self.bloom_filter
+
+    def rebuild(self):
+        # Read the version before the tags so a concurrent creation can only
+        # make this filter look stale, never hide a registered UID.
+        version = self.get_version()
+        NFCTag = get_nfc_tag_model()
+
+        started = time.monotonic()
+        capacity = max(self.capacity, int(NFCTag.objects.count() * 1.5))
+        bloom_filter = BloomFilter(capacity, self.error_rate)
+        bloom_filter.update(NFCTag.objects.values_list('uid', flat=True).iterator(chunk_size=10000))
+
+        self.bloom_filter = bloom_filter
+        self.version = version
+        self.built_at = time.monotonic()
+        logger.info(
+            "Built NFC tag UID filter with %d UIDs (%d bytes) in %.2fs",
+            bloom_filter.count, bloom_filter.memory_size, self.built_at - started
+        )
+
+    def rebuild_in_background(self):
+        if not self._rebuilding.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.rebuild()
+            except Exception:
+                logger.exception("Failed to build the NFC tag UID filter")
+            finally:
+                connection.close()
+                self._rebuilding.release()
+
+        threading.Thread(target=run, name='nfc-tag-uid-filter', daemon=True).start()
+
+    def stats(self):
+        stats = self.bloom_filter.stats() if self.bloom_filter is not None else {}
+        stats.update({
+            'version': self.version,
+            'current': self.is_current(),
+        })
+        return stats
+
+
+def get_uid_filter():
+    """
+    Returns the process-wide UID filter, or None if the filter is disabled.
+
+    The filter stays disabled, so every lookup goes to the database, unless
+    CACHE_ALIAS names a cache shared by all workers. With a per-process
+    cache, other workers would never see a version bump and would turn
+    away newly created tags until MAX_AGE.
+    """
+    global _uid_filter
+
+    filter_settings = get_nfc_tag_uid_filter_settings()
+    if not filter_settings['ENABLED']:
+        return None
+
+    if _uid_filter is None:
+        from django.core.cache import caches
+
+        cache = caches[filter_settings['CACHE_ALIAS']]
+        if not is_shared_cache(cache):
+            if filter_settings['CACHE_ALIAS'] not in _unshared_cache_aliases:
+                _unshared_cache_aliases.add(filter_settings['CACHE_ALIAS'])
+                logger.warning(
+                    "NFC_TAG_UID_FILTER is enabled but the %r cache is not shared between processes; "
+                    "the filter is disabled.", filter_settings['CACHE_ALIAS']
+                )
+            return None
+
+        with _uid_filter_lock:
+            if _uid_filter is None:
+                _uid_filter = SharedUIDFilter(
+                    cache=cache,
+                    error_rate=filter_settings['ERROR_RATE'],
+                    capacity=filter_settings['CAPACITY'],
+                    max_age=filter_settings['MAX_AGE']
+                )
+    return _uid_filter
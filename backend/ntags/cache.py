@@ -0,0 +1,139 @@
+from django.core.cache import caches
+
+from . import get_nfc_tag_model, get_nfc_tag_cache_settings
+from .fields import NTAGUIDField
+
+CACHE_KEY_PREFIX = 'ntags:uid:'
+COUNTER_CACHE_KEY_PREFIX = 'ntags:counter:'
+
+RESOLUTION_FIELDS = ['id', 'uid', 'active', 'user', 'content_type', 'object_id']
+
+
+def get_nfc_tag_cache():
+    """
+    Returns the cache backend used for NFC tag resolutions.
+    """
+    return caches[get_nfc_tag_cache_settings()['ALIAS']]
+
+
+def is_shared_cache(cache):
+    """
+    Returns whether every worker process sees the same entries in a cache.
+    Local memory and dummy caches are private to each process.
+    """
+    from django.core.cache.backends.dummy import DummyCache
+    from django.core.cache.backends.locmem import LocMemCache
+
+    return not isinstance(cache, (DummyCache, LocMemCache))
+
+
+def get_nfc_tag_cache_timeout():
+    """
+    Returns how long resolutions are cached: TIMEOUT in a shared cache, but
+    no more than LOCAL_TIMEOUT in a per-process one, where a change made in
+    another worker is never invalidated.
+    """
+    cache_settings = get_nfc_tag_cache_settings()
+    if is_shared_cache(get_nfc_tag_cache()):
+        return cache_settings['TIMEOUT']
+    return min(cache_settings['TIMEOUT'], cache_settings['LOCAL_TIMEOUT'])
+
+
+def get_nfc_tag_cache_key(uid):
+    """
+    Returns the cache key for the NFC tag with the given UID. The UID is
+    normalised to the upper-case hex form it is stored in, so every spelling
+    of a UID shares the entry that saving the tag invalidates.
+    """
+    try:
+        uid = NTAGUIDField.to_hex(uid if isinstance(uid, int) else int(uid, 16))
+    except (TypeError, ValueError):
+        pass
+    return f"{CACHE_KEY_PREFIX}{uid}"
+
+
+def get_nfc_tag_counter_cache_key(pk):
+    """
+    Returns the cache key for the counter high-watermark of the given NFC tag.
+    """
+    return f"{COUNTER_CACHE_KEY_PREFIX}{pk}"
+
+
+def build_nfc_tag_resolution(nfc_tag):
+    """
+    Returns everything the scan path needs to know about an NFC tag as
+    a plain dictionary, including the destination of its linked object.
+    """
+    details = nfc_tag.get_details()
+    return {
+        'id': nfc_tag.pk,
+        'uid': nfc_tag.uid,
+        'active': nfc_tag.active,
+        'user': nfc_tag.user_id,
+        'content_type': nfc_tag.content_type_id,
+        'object_id': nfc_tag.object_id,
+        'url': details['url'],
+        'details': details,
+    }
+
+
+def get_nfc_tag_resolution(uid):
+    """
+    Returns the resolution for the NFC tag with the given UID, or None if
+    the tag does not exist. The database is only read on a cache miss.
+    """
+    cache = get_nfc_tag_cache()
+    cache_key = get_nfc_tag_cache_key(uid)
+
+    resolution = cache.get(cache_key)
+    if resolution is not None:
+        return resolution
+
+    nfc_tag = get_nfc_tag_model().objects.filter(uid=uid).first()
+    if nfc_tag is None:
+        return None
+
+    resolution = build_nfc_tag_resolution(nfc_tag)
+    cache.set(cache_key, resolution, get_nfc_tag_cache_timeout())
+    return resolution
+
+
+def get_nfc_tag_from_resolution(resolution):
+    """
+    Returns an NFC tag instance built from a resolution without touching the
+    database. Fields that are not part of the resolution are deferred.
+    """
+    NFCTag = get_nfc_tag_model()
+    attributes = {
+        NFCTag._meta.get_field(name).attname: resolution[name] for name in RESOLUTION_FIELDS
+    }
+
+    # from_db expects the values in the order of the model's concrete fields
+    field_names = [field.attname for field in NFCTag._meta.concrete_fields if field.attname in attributes]
+    values = [attributes[field_name] for field_name in field_names]
+    return NFCTag.from_db('default', field_names, values)
+
+
+def invalidate_nfc_tag(uid):
+    """
+    Removes the cached resolution for the NFC tag with the given UID.
+    """
+    get_nfc_tag_cache().delete(get_nfc_tag_cache_key(uid))
+
+
+def invalidate_nfc_tags_for(model, object_ids):
+    """
+    Removes the cached resolutions of all NFC tags linked to the given objects.
+    """
+    from django.contrib.contenttypes.models import ContentType
+
+    object_ids = list(object_ids)
+    if not object_ids:
+        return
+
+    uids = get_nfc_tag_model().objects.filter(
+        content_type=ContentType.objects.get_for_model(model),
+        object_id__in=object_ids
+    ).values_list('uid', flat=True)
+
+    get_nfc_tag_cache().delete_many([get_nfc_tag_cache_key(uid) for uid in uids])
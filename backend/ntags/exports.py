@@ -0,0 +1,50 @@
+import csv
+import json
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+FORMATS = (CSV, NDJSON)
+
+CONTENT_TYPES = {
+    CSV: 'text/csv',
+    NDJSON: 'application/x-ndjson',
+}
+
+SCAN_EXPORT_FIELDS = ['id', 'uid', 'counter', 'scanned_by', 'scanned_at']
+SCAN_EXPORT_COLUMNS = ['pk', 'nfc_tag__uid', 'counter', 'scanned_by_id', 'scanned_at']
+
+
+class Echo:
+    """
+    A file-like object that returns what is written to it, so csv.writer
+    can format one row at a time.
+    """
+
+    def write(self, value):
+        return value
+
+
+def export_scans(scans, format=NDJSON, chunk_size=2000):
+    """
+    Yields the given scans as lines of NDJSON or CSV.
+
+    Rows are fetched with a server-side cursor where the database supports
+    one, so memory use does not grow with the number of scans.
+    """
+    rows = scans.values_list(*SCAN_EXPORT_COLUMNS).iterator(chunk_size=chunk_size)
+
+    if format == CSV:
+        writer = csv.writer(Echo())
+        yield writer.writerow(SCAN_EXPORT_FIELDS)
+        for pk, uid, counter, scanned_by, scanned_at in rows:
+            yield writer.writerow([pk, uid, counter, '' if scanned_by is None else scanned_by, scanned_at.isoformat()])
+        return
+
+    for pk, uid, counter, scanned_by, scanned_at in rows:
+        yield json.dumps({
+            'id': pk,
+            'uid': uid,
+            'counter': counter,
+            'scanned_by': scanned_by,
+            'scanned_at': scanned_at.isoformat(),
+        }) + '\n'
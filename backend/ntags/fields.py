@@ -0,0 +1,63 @@
+from django.core import exceptions
+from django.db import models
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+UID_HEX_LENGTH = 14
+
+
+class NTAGUIDField(models.PositiveBigIntegerField):
+    """
+    Stores a 7-byte NTAG UID as a 56-bit integer.
+
+    The field accepts and returns the 14 character hex form used by the
+    ASCII mirror, so models, lookups and the API keep working with strings
+    while the column and its indexes stay integer sized.
+    """
+    description = _("NTAG UID stored as a 56-bit integer")
+
+    default_error_messages = {
+        'invalid': _('“%(value)s” is not a valid UID (Serial Number).'),
+    }
+
+    @cached_property
+    def validators(self):
+        # The integer range validators do not apply to the hex form
+        return [*self.default_validators, *self._validators]
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return self.to_hex(value)
+
+    def to_python(self, value):
+        if value is None:
+            return value
+        if isinstance(value, int):
+            return self.to_hex(value)
+        try:
+            return self.to_hex(int(value, 16))
+        except (TypeError, ValueError):
+            raise exceptions.ValidationError(
+                self.error_messages['invalid'],
+                code='invalid',
+                params={'value': value},
+            )
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None or isinstance(value, int):
+            return value
+        try:
+            return int(value, 16)
+        except (TypeError, ValueError) as e:
+            raise e.__class__(
+                f"Field '{self.name}' expected a hex UID but got {value!r}."
+            ) from e
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **kwargs)
+
+    @staticmethod
+    def to_hex(value):
+        return f"{value:0{UID_HEX_LENGTH}X}"
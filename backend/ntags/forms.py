@@ -40,7 +40,11 @@ class NFCTagForm(WagtailAdminModelForm):
     def populate_item_field(self, user, instance):
         from botany.models import UserPlant
 
-        self.fields['item'].queryset = UserPlant.objects.without_nfc_tag(user)
+        queryset = UserPlant.objects.without_nfc_tag(user)
+        if instance.object_id and instance.content_type_id == ContentType.objects.get_for_model(UserPlant).pk:
+            # Keep the plant this tag already links to selectable
+            queryset = queryset | UserPlant.objects.filter(pk=instance.object_id)
+        self.fields['item'].queryset = queryset
 
         if instance.content_object:
             self.fields['item'].initial = instance.object_id
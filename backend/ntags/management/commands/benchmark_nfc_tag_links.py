@@ -0,0 +1,102 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+OBJECT_TABLE = 'ntags_link_benchmark_object'
+TAG_TABLE = 'ntags_link_benchmark_tag'
+
+QUERIES = {
+    'NOT IN': (
+        f"SELECT COUNT(*) FROM {OBJECT_TABLE} o WHERE o.owner_id = %s AND o.id NOT IN "
+        f"(SELECT t.object_id FROM {TAG_TABLE} t WHERE t.content_type_id = 1)"
+    ),
+    'NOT EXISTS': (
+        f"SELECT COUNT(*) FROM {OBJECT_TABLE} o WHERE o.owner_id = %s AND NOT EXISTS "
+        f"(SELECT 1 FROM {TAG_TABLE} t WHERE t.content_type_id = 1 AND t.object_id = o.id)"
+    ),
+    'IN': (
+        f"SELECT COUNT(*) FROM {OBJECT_TABLE} o WHERE o.owner_id = %s AND o.id IN "
+        f"(SELECT t.object_id FROM {TAG_TABLE} t WHERE t.content_type_id = 1)"
+    ),
+    'EXISTS': (
+        f"SELECT COUNT(*) FROM {OBJECT_TABLE} o WHERE o.owner_id = %s AND EXISTS "
+        f"(SELECT 1 FROM {TAG_TABLE} t WHERE t.content_type_id = 1 AND t.object_id = o.id)"
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the id__in / NOT IN subqueries previously used by with_nfc_tag and "
+        "without_nfc_tag against the Exists() queries that replace them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help="Number of taggable objects to insert.")
+        parser.add_argument('--tagged', type=float, default=0.5, help="Fraction of objects linked to a tag.")
+        parser.add_argument('--owners', type=int, default=1000, help="Number of owners to spread objects over.")
+        parser.add_argument('--queries', type=int, default=20, help="Number of times to run each query.")
+        parser.add_argument('--batch-size', type=int, default=10000, help="Number of rows per insert.")
+
+    def handle(self, *args, **options):
+        with connection.cursor() as cursor:
+            self.create_tables(cursor)
+            try:
+                self.populate(cursor, options)
+                owners = [random.randrange(options['owners']) for _ in range(options['queries'])]
+                results = [(label, self.run(cursor, sql, owners)) for label, sql in QUERIES.items()]
+            finally:
+                self.drop_tables(cursor)
+
+        self.stdout.write(
+            f"{options['rows']} objects, {options['tagged']:.0%} tagged, "
+            f"{options['queries']} queries on {connection.vendor}"
+        )
+        for label, elapsed in results:
+            self.stdout.write(f"{label:>12}: {elapsed / options['queries'] * 1000:.2f}ms per query")
+
+    def create_tables(self, cursor):
+        self.drop_tables(cursor)
+        cursor.execute(f"CREATE TABLE {OBJECT_TABLE} (id integer PRIMARY KEY, owner_id integer NOT NULL)")
+        cursor.execute(f"CREATE INDEX {OBJECT_TABLE}_owner ON {OBJECT_TABLE} (owner_id)")
+        # Mirrors the nullable object_id and unique_content_object constraint of NFCTag
+        cursor.execute(
+            f"CREATE TABLE {TAG_TABLE} (id integer PRIMARY KEY, content_type_id integer, object_id integer, "
+            f"UNIQUE (content_type_id, object_id))"
+        )
+
+    def drop_tables(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {TAG_TABLE}")
+        cursor.execute(f"DROP TABLE IF EXISTS {OBJECT_TABLE}")
+
+    def populate(self, cursor, options):
+        rows, batch_size = options['rows'], options['batch_size']
+        tag_id = 0
+        for offset in range(0, rows, batch_size):
+            ids = range(offset, min(offset + batch_size, rows))
+            cursor.executemany(
+                f"INSERT INTO {OBJECT_TABLE} (id, owner_id) VALUES (%s, %s)",
+                [(i, random.randrange(options['owners'])) for i in ids]
+            )
+            tags = []
+            for i in ids:
+                if random.random() < options['tagged']:
+                    tags.append((tag_id, 1, i))
+                    tag_id += 1
+            # Unlinked tags have a NULL object_id, which stops NOT IN being planned as an anti-join
+            tags.append((tag_id, None, None))
+            tag_id += 1
+            cursor.executemany(f"INSERT INTO {TAG_TABLE} (id, content_type_id, object_id) VALUES (%s, %s, %s)", tags)
+
+        if connection.vendor == 'postgresql':
+            cursor.execute(f"ANALYZE {OBJECT_TABLE}")
+            cursor.execute(f"ANALYZE {TAG_TABLE}")
+
+    def run(self, cursor, sql, owners):
+        started = time.perf_counter()
+        for owner in owners:
+            cursor.execute(sql, [owner])
+            cursor.fetchone()
+        return time.perf_counter() - started
@@ -0,0 +1,103 @@
+import os
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+CHAR_TABLE = 'ntags_uid_benchmark_char'
+INTEGER_TABLE = 'ntags_uid_benchmark_integer'
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the index size and lookup latency of UIDs stored as 14 character "
+        "strings against UIDs stored as 56-bit integers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help="Number of UIDs to insert.")
+        parser.add_argument('--lookups', type=int, default=10000, help="Number of random lookups to time.")
+        parser.add_argument('--batch-size', type=int, default=10000, help="Number of rows per insert.")
+
+    def handle(self, *args, **options):
+        uids = [os.urandom(7).hex().upper() for _ in range(options['rows'])]
+        samples = random.choices(uids, k=options['lookups'])
+
+        with connection.cursor() as cursor:
+            self.create_tables(cursor)
+            try:
+                results = [
+                    self.run(cursor, CHAR_TABLE, 'varchar(32)', uids, samples, options['batch_size'], str),
+                    self.run(cursor, INTEGER_TABLE, 'bigint', uids, samples, options['batch_size'], self.to_integer),
+                ]
+            finally:
+                self.drop_tables(cursor)
+
+        self.stdout.write(f"{options['rows']} rows, {options['lookups']} lookups on {connection.vendor}")
+        for label, index_size, insert_time, lookup_time in results:
+            size = f"{index_size / 1024 / 1024:.2f} MiB" if index_size is not None else "n/a"
+            self.stdout.write(
+                f"{label:>12}: index {size}, insert {insert_time:.2f}s, "
+                f"lookup {lookup_time / options['lookups'] * 1e6:.1f}µs"
+            )
+
+    @staticmethod
+    def to_integer(uid):
+        return int(uid, 16)
+
+    def create_tables(self, cursor):
+        self.drop_tables(cursor)
+        cursor.execute(f"CREATE TABLE {CHAR_TABLE} (id integer PRIMARY KEY, uid varchar(32) NOT NULL UNIQUE)")
+        cursor.execute(f"CREATE TABLE {INTEGER_TABLE} (id integer PRIMARY KEY, uid bigint NOT NULL UNIQUE)")
+
+    def drop_tables(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {CHAR_TABLE}")
+        cursor.execute(f"DROP TABLE IF EXISTS {INTEGER_TABLE}")
+
+    def run(self, cursor, table, column_type, uids, samples, batch_size, convert):
+        started = time.perf_counter()
+        for offset in range(0, len(uids), batch_size):
+            cursor.executemany(
+                f"INSERT INTO {table} (id, uid) VALUES (%s, %s)",
+                [(offset + i, convert(uid)) for i, uid in enumerate(uids[offset:offset + batch_size])]
+            )
+        insert_time = time.perf_counter() - started
+
+        if connection.vendor == 'postgresql':
+            cursor.execute(f"ANALYZE {table}")
+
+        started = time.perf_counter()
+        for uid in samples:
+            cursor.execute(f"SELECT id FROM {table} WHERE uid = %s", [convert(uid)])
+            cursor.fetchone()
+        lookup_time = time.perf_counter() - started
+
+        return column_type, self.get_index_size(cursor, table), insert_time, lookup_time
+
+    def get_index_size(self, cursor, table):
+        """
+        Returns the size in bytes of the unique index on the uid column, if the
+        database can report it.
+        """
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                "SELECT SUM(pg_relation_size(i.indexrelid)) FROM pg_index i "
+                "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey) "
+                "WHERE i.indrelid = %s::regclass AND a.attname = 'uid'",
+                [table]
+            )
+            return cursor.fetchone()[0]
+
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    "SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+                    "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s)",
+                    [table]
+                )
+            except Exception:
+                return None  # SQLite was built without the dbstat virtual table
+            return cursor.fetchone()[0]
+
+        return None
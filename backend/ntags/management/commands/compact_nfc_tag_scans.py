@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ntags import get_nfc_tag_scan_retention_settings
+from ntags.rollups import compact_scans, rebuild_scan_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold raw NFC tag scans older than the retention period into the hourly "
+        "and daily rollups, then delete them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help="Keep raw scans for this many days. Defaults to NFC_TAG_SCAN_RETENTION['DAYS']."
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help="Recompute the rollups for every remaining raw scan afterwards."
+        )
+
+    def handle(self, *args, **options):
+        retention_settings = get_nfc_tag_scan_retention_settings()
+        days = options['days'] if options['days'] is not None else retention_settings['DAYS']
+        if days < 1:
+            raise CommandError("The retention period must be at least one day.")
+
+        deleted = compact_scans(timezone.now() - timedelta(days=days))
+        self.stdout.write(self.style.SUCCESS(f"Compacted {deleted} NFC tag scans older than {days} days"))
+
+        if options['rebuild']:
+            rebuild_scan_rollups()
+            self.stdout.write(self.style.SUCCESS("Rebuilt the NFC tag scan rollups"))
@@ -0,0 +1,54 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ntags.provisioning import CREATED, FORMATS, INVALID, STATUSES, guess_format, provision_nfc_tags, read_lines, read_rows
+
+
+class Command(BaseCommand):
+    help = "Create NFC tags in bulk from a CSV or NDJSON file of UIDs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File of UIDs to provision, or '-' to read from stdin.")
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help="File format. Guessed from the file extension if not given."
+        )
+        parser.add_argument(
+            '--integrated-circuit',
+            help="Integrated circuit for rows that do not specify one."
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Number of tags to validate and insert at a time."
+        )
+
+    def handle(self, *args, **options):
+        input_format = options['format'] or guess_format(options['path'])
+        try:
+            stream = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8-sig', newline='')
+        except OSError as e:
+            raise CommandError(f"Could not open {options['path']}: {e}")
+
+        summary = dict.fromkeys(STATUSES, 0)
+        with stream:
+            results = provision_nfc_tags(
+                read_rows(read_lines(stream), format=input_format),
+                integrated_circuit=options['integrated_circuit'],
+                batch_size=options['batch_size']
+            )
+            for result in results:
+                summary[result['status']] += 1
+                if result['status'] == INVALID:
+                    self.stderr.write(f"Line {result['line']}: {' '.join(result['errors'])}")
+                elif options['verbosity'] > 1:
+                    self.stdout.write(json.dumps(result))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Provisioned {summary[CREATED]} NFC tags "
+            f"({', '.join(f'{count} {status}' for status, count in summary.items() if status != CREATED)})"
+        ))
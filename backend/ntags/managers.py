@@ -1,33 +1,81 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.contenttypes.models import ContentType
 
-from . import get_nfc_tag_model
+from . import get_nfc_tag_model, nfc_taggable_models
 
 
 class NFCTaggableManager(models.Manager):
 
+    def for_nfc_tags(self):
+        """
+        The queryset used to fetch linked objects for a list of NFC tags.
+        Override to select the relations their __str__ and url need.
+        """
+        return self.all()
+
     def get_linked_object_type(self):
         """
         Get the ContentType for the linked object.
         """
         return ContentType.objects.get_for_model(self.model)
 
+    def nfc_tags(self):
+        """
+        A subquery of the NFC tags linked to the outer object. It is answered
+        from the unique (content_type, object_id) index on the tag table.
+        """
+        return get_nfc_tag_model().objects.filter(
+            content_type=self.get_linked_object_type(),
+            object_id=models.OuterRef('pk')
+        )
+
+    def with_nfc_tag_flag(self):
+        """
+        Annotate each object with whether it is linked to an NFC tag.
+        """
+        return self.annotate(has_nfc_tag=models.Exists(self.nfc_tags()))
+
     def with_nfc_tag(self):
         """
         Get a queryset of linked object instances with NFC tags.
         """
-        return self.filter(
-            id__in=get_nfc_tag_model().objects.filter(
-                content_type=self.get_linked_object_type()
-            ).values_list('object_id', flat=True)
-        )
+        return self.filter(models.Exists(self.nfc_tags()))
 
     def without_nfc_tag(self):
         """
         Get a queryset of linked object instances without NFC tags.
         """
-        return self.exclude(
-            id__in=get_nfc_tag_model().objects.filter(
-                content_type=self.get_linked_object_type()
-            ).values_list('object_id', flat=True)
+        return self.filter(~models.Exists(self.nfc_tags()))
+
+
+class NFCTagQuerySet(models.QuerySet):
+
+    def with_content_objects(self):
+        """
+        Prefetch the objects the tags link to with one query per taggable
+        model, using each model's `for_nfc_tags()` queryset where it has one.
+        """
+        from django.contrib.contenttypes.prefetch import GenericPrefetch
+
+        querysets = []
+        for model in nfc_taggable_models.models:
+            manager = model._default_manager
+            querysets.append(manager.for_nfc_tags() if hasattr(manager, 'for_nfc_tags') else manager.all())
+
+        if not querysets:
+            return self
+        return self.prefetch_related(GenericPrefetch('content_object', querysets))
+
+    def with_scan_summary(self):
+        """
+        Annotate each tag with its scan count and first and last scan times.
+        These are read from the daily rollups, so the cost depends on how
+        many days a tag has been scanned on rather than how many scans it has.
+        """
+        daily = models.Q(scan_rollups__period='day')
+        return self.annotate(
+            scan_count=Coalesce(models.Sum('scan_rollups__count', filter=daily), 0),
+            first_scanned_at=models.Min('scan_rollups__first_scanned_at', filter=daily),
+            last_scanned_at=models.Max('scan_rollups__last_scanned_at', filter=daily),
         )
@@ -0,0 +1,19 @@
+# Generated by Django 5.1 on 2026-10-18 09:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ntags', '0020_alter_nfctag_options_rename_serial_number_nfctag_uid'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='nfctagscan',
+            name='scanned_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.1 on 2026-10-18 11:40
+
+import ntags.fields
+import ntags.validators
+from django.db import migrations, models
+
+
+def copy_uid_to_integer(apps, schema_editor):
+    NFCTag = apps.get_model('ntags', 'NFCTag')
+    db_alias = schema_editor.connection.alias
+
+    batch = []
+    for nfc_tag in NFCTag.objects.using(db_alias).only('pk', 'uid').iterator(chunk_size=2000):
+        try:
+            int(nfc_tag.uid, 16)
+        except ValueError:
+            raise ValueError(f"NFC Tag {nfc_tag.pk} has a UID that is not hex: '{nfc_tag.uid}'")
+        nfc_tag.uid_value = nfc_tag.uid
+        batch.append(nfc_tag)
+
+        if len(batch) >= 2000:
+            NFCTag.objects.using(db_alias).bulk_update(batch, ['uid_value'])
+            batch = []
+
+    if batch:
+        NFCTag.objects.using(db_alias).bulk_update(batch, ['uid_value'])
+
+
+def copy_uid_to_string(apps, schema_editor):
+    NFCTag = apps.get_model('ntags', 'NFCTag')
+    db_alias = schema_editor.connection.alias
+
+    batch = []
+    for nfc_tag in NFCTag.objects.using(db_alias).only('pk', 'uid_value').iterator(chunk_size=2000):
+        nfc_tag.uid = nfc_tag.uid_value
+        batch.append(nfc_tag)
+
+        if len(batch) >= 2000:
+            NFCTag.objects.using(db_alias).bulk_update(batch, ['uid'])
+            batch = []
+
+    if batch:
+        NFCTag.objects.using(db_alias).bulk_update(batch, ['uid'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ntags', '0021_alter_nfctagscan_scanned_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nfctag',
+            name='uid_value',
+            field=ntags.fields.NTAGUIDField(editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='nfctag',
+            name='uid',
+            field=models.CharField(db_index=True, editable=False, max_length=32, null=True, unique=True, validators=[ntags.validators.validate_ascii_mirror_uid]),
+        ),
+        migrations.RunPython(copy_uid_to_integer, copy_uid_to_string),
+        migrations.RemoveField(
+            model_name='nfctag',
+            name='uid',
+        ),
+        migrations.RenameField(
+            model_name='nfctag',
+            old_name='uid_value',
+            new_name='uid',
+        ),
+        migrations.AlterField(
+            model_name='nfctag',
+            name='uid',
+            field=ntags.fields.NTAGUIDField(db_index=True, editable=False, unique=True, validators=[ntags.validators.validate_ascii_mirror_uid]),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1 on 2026-10-18 13:05
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_last_counter(apps, schema_editor):
+    NFCTag = apps.get_model('ntags', 'NFCTag')
+    NFCTagScan = apps.get_model('ntags', 'NFCTagScan')
+    db_alias = schema_editor.connection.alias
+
+    NFCTag.objects.using(db_alias).update(
+        last_counter=Subquery(
+            NFCTagScan.objects.filter(
+                nfc_tag=OuterRef('pk')
+            ).order_by('-counter').values('counter')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ntags', '0022_nfctag_uid_integer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nfctag',
+            name='last_counter',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_last_counter, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.1 on 2026-10-18 14:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ntags', '0023_nfctag_last_counter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='nfctagscan',
+            index=models.Index(fields=['scanned_at'], name='nfc_tag_scan_scanned_at'),
+        ),
+        migrations.AddIndex(
+            model_name='nfctagscan',
+            index=models.Index(fields=['nfc_tag', 'scanned_at'], name='nfc_tag_scan_tag_scanned_at'),
+        ),
+        migrations.CreateModel(
+            name='NFCTagScanRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('first_scanned_at', models.DateTimeField()),
+                ('last_scanned_at', models.DateTimeField()),
+                ('last_counter', models.PositiveIntegerField()),
+                ('nfc_tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scan_rollups', to='ntags.nfctag')),
+            ],
+            options={
+                'verbose_name': 'NFC Tag Scan Rollup',
+                'verbose_name_plural': 'NFC Tag Scan Rollups',
+                'ordering': ['bucket'],
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('nfc_tag', 'period', 'bucket'), name='unique_nfc_tag_scan_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='NFCTagUserScanRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('first_scanned_at', models.DateTimeField()),
+                ('last_scanned_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nfc_tag_scan_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'NFC Tag User Scan Rollup',
+                'verbose_name_plural': 'NFC Tag User Scan Rollups',
+                'ordering': ['bucket'],
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('user', 'period', 'bucket'), name='unique_nfc_tag_user_scan_rollup')],
+            },
+        ),
+    ]
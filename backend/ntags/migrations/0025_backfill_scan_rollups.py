@@ -0,0 +1,61 @@
+# Generated by Django 5.1 on 2026-10-18 18:30
+
+import datetime
+
+from django.db import migrations
+from django.db.models import Count, Max, Min
+from django.db.models.functions import Trunc
+
+
+def backfill_scan_rollups(apps, schema_editor):
+    # A frozen copy of ntags.rollups.rebuild_scan_rollups() as it stood when
+    # the rollups were added, so later changes there cannot break this step
+    NFCTagScan = apps.get_model('ntags', 'NFCTagScan')
+    NFCTagScanRollup = apps.get_model('ntags', 'NFCTagScanRollup')
+    NFCTagUserScanRollup = apps.get_model('ntags', 'NFCTagUserScanRollup')
+
+    alias = schema_editor.connection.alias
+    scans = NFCTagScan.objects.using(alias)
+
+    for period in ('hour', 'day'):
+        bucket = Trunc('scanned_at', period, tzinfo=datetime.timezone.utc)
+
+        tag_rows = scans.annotate(bucket=bucket).values('nfc_tag_id', 'bucket').annotate(
+            count=Count('pk'),
+            first_scanned_at=Min('scanned_at'),
+            last_scanned_at=Max('scanned_at'),
+            last_counter=Max('counter'),
+        ).order_by()
+        NFCTagScanRollup.objects.using(alias).bulk_create(
+            (NFCTagScanRollup(period=period, **row) for row in tag_rows.iterator()),
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['nfc_tag', 'period', 'bucket'],
+            update_fields=['count', 'first_scanned_at', 'last_scanned_at', 'last_counter'],
+        )
+
+        user_rows = scans.filter(scanned_by__isnull=False).annotate(bucket=bucket).values(
+            'scanned_by_id', 'bucket'
+        ).annotate(
+            count=Count('pk'),
+            first_scanned_at=Min('scanned_at'),
+            last_scanned_at=Max('scanned_at'),
+        ).order_by()
+        NFCTagUserScanRollup.objects.using(alias).bulk_create(
+            (NFCTagUserScanRollup(period=period, user_id=row.pop('scanned_by_id'), **row) for row in user_rows.iterator()),
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['user', 'period', 'bucket'],
+            update_fields=['count', 'first_scanned_at', 'last_scanned_at'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ntags', '0024_nfctagscan_indexes_nfctagscanrollup_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_scan_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ntags', '0025_backfill_scan_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nfctagscanrollup',
+            name='compacted',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -1,18 +1,27 @@
-from django.db import models, IntegrityError
+import logging
+from django.db import models, transaction, IntegrityError
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.utils.translation import gettext_lazy as _
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
-from . import get_nfc_taggable_models, get_nfc_tag_fallback_url
+from . import get_nfc_taggable_models, get_nfc_tag_fallback_url, get_nfc_tag_cache_settings
+from .cache import get_nfc_tag_cache, get_nfc_tag_counter_cache_key
+from .fields import NTAGUIDField
+from .managers import NFCTagQuerySet
+from .queues import get_scan_queue
+from .rollups import record_scans
 from .validators import validate_ascii_mirror_uid
 from .forms import NFCTagForm, NFCTagRegistrationForm
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
 NTAG213 = "213"
 NTAG215 = "215"
 NTAG216 = "216"
@@ -30,10 +39,16 @@ NTAG_EEPROM_SIZES = (
 )
 
 
+class ScanCounterError(Exception):
+    """
+    Raised when a scan's counter is not ahead of the tag's last scan.
+    """
+    pass
+
+
 class AbstractNFCTag(models.Model):
 
-    uid = models.CharField(
-        max_length=32,
+    uid = NTAGUIDField(
         editable=False,
         unique=True,
         db_index=True,
@@ -58,6 +73,11 @@ class AbstractNFCTag(models.Model):
     metadata = models.JSONField(
         default=dict,
     )
+    last_counter = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False
+    )
 
     def __str__(self):
         return f"NFC Tag: {self.uid}"
@@ -88,17 +108,76 @@ class AbstractNFCTag(models.Model):
                 raise TypeError("User must be an instance of User")
             scan_data['scanned_by'] = user
 
-        return self._create_scan_entry(scan_data)
+        self._check_cached_scan_counter(scan_data['counter'])
+        with transaction.atomic():
+            self.advance_scan_counter(scan_data['counter'])
+            return self._create_scan_entry(scan_data)
+
+    def advance_scan_counter(self, counter):
+        """
+        Move the tag's counter high-watermark forward, rejecting replayed or
+        out-of-order counters before a scan is written.
+
+        The conditional update is what actually accepts a counter. Call it in
+        the same transaction that writes the scan, so a failed write does not
+        leave the watermark ahead of the saved scans. The cached watermark is
+        only updated once that transaction commits.
+        """
+        cache = get_nfc_tag_cache()
+        cache_key = get_nfc_tag_counter_cache_key(self.pk)
+
+        updated = type(self).objects.filter(
+            models.Q(last_counter__isnull=True) | models.Q(last_counter__lt=counter),
+            pk=self.pk
+        ).update(last_counter=counter)
+
+        if not updated:
+            last_counter = type(self).objects.filter(pk=self.pk).values_list('last_counter', flat=True).first()
+            if last_counter is not None:
+                cache.set(cache_key, last_counter, get_nfc_tag_cache_settings()['TIMEOUT'])
+            self._reject_scan_counter(counter, last_counter)
+
+        transaction.on_commit(lambda: cache.set(cache_key, counter, get_nfc_tag_cache_settings()['TIMEOUT']))
+        self.last_counter = counter
+
+    def _check_cached_scan_counter(self, counter):
+        # The cached watermark is only a hint that is never ahead of the
+        # database, so it can reject replayed scans without a query.
+        last_counter = get_nfc_tag_cache().get(get_nfc_tag_counter_cache_key(self.pk))
+        if last_counter is not None and counter <= last_counter:
+            self._reject_scan_counter(counter, last_counter)
+
+    def _reject_scan_counter(self, counter, last_counter):
+        if last_counter is not None and counter < last_counter:
+            # A counter that goes backwards is a sign of a cloned tag
+            logger.warning(
+                "NFC Tag %s scanned with counter %d after %d, it may have been cloned.",
+                self.uid, counter, last_counter
+            )
+            raise ScanCounterError(_("Scan counter is lower than the last scan for this NFC Tag"))
+        raise ScanCounterError(_("Scan counter must be unique for each NFC Tag"))
 
     def _create_scan_entry(self, scan_data):
         """
         Helper method to create the scan entry in the database.
         This handles scan creation and uniqueness constraints.
+
+        When buffered ingestion is enabled the unsaved scan is handed to the
+        scan queue instead, unless the queue is full.
         """
+        scan_queue = get_scan_queue()
+        if scan_queue is not None:
+            scan = NFCTagScan(**scan_data)
+            if scan_queue.put(scan):
+                return scan
+
         try:
-            return NFCTagScan.objects.create(**scan_data)
+            with transaction.atomic():
+                scan = NFCTagScan.objects.create(**scan_data)
+                record_scans([scan])
+                return scan
         except IntegrityError:
-            raise IntegrityError(_("Scan counter must be unique for each NFC Tag"))
+            raise ScanCounterError(_("Scan counter must be unique for each NFC Tag"))
 
     def clean_scan_counter(self, counter):
         if isinstance(counter, int):
@@ -164,7 +243,8 @@ class BaseNFCTag(AbstractNFCTag):
 
     def build_context(self, request):
         context = super().build_context()
-        return context.update({'views': self.get_views(request.user)})
+        context.update({'views': self.get_views(request.user)})
+        return context
 
     def get_views(self, user):
         actions = []
@@ -173,13 +253,13 @@ class BaseNFCTag(AbstractNFCTag):
             actions.append('register')
 
         elif self.user == user:
-            actions.append(self.viewset_actions)
+            actions.extend(self.viewset_actions)
 
         return {action: self.get_admin_url(action) for action in actions}
 
     def get_admin_url(self, action):
         if action == 'register':
-            return reverse('ntags:register_nfc_tag', args=[self.pk])
+            return reverse('ntags:register-nfc-tag', args=[self.uid])
 
         viewset = self.get_viewset()
         url_name = viewset.get_url_name(action)
@@ -271,6 +351,8 @@ class BaseGenericNFCTag(BaseNFCTag):
 
 class NFCTag(BaseGenericNFCTag):
 
+    objects = NFCTagQuerySet.as_manager()
+
     class Meta(BaseGenericNFCTag.Meta):
         pass
 
@@ -292,7 +374,8 @@ class NFCTagScan(models.Model):
         related_name='+'
     )
     scanned_at = models.DateTimeField(
-        auto_now_add=True
+        default=timezone.now,
+        editable=False
     )
 
     def __str__(self):
@@ -308,3 +391,83 @@ class NFCTagScan(models.Model):
                 fields=['nfc_tag', 'counter'], name='unique_nfc_tag_counter'
             )
         ]
+        indexes = [
+            models.Index(fields=['scanned_at'], name='nfc_tag_scan_scanned_at'),
+            models.Index(fields=['nfc_tag', 'scanned_at'], name='nfc_tag_scan_tag_scanned_at'),
+        ]
+
+
+class AbstractScanRollup(models.Model):
+    """
+    Aggregated scan counts for a single hour or day.
+    """
+    HOUR = 'hour'
+    DAY = 'day'
+
+    PERIOD_CHOICES = (
+        (HOUR, _("Hour")),
+        (DAY, _("Day")),
+    )
+
+    period = models.CharField(
+        max_length=4,
+        choices=PERIOD_CHOICES
+    )
+    bucket = models.DateTimeField()
+    count = models.PositiveBigIntegerField(
+        default=0
+    )
+    first_scanned_at = models.DateTimeField()
+    last_scanned_at = models.DateTimeField()
+
+    class Meta:
+        abstract = True
+        ordering = ['bucket']
+
+
+class NFCTagScanRollup(AbstractScanRollup):
+
+    nfc_tag = models.ForeignKey(
+        NFCTag,
+        on_delete=models.CASCADE,
+        related_name='scan_rollups'
+    )
+    last_counter = models.PositiveIntegerField()
+    # Set once the raw scans behind the rollup have been deleted, so it can
+    # no longer be rebuilt
+    compacted = models.BooleanField(
+        default=False
+    )
+
+    def __str__(self):
+        return f"{self.nfc_tag} scans for the {self.period} of {self.bucket}: {self.count}"
+
+    class Meta(AbstractScanRollup.Meta):
+        verbose_name = _("NFC Tag Scan Rollup")
+        verbose_name_plural = _("NFC Tag Scan Rollups")
+        constraints = [
+            models.UniqueConstraint(
+                fields=['nfc_tag', 'period', 'bucket'], name='unique_nfc_tag_scan_rollup'
+            )
+        ]
+
+
+class NFCTagUserScanRollup(AbstractScanRollup):
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='nfc_tag_scan_rollups'
+    )
+
+    def __str__(self):
+        return f"Scans by {self.user} for the {self.period} of {self.bucket}: {self.count}"
+
+    class Meta(AbstractScanRollup.Meta):
+        verbose_name = _("NFC Tag User Scan Rollup")
+        verbose_name_plural = _("NFC Tag User Scan Rollups")
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'period', 'bucket'], name='unique_nfc_tag_user_scan_rollup'
+            )
+        ]
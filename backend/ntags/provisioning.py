@@ -0,0 +1,146 @@
+import csv
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import get_nfc_tag_model
+from .bloom import get_uid_filter
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+FORMATS = (CSV, NDJSON)
+
+CREATED = 'created'
+EXISTS = 'exists'
+DUPLICATE = 'duplicate'
+INVALID = 'invalid'
+STATUSES = (CREATED, EXISTS, DUPLICATE, INVALID)
+
+
+def guess_format(name='', content_type=''):
+    """
+    Returns the provisioning format for a file name or content type.
+    """
+    if name.lower().endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return NDJSON
+    return CSV
+
+
+def read_lines(stream):
+    """
+    Yields decoded lines from a binary or text stream, one at a time.
+    """
+    for line in stream:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8-sig')
+        yield line
+
+
+def read_rows(lines, format=CSV):
+    """
+    Yields (line number, uid, integrated circuit) for every row of a CSV or
+    NDJSON file. CSV files may have a `uid,integrated_circuit` header; NDJSON
+    lines may be objects with those keys or bare UID strings. A missing
+    integrated circuit is returned as None.
+    """
+    if format == NDJSON:
+        yield from _read_ndjson(lines)
+    else:
+        yield from _read_csv(lines)
+
+
+def provision_nfc_tags(rows, integrated_circuit=None, batch_size=1000):
+    """
+    Creates NFC tags for the given rows and yields one result per row.
+
+    Rows are validated with the model fields' own validators and written a
+    batch at a time, so memory use depends on the batch size rather than the
+    number of rows. UIDs that are already registered, or repeated within a
+    batch, are reported rather than overwritten.
+    """
+    NFCTag = get_nfc_tag_model()
+    uid_field = NFCTag._meta.get_field('uid')
+    integrated_circuit_field = NFCTag._meta.get_field('integrated_circuit')
+    integrated_circuit = integrated_circuit or integrated_circuit_field.get_default()
+
+    uid_filter = get_uid_filter()
+
+    def provision(batch):
+        return _provision_batch(NFCTag, uid_field, integrated_circuit_field, integrated_circuit, batch, uid_filter)
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield from provision(batch)
+            batch = []
+
+    if batch:
+        yield from provision(batch)
+
+
+def _provision_batch(NFCTag, uid_field, integrated_circuit_field, default_integrated_circuit, rows, uid_filter):
+    results = []
+    valid = {}
+    for line, uid, integrated_circuit in rows:
+        uid = (uid or '').strip().upper()
+        integrated_circuit = (integrated_circuit or '').strip() or default_integrated_circuit
+        result = {'line': line, 'uid': uid, 'status': None}
+        results.append(result)
+
+        errors = []
+        try:
+            uid_field.run_validators(uid)
+        except ValidationError as e:
+            errors.extend(e.messages)
+        try:
+            integrated_circuit_field.validate(integrated_circuit, None)
+        except ValidationError as e:
+            errors.extend(e.messages)
+
+        if errors:
+            result.update(status=INVALID, errors=errors)
+        elif uid in valid:
+            result['status'] = DUPLICATE
+        else:
+            valid[uid] = NFCTag(uid=uid, integrated_circuit=integrated_circuit)
+
+    existing = set(NFCTag.objects.filter(uid__in=list(valid)).values_list('uid', flat=True)) if valid else set()
+    new_tags = [nfc_tag for uid, nfc_tag in valid.items() if uid not in existing]
+    NFCTag.objects.bulk_create(new_tags, ignore_conflicts=True)
+    if new_tags and uid_filter is not None:
+        # bulk_create skips post_save, so tell every worker to rebuild as soon
+        # as this batch is saved, even if the caller stops reading results
+        transaction.on_commit(uid_filter.bump_version)
+
+    for result in results:
+        if result['status'] is None:
+            result['status'] = EXISTS if result['uid'] in existing else CREATED
+    return results
+
+
+def _read_csv(lines):
+    reader = csv.reader(lines)
+    for row in reader:
+        if not row or not any(value.strip() for value in row):
+            continue
+        if reader.line_num == 1 and row[0].strip().lower() == 'uid':
+            continue
+        yield reader.line_num, row[0], row[1] if len(row) > 1 else None
+
+
+def _read_ndjson(lines):
+    for line_num, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError:
+            yield line_num, line.strip(), None
+            continue
+        if isinstance(value, dict):
+            integrated_circuit = value.get('integrated_circuit')
+            yield line_num, str(value.get('uid') or ''), None if integrated_circuit is None else str(integrated_circuit)
+        else:
+            yield line_num, str(value), None
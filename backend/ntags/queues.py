@@ -0,0 +1,222 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from django.db import close_old_connections, transaction
+
+from . import get_nfc_tag_scan_queue_settings
+
+logger = logging.getLogger(__name__)
+
+_scan_queue = None
+_scan_queue_lock = threading.Lock()
+
+
+class ScanQueue:
+    """
+    A bounded, in-process write-behind buffer for NFC tag scans.
+
+    Request threads append unsaved scans to the buffer and a background
+    flusher thread writes them in batches with ``bulk_create``. When the
+    buffer is full, `put` refuses the scan so the caller can fall back to
+    a synchronous insert instead of growing memory without limit.
+    """
+
+    def __init__(self, max_size=10000, batch_size=500, flush_interval=1.0):
+        if max_size < 1 or batch_size < 1:
+            raise ValueError("The queue and batch sizes must be positive, non-zero integers.")
+
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._exit_handler_registered = False
+
+        self.enqueued = 0
+        self.overflowed = 0
+        self.flushed = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_latency = None
+        self.max_flush_latency = 0.0
+        self.total_flush_latency = 0.0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def put(self, scan, start=True):
+        """
+        Append an unsaved scan to the buffer.
+
+        Returns False if the buffer is full and the scan was not accepted.
+        """
+        with self._lock:
+            if len(self._buffer) >= self.max_size:
+                self.overflowed += 1
+                return False
+            self._buffer.append(scan)
+            self.enqueued += 1
+            depth = len(self._buffer)
+
+        if start:
+            self.start()
+        if depth >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def flush(self):
+        """
+        Write every buffered scan to the database, one batch at a time.
+        Duplicate counters are skipped, and only the scans that were written
+        are added to the scan rollups, in the same transaction.
+        """
+        from .models import NFCTagScan
+        from .rollups import record_scans
+
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take(self.batch_size)
+                if not batch:
+                    break
+
+                started = time.perf_counter()
+                try:
+                    with transaction.atomic():
+                        new_scans = self._new_scans(NFCTagScan, batch)
+                        NFCTagScan.objects.bulk_create(new_scans, ignore_conflicts=True)
+                        record_scans(new_scans)
+                except Exception:
+                    self.failed += len(batch)
+                    logger.exception("Failed to flush %d buffered NFC tag scans", len(batch))
+                    continue
+                self._record_flush(len(batch), time.perf_counter() - started)
+                written += len(batch)
+        return written
+
+    def start(self):
+        """
+        Start the background flusher for the current process, if needed.
+        The thread is (re)started lazily so forked workers get their own.
+        """
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid and self._thread.is_alive():
+            return
+
+        with self._start_lock:
+            if self._thread is not None and self._pid == pid and self._thread.is_alive():
+                return
+            self._pid = pid
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name='nfc-tag-scan-flusher',
+                daemon=True
+            )
+            self._thread.start()
+
+            if not self._exit_handler_registered:
+                atexit.register(self.close)
+                self._exit_handler_registered = True
+
+    def close(self, timeout=5.0):
+        """
+        Stop the background flusher and write any remaining scans.
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+        self.flush()
+
+    def stats(self):
+        """
+        Returns the queue depth and flush counters.
+        """
+        with self._lock:
+            depth = len(self._buffer)
+
+        return {
+            'depth': depth,
+            'max_size': self.max_size,
+            'enqueued': self.enqueued,
+            'overflowed': self.overflowed,
+            'flushed': self.flushed,
+            'failed': self.failed,
+            'flushes': self.flushes,
+            'last_flush_latency': self.last_flush_latency,
+            'max_flush_latency': self.max_flush_latency,
+            'avg_flush_latency': self.total_flush_latency / self.flushes if self.flushes else None,
+        }
+
+    def _take(self, num):
+        with self._lock:
+            count = min(num, len(self._buffer))
+            return [self._buffer.popleft() for _ in range(count)]
+
+    def _new_scans(self, NFCTagScan, batch):
+        # bulk_create(ignore_conflicts=True) does not say which rows it
+        # skipped, so leave out counters that are already saved or repeated
+        # within the batch before inserting.
+        existing = set(
+            NFCTagScan.objects.filter(
+                nfc_tag_id__in={scan.nfc_tag_id for scan in batch},
+                counter__in={scan.counter for scan in batch}
+            ).values_list('nfc_tag_id', 'counter')
+        )
+        new_scans = []
+        for scan in batch:
+            key = (scan.nfc_tag_id, scan.counter)
+            if key not in existing:
+                existing.add(key)
+                new_scans.append(scan)
+        return new_scans
+
+    def _record_flush(self, num, latency):
+        self.flushed += num
+        self.flushes += 1
+        self.last_flush_latency = latency
+        self.max_flush_latency = max(self.max_flush_latency, latency)
+        self.total_flush_latency += latency
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+def get_scan_queue():
+    """
+    Returns the process-wide scan queue, or None if buffered ingestion is disabled.
+    """
+    global _scan_queue
+
+    queue_settings = get_nfc_tag_scan_queue_settings()
+    if not queue_settings['ENABLED']:
+        return None
+
+    if _scan_queue is None:
+        with _scan_queue_lock:
+            if _scan_queue is None:
+                _scan_queue = ScanQueue(
+                    max_size=queue_settings['MAX_SIZE'],
+                    batch_size=queue_settings['BATCH_SIZE'],
+                    flush_interval=queue_settings['FLUSH_INTERVAL']
+                )
+    return _scan_queue
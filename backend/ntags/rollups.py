@@ -0,0 +1,184 @@
+import datetime
+from collections import defaultdict
+
+from django.db import transaction, IntegrityError
+from django.db.models import Count, F, Max, Min, Value
+from django.db.models.functions import Greatest, Least, Trunc
+
+PERIODS = ('hour', 'day')
+
+
+def truncate(value, period):
+    """
+    Truncates a datetime to the start of its hour or day in UTC.
+    """
+    value = value.astimezone(datetime.timezone.utc)
+    if period == 'hour':
+        return value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def record_scans(scans):
+    """
+    Adds newly written scans to the hourly and daily rollups.
+    Scans are aggregated in memory first, so each rollup row is written once
+    per call however many of the scans fall into it.
+    """
+    from .models import NFCTagScanRollup, NFCTagUserScanRollup
+
+    tag_rollups = defaultdict(dict)
+    user_rollups = defaultdict(dict)
+
+    for scan in scans:
+        for period in PERIODS:
+            bucket = truncate(scan.scanned_at, period)
+            _aggregate(tag_rollups[(scan.nfc_tag_id, period, bucket)], scan, with_counter=True)
+            if scan.scanned_by_id is not None:
+                _aggregate(user_rollups[(scan.scanned_by_id, period, bucket)], scan)
+
+    for (nfc_tag_id, period, bucket), values in tag_rollups.items():
+        _increment(NFCTagScanRollup, {'nfc_tag_id': nfc_tag_id, 'period': period, 'bucket': bucket}, values)
+
+    for (user_id, period, bucket), values in user_rollups.items():
+        _increment(NFCTagUserScanRollup, {'user_id': user_id, 'period': period, 'bucket': bucket}, values)
+
+
+def rebuild_scan_rollups(since=None, until=None):
+    """
+    Recomputes the rollups from the raw scans for the whole days between
+    `since` and `until`. Days that have been compacted, even partly, are
+    skipped, as their raw scans no longer account for the whole day.
+    """
+    from .models import NFCTagScan, NFCTagScanRollup
+
+    scans = NFCTagScan.objects.all()
+    if since is not None:
+        scans = scans.filter(scanned_at__gte=truncate(since, 'day'))
+    if until is not None:
+        scans = scans.filter(scanned_at__lt=truncate(until, 'day'))
+    scans = scans.annotate(
+        day=Trunc('scanned_at', 'day', tzinfo=datetime.timezone.utc)
+    ).exclude(
+        day__in=NFCTagScanRollup.objects.filter(period=NFCTagScanRollup.DAY, compacted=True).values('bucket')
+    )
+
+    _rebuild_tag_rollups(scans)
+    _rebuild_user_rollups(scans)
+
+
+def compact_scans(before):
+    """
+    Folds raw scans older than the start of the day containing `before` into
+    the rollups, then deletes them. Each tag's day is compacted in its own
+    transaction, which rewrites the tag's rollups from the raw scans, marks
+    them compacted and deletes the scans, so an interrupted run never leaves
+    a rollup counting scans that are half deleted.
+    """
+    from .models import NFCTagScan, NFCTagScanRollup
+
+    cutoff = truncate(before, 'day')
+    days = NFCTagScan.objects.filter(scanned_at__lt=cutoff).annotate(
+        day=Trunc('scanned_at', 'day', tzinfo=datetime.timezone.utc)
+    ).values_list('day', flat=True).distinct().order_by('day')
+
+    deleted = 0
+    for day in list(days):
+        next_day = day + datetime.timedelta(days=1)
+        scans = NFCTagScan.objects.filter(scanned_at__gte=day, scanned_at__lt=next_day)
+
+        # User rollups span tags, so they are rebuilt from the whole day
+        # before its first tag is compacted
+        if not NFCTagScanRollup.objects.filter(
+            period=NFCTagScanRollup.DAY, bucket=day, compacted=True
+        ).exists():
+            _rebuild_user_rollups(scans)
+
+        for nfc_tag_id in list(scans.values_list('nfc_tag_id', flat=True).distinct().order_by('nfc_tag_id')):
+            tag_scans = scans.filter(nfc_tag_id=nfc_tag_id)
+            with transaction.atomic():
+                _rebuild_tag_rollups(tag_scans)
+                NFCTagScanRollup.objects.filter(
+                    nfc_tag_id=nfc_tag_id, bucket__gte=day, bucket__lt=next_day
+                ).update(compacted=True)
+                deleted += tag_scans.delete()[0]
+
+    return deleted
+
+
+def _rebuild_tag_rollups(scans):
+    from .models import NFCTagScanRollup
+
+    for period in PERIODS:
+        rows = scans.annotate(bucket=Trunc('scanned_at', period, tzinfo=datetime.timezone.utc)).values(
+            'nfc_tag_id', 'bucket'
+        ).annotate(
+            count=Count('pk'),
+            first_scanned_at=Min('scanned_at'),
+            last_scanned_at=Max('scanned_at'),
+            last_counter=Max('counter'),
+        ).order_by()
+        _upsert(
+            NFCTagScanRollup,
+            (NFCTagScanRollup(period=period, **row) for row in rows.iterator()),
+            unique_fields=['nfc_tag', 'period', 'bucket'],
+            update_fields=['count', 'first_scanned_at', 'last_scanned_at', 'last_counter'],
+        )
+
+
+def _rebuild_user_rollups(scans):
+    from .models import NFCTagUserScanRollup
+
+    for period in PERIODS:
+        rows = scans.filter(scanned_by__isnull=False).annotate(
+            bucket=Trunc('scanned_at', period, tzinfo=datetime.timezone.utc)
+        ).values('scanned_by_id', 'bucket').annotate(
+            count=Count('pk'),
+            first_scanned_at=Min('scanned_at'),
+            last_scanned_at=Max('scanned_at'),
+        ).order_by()
+        _upsert(
+            NFCTagUserScanRollup,
+            (NFCTagUserScanRollup(period=period, user_id=row.pop('scanned_by_id'), **row) for row in rows.iterator()),
+            unique_fields=['user', 'period', 'bucket'],
+            update_fields=['count', 'first_scanned_at', 'last_scanned_at'],
+        )
+
+
+def _aggregate(values, scan, with_counter=False):
+    values['count'] = values.get('count', 0) + 1
+    values['first_scanned_at'] = min(values.get('first_scanned_at', scan.scanned_at), scan.scanned_at)
+    values['last_scanned_at'] = max(values.get('last_scanned_at', scan.scanned_at), scan.scanned_at)
+    if with_counter:
+        values['last_counter'] = max(values.get('last_counter', scan.counter), scan.counter)
+
+
+def _increment(model, lookup, values):
+    changes = {
+        'count': F('count') + values['count'],
+        'first_scanned_at': Least('first_scanned_at', Value(values['first_scanned_at'])),
+        'last_scanned_at': Greatest('last_scanned_at', Value(values['last_scanned_at'])),
+    }
+    if 'last_counter' in values:
+        changes['last_counter'] = Greatest('last_counter', Value(values['last_counter']))
+
+    if model.objects.filter(**lookup).update(**changes):
+        return
+
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **values)
+    except IntegrityError:
+        # Another process created the row first
+        model.objects.filter(**lookup).update(**changes)
+
+
+def _upsert(model, objs, unique_fields, update_fields, batch_size=1000):
+    manager = model.objects
+    batch = []
+    for obj in objs:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            manager.bulk_create(batch, update_conflicts=True, unique_fields=unique_fields, update_fields=update_fields)
+            batch = []
+    if batch:
+        manager.bulk_create(batch, update_conflicts=True, unique_fields=unique_fields, update_fields=update_fields)
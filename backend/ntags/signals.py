@@ -0,0 +1,42 @@
+from django.db.models.signals import post_save, post_delete
+
+from . import get_nfc_tag_model, nfc_taggable_models
+from .bloom import get_uid_filter
+from .cache import invalidate_nfc_tag, invalidate_nfc_tags_for
+
+
+def nfc_tag_changed(sender, instance, **kwargs):
+    invalidate_nfc_tag(instance.uid)
+
+
+def nfc_tag_created(sender, instance, created, **kwargs):
+    uid_filter = get_uid_filter()
+    if created and uid_filter is not None:
+        uid_filter.add(instance.uid)
+
+
+def nfc_taggable_object_changed(sender, instance, **kwargs):
+    invalidate_nfc_tags_for(sender, [instance.pk])
+
+
+def register_signal_handlers():
+    """
+    Keeps the NFC tag resolution cache and UID filter in sync with tags and
+    the objects they link to.
+    """
+    NFCTag = get_nfc_tag_model()
+    post_save.connect(nfc_tag_changed, sender=NFCTag, dispatch_uid='ntags_nfc_tag_saved')
+    post_delete.connect(nfc_tag_changed, sender=NFCTag, dispatch_uid='ntags_nfc_tag_deleted')
+    post_save.connect(nfc_tag_created, sender=NFCTag, dispatch_uid='ntags_nfc_tag_created')
+
+    for model in nfc_taggable_models.models:
+        post_save.connect(
+            nfc_taggable_object_changed,
+            sender=model,
+            dispatch_uid=f'ntags_{model._meta.label}_saved'
+        )
+        post_delete.connect(
+            nfc_taggable_object_changed,
+            sender=model,
+            dispatch_uid=f'ntags_{model._meta.label}_deleted'
+        )
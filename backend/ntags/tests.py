@@ -1,6 +1,31 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-from .models import NFCTag
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from wagtail.models import Page, Site
+
+from botany.models import UserPlant
+from home.models import HomePage
+from inventory.models import InventoryBox
+
+from . import get_nfc_taggable_model_classes, get_nfc_taggable_models, nfc_taggable_models
+from .api.api import NFCTagAPIViewSet
+from .api.serializers import NFCTagSerializer
+from .bloom import BloomFilter, get_uid_filter
+from .cache import get_nfc_tag_cache, get_nfc_tag_resolution
+from .exports import CSV, export_scans
+from .forms import NFCTagForm
+from .models import NFCTag, NFCTagScan, NFCTagScanRollup, NFCTagUserScanRollup, ScanCounterError
+from .provisioning import NDJSON, provision_nfc_tags, read_rows
+from .queues import ScanQueue
+from .rollups import compact_scans, rebuild_scan_rollups
 
 
 class NFCTagModelTest(TestCase):
@@ -17,3 +42,468 @@ class NFCTagModelTest(TestCase):
         NFCTag.objects.create(uid="04E141124C2880", integrated_circuit="213")
         with self.assertRaises(Exception):
             NFCTag.objects.create(uid="04E141124C2880", integrated_circuit="213")
+
+    def test_uid_is_stored_as_integer(self):
+        """
+        The UID is stored as an integer but read back in its hex form, whatever its case.
+        """
+        nfc_tag = NFCTag.objects.create(uid="04e141124c2880", integrated_circuit="213")
+        nfc_tag.refresh_from_db()
+
+        self.assertEqual(nfc_tag.uid, "04E141124C2880")
+        self.assertEqual(NFCTag.objects.get(uid="04E141124C2880"), nfc_tag)
+        self.assertEqual(NFCTag.objects.filter(uid=0x04E141124C2880).count(), 1)
+
+
+class ScanQueueTest(TestCase):
+    def setUp(self):
+        """
+        Set up a tag and a queue that is flushed manually.
+        """
+        self.nfc_tag = NFCTag.objects.create(uid="04E141124C2881", integrated_circuit="213")
+        self.queue = ScanQueue(max_size=3, batch_size=2)
+
+    def test_flush_writes_buffered_scans(self):
+        for counter in range(3):
+            self.assertTrue(self.queue.put(NFCTagScan(nfc_tag=self.nfc_tag, counter=counter), start=False))
+
+        self.assertEqual(self.queue.flush(), 3)
+        self.assertEqual(NFCTagScan.objects.filter(nfc_tag=self.nfc_tag).count(), 3)
+        self.assertEqual(self.queue.stats()['flushes'], 2)
+
+    def test_full_queue_rejects_scans(self):
+        for counter in range(3):
+            self.queue.put(NFCTagScan(nfc_tag=self.nfc_tag, counter=counter), start=False)
+
+        self.assertFalse(self.queue.put(NFCTagScan(nfc_tag=self.nfc_tag, counter=3), start=False))
+        self.assertEqual(self.queue.stats()['overflowed'], 1)
+
+    def test_duplicate_counters_are_ignored(self):
+        self.queue.put(NFCTagScan(nfc_tag=self.nfc_tag, counter=1), start=False)
+        self.queue.put(NFCTagScan(nfc_tag=self.nfc_tag, counter=1), start=False)
+
+        self.queue.flush()
+        self.assertEqual(NFCTagScan.objects.filter(nfc_tag=self.nfc_tag).count(), 1)
+
+    def test_only_written_scans_are_rolled_up(self):
+        NFCTagScan.objects.create(nfc_tag=self.nfc_tag, counter=1)
+        self.queue.put(NFCTagScan(nfc_tag=self.nfc_tag, counter=1), start=False)
+        self.queue.put(NFCTagScan(nfc_tag=self.nfc_tag, counter=2), start=False)
+        self.queue.put(NFCTagScan(nfc_tag=self.nfc_tag, counter=2), start=False)
+
+        self.queue.flush()
+        rollup = NFCTagScanRollup.objects.get(nfc_tag=self.nfc_tag, period='day')
+        self.assertEqual(rollup.count, 1)
+        self.assertEqual(rollup.last_counter, 2)
+
+
+class NFCTagResolutionCacheTest(TestCase):
+    def setUp(self):
+        """
+        Set up a tag and start from an empty cache.
+        """
+        get_nfc_tag_cache().clear()
+        self.nfc_tag = NFCTag.objects.create(uid="04E141124C2882", integrated_circuit="213")
+
+    def test_warm_resolution_does_not_query(self):
+        get_nfc_tag_resolution(self.nfc_tag.uid)
+
+        with self.assertNumQueries(0):
+            resolution = get_nfc_tag_resolution(self.nfc_tag.uid)
+        self.assertEqual(resolution['id'], self.nfc_tag.pk)
+
+    def test_saving_tag_invalidates_resolution(self):
+        get_nfc_tag_resolution(self.nfc_tag.uid)
+
+        self.nfc_tag.active = False
+        self.nfc_tag.save()
+        self.assertFalse(get_nfc_tag_resolution(self.nfc_tag.uid)['active'])
+
+    def test_unknown_uid_resolves_to_none(self):
+        self.assertIsNone(get_nfc_tag_resolution("04E141124C28FF"))
+
+    def test_lower_case_uid_shares_the_invalidated_entry(self):
+        get_nfc_tag_resolution(self.nfc_tag.uid.lower())
+
+        self.nfc_tag.active = False
+        self.nfc_tag.save()
+        self.assertFalse(get_nfc_tag_resolution(self.nfc_tag.uid.lower())['active'])
+
+
+class RegisterNFCTagViewTest(TestCase):
+    def setUp(self):
+        """
+        Log in a user, which needs a home page for the user's inventory.
+        """
+        Page.get_first_root_node().add_child(instance=HomePage(title="Home", slug="home-test"))
+        self.user = get_user_model().objects.create_user(username="tagger", password="password")
+        self.client.force_login(self.user)
+
+    def test_registers_tag(self):
+        nfc_tag = NFCTag.objects.create(uid="04E141124C2883", integrated_circuit="213")
+
+        self.client.get(reverse('ntags:register-nfc-tag', args=["04e141124c2883"]))
+        nfc_tag.refresh_from_db()
+        self.assertEqual(nfc_tag.user, self.user)
+
+    def test_invalid_uid_is_not_found(self):
+        response = self.client.get(reverse('ntags:register-nfc-tag', args=["not-a-uid"]))
+        self.assertEqual(response.status_code, 404)
+
+
+class BloomFilterTest(SimpleTestCase):
+    def setUp(self):
+        """
+        Fill a filter with sequential UIDs.
+        """
+        self.uids = [f"04{value:012X}" for value in range(1000)]
+        self.bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+        self.bloom_filter.update(self.uids)
+
+    def test_no_false_negatives(self):
+        for uid in self.uids:
+            self.assertIn(uid, self.bloom_filter)
+            self.assertIn(uid.lower(), self.bloom_filter)
+
+    def test_false_positive_rate(self):
+        unknown = [f"05{value:012X}" for value in range(10000)]
+        false_positives = sum(1 for uid in unknown if uid in self.bloom_filter)
+        self.assertLess(false_positives / len(unknown), 0.03)
+        self.assertGreater(self.bloom_filter.stats()['misses'], 0)
+
+    def test_memory_size(self):
+        # About 9.6 bits per item for a 1% error rate
+        self.assertEqual(self.bloom_filter.memory_size, (self.bloom_filter.bit_count + 7) // 8)
+        self.assertLess(self.bloom_filter.memory_size, 1300)
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        NFC_TAG_UID_FILTER={'ENABLED': True, 'CACHE_ALIAS': 'default'}
+    )
+    def test_filter_needs_a_shared_cache(self):
+        self.assertIsNone(get_uid_filter())
+
+
+class ScanCounterTest(TestCase):
+    def setUp(self):
+        """
+        Set up a tag with a clean counter cache.
+        """
+        get_nfc_tag_cache().clear()
+        self.nfc_tag = NFCTag.objects.create(uid="04E141124C2883", integrated_circuit="213")
+
+    def test_counter_advances(self):
+        self.nfc_tag.log_scan(1)
+        self.nfc_tag.log_scan("000002")
+
+        self.nfc_tag.refresh_from_db()
+        self.assertEqual(self.nfc_tag.last_counter, 2)
+        self.assertEqual(self.nfc_tag.scans.count(), 2)
+
+    def test_replayed_counter_is_rejected_without_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.nfc_tag.log_scan(5)
+
+        with self.assertNumQueries(0), self.assertRaises(ScanCounterError):
+            self.nfc_tag.log_scan(5)
+
+    def test_lower_counter_is_rejected(self):
+        self.nfc_tag.log_scan(5)
+        get_nfc_tag_cache().clear()
+
+        with self.assertRaises(ScanCounterError):
+            self.nfc_tag.log_scan(3)
+        self.assertEqual(self.nfc_tag.scans.count(), 1)
+
+    def test_failed_scan_does_not_advance_counter(self):
+        with mock.patch.object(NFCTag, '_create_scan_entry', side_effect=ScanCounterError):
+            with self.assertRaises(ScanCounterError):
+                self.nfc_tag.log_scan(5)
+
+        self.nfc_tag.refresh_from_db()
+        self.assertIsNone(self.nfc_tag.last_counter)
+        self.nfc_tag.log_scan(5)
+
+
+class ScanRollupTest(TestCase):
+    def setUp(self):
+        """
+        Set up a tag with a clean counter cache.
+        """
+        get_nfc_tag_cache().clear()
+        self.nfc_tag = NFCTag.objects.create(uid="04E141124C2884", integrated_circuit="213")
+
+    def test_scans_are_rolled_up(self):
+        self.nfc_tag.log_scan(1)
+        self.nfc_tag.log_scan(2)
+
+        rollup = self.nfc_tag.scan_rollups.get(period=NFCTagScanRollup.DAY)
+        self.assertEqual(rollup.count, 2)
+        self.assertEqual(rollup.last_counter, 2)
+        self.assertEqual(self.nfc_tag.scan_rollups.filter(period=NFCTagScanRollup.HOUR).count(), 1)
+
+    def test_scan_summary(self):
+        self.nfc_tag.log_scan(1)
+        self.nfc_tag.log_scan(2)
+
+        nfc_tag = NFCTag.objects.with_scan_summary().get(pk=self.nfc_tag.pk)
+        self.assertEqual(nfc_tag.scan_count, 2)
+        self.assertLessEqual(nfc_tag.first_scanned_at, nfc_tag.last_scanned_at)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.nfc_tag.log_scan(1)
+        self.nfc_tag.log_scan(2)
+        NFCTagScanRollup.objects.update(count=0)
+
+        rebuild_scan_rollups()
+        self.assertEqual(self.nfc_tag.scan_rollups.get(period=NFCTagScanRollup.DAY).count, 2)
+
+    def test_compaction_keeps_counts(self):
+        old = timezone.now() - timedelta(days=10)
+        NFCTagScan.objects.create(nfc_tag=self.nfc_tag, counter=1, scanned_at=old)
+        NFCTagScan.objects.create(nfc_tag=self.nfc_tag, counter=2, scanned_at=old)
+        self.nfc_tag.log_scan(3)
+
+        self.assertEqual(compact_scans(timezone.now() - timedelta(days=5)), 2)
+        self.assertEqual(list(self.nfc_tag.scans.values_list('counter', flat=True)), [3])
+        self.assertEqual(
+            sum(self.nfc_tag.scan_rollups.filter(period=NFCTagScanRollup.DAY).values_list('count', flat=True)), 3
+        )
+
+    def test_rebuild_skips_compacted_days(self):
+        Page.get_first_root_node().add_child(instance=HomePage(title="Home", slug="home-test"))
+        user = get_user_model().objects.create_user(username="scanner", password="password")
+        other_tag = NFCTag.objects.create(uid="04E141124C2889", integrated_circuit="213")
+        old = timezone.now() - timedelta(days=10)
+        NFCTagScan.objects.create(nfc_tag=self.nfc_tag, counter=1, scanned_by=user, scanned_at=old)
+        NFCTagScan.objects.create(nfc_tag=other_tag, counter=1, scanned_by=user, scanned_at=old)
+        compact_scans(timezone.now() - timedelta(days=5))
+
+        rollup = self.nfc_tag.scan_rollups.get(period=NFCTagScanRollup.DAY)
+        self.assertTrue(rollup.compacted)
+        self.assertEqual(NFCTagUserScanRollup.objects.get(user=user, period=NFCTagScanRollup.DAY).count, 2)
+
+        # A raw scan left on a compacted day must not overwrite its rollups
+        NFCTagScan.objects.create(nfc_tag=self.nfc_tag, counter=2, scanned_by=user, scanned_at=old)
+        rebuild_scan_rollups()
+        self.assertEqual(self.nfc_tag.scan_rollups.get(pk=rollup.pk).count, 1)
+        self.assertEqual(NFCTagUserScanRollup.objects.get(user=user, period=NFCTagScanRollup.DAY).count, 2)
+
+    def test_compaction_resumes_a_partly_compacted_day(self):
+        other_tag = NFCTag.objects.create(uid="04E141124C2889", integrated_circuit="213")
+        old = timezone.now() - timedelta(days=10)
+        NFCTagScan.objects.create(nfc_tag=self.nfc_tag, counter=1, scanned_at=old)
+        NFCTagScan.objects.create(nfc_tag=other_tag, counter=1, scanned_at=old)
+
+        with mock.patch('ntags.rollups._rebuild_tag_rollups', side_effect=[None, RuntimeError]):
+            with self.assertRaises(RuntimeError):
+                compact_scans(timezone.now() - timedelta(days=5))
+        self.assertEqual(NFCTagScan.objects.count(), 1)
+
+        self.assertEqual(compact_scans(timezone.now() - timedelta(days=5)), 1)
+        self.assertEqual(NFCTagScan.objects.count(), 0)
+        self.assertEqual(other_tag.scan_rollups.get(period=NFCTagScanRollup.DAY).count, 1)
+
+
+class ProvisioningTest(TestCase):
+    def test_csv_rows_are_provisioned(self):
+        NFCTag.objects.create(uid="04E141124C2885", integrated_circuit="213")
+        lines = [
+            "uid,integrated_circuit\n",
+            "04e141124c2886,215\n",
+            "04E141124C2885,213\n",
+            "04E141124C2886,\n",
+            "not-a-uid,213\n",
+        ]
+
+        results = list(provision_nfc_tags(read_rows(lines), batch_size=2))
+        self.assertEqual([result['status'] for result in results], ['created', 'exists', 'exists', 'invalid'])
+        self.assertEqual(NFCTag.objects.get(uid="04E141124C2886").integrated_circuit, "215")
+
+    def test_ndjson_rows_are_provisioned(self):
+        lines = ['{"uid": "04E141124C2887"}\n', '"04E141124C2888"\n', '"04E141124C2887"\n']
+
+        results = list(provision_nfc_tags(read_rows(lines, format=NDJSON), integrated_circuit="216"))
+        self.assertEqual([result['status'] for result in results], ['created', 'created', 'duplicate'])
+        self.assertEqual(NFCTag.objects.filter(integrated_circuit="216").count(), 2)
+
+    def test_uid_filter_is_bumped_after_each_batch(self):
+        lines = ['"04E141124C288A"\n', '"04E141124C288B"\n']
+        uid_filter = mock.Mock()
+
+        with mock.patch('ntags.provisioning.get_uid_filter', return_value=uid_filter):
+            with self.captureOnCommitCallbacks(execute=True):
+                results = provision_nfc_tags(read_rows(lines, format=NDJSON), batch_size=1)
+                next(results)
+        # The client went away after the first batch
+        uid_filter.bump_version.assert_called_once_with()
+
+
+class ScanExportTest(TestCase):
+    def setUp(self):
+        nfc_tag = NFCTag.objects.create(uid="04E141124C2889", integrated_circuit="213")
+        NFCTagScan.objects.create(nfc_tag=nfc_tag, counter=1)
+        NFCTagScan.objects.create(nfc_tag=nfc_tag, counter=2)
+
+    def test_ndjson_export(self):
+        lines = list(export_scans(NFCTagScan.objects.order_by('counter')))
+        self.assertEqual(len(lines), 2)
+        self.assertIn('"uid": "04E141124C2889"', lines[0])
+        self.assertIn('"counter": 2', lines[1])
+
+    def test_csv_export(self):
+        lines = list(export_scans(NFCTagScan.objects.order_by('counter'), format=CSV))
+        self.assertEqual(lines[0], "id,uid,counter,scanned_by,scanned_at\r\n")
+        self.assertEqual(lines[1].split(',')[1:3], ['04E141124C2889', '1'])
+
+
+class NFCTagListingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        home = Page.get_first_root_node().add_child(instance=HomePage(title="Home", slug="home-test"))
+        # Plant URLs are built from their box's, which must be under a site
+        site = Site.objects.get(is_default_site=True)
+        site.root_page = home
+        site.save()
+        cls.user = get_user_model().objects.create_user(username="lister", password="password")
+        box = InventoryBox.objects.child_of(cls.user.get_page()).first()
+        cls.plants = [UserPlant.objects.create(box=box, name=f"Plant {i}") for i in range(25)]
+
+    def link_tags(self, plants):
+        for plant in plants:
+            NFCTag.objects.create(
+                uid=f"04{plant.pk:012X}", integrated_circuit="213", user=self.user, content_object=plant
+            )
+
+    def count_list_queries(self):
+        # The queryset and serializer the API and snippet listings use
+        with CaptureQueriesContext(connection) as queries:
+            nfc_tags = NFCTag.objects.filter(user=self.user).with_scan_summary().with_content_objects()
+            results = NFCTagSerializer(nfc_tags, many=True).data
+        return len(queries), results
+
+    def test_query_count_does_not_depend_on_the_number_of_tags(self):
+        self.link_tags(self.plants[:5])
+        self.count_list_queries()
+        num_queries, results = self.count_list_queries()
+        self.assertEqual(len(results), 5)
+
+        self.link_tags(self.plants[5:])
+        num_queries_for_all, results = self.count_list_queries()
+        self.assertEqual(len(results), 25)
+        self.assertEqual(num_queries_for_all, num_queries)
+
+    def test_linked_objects_are_listed(self):
+        self.link_tags(self.plants[:1])
+
+        content_object = self.count_list_queries()[1][0]['content_object']
+        self.assertEqual(content_object['type'], 'botany.userplant')
+        self.assertEqual(content_object['name'], str(self.plants[0]))
+        self.assertEqual(content_object['url'], self.plants[0].url)
+
+
+class NFCTagAPIRoutingTest(TestCase):
+    def setUp(self):
+        Page.get_first_root_node().add_child(instance=HomePage(title="Home", slug="home-test"))
+        self.user = get_user_model().objects.create_user(username="router", password="password")
+        self.nfc_tag = NFCTag.objects.create(uid="04E141124C2890", integrated_circuit="213")
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def test_only_the_tag_actions_are_routed(self):
+        self.assertEqual(self.api.get('/api/nfc-tags/').status_code, 404)
+        self.assertEqual(self.api.post('/api/nfc-tags/', {'uid': self.nfc_tag.uid}).status_code, 404)
+        self.assertEqual(self.api.get(f'/api/nfc-tags/{self.nfc_tag.uid}/').status_code, 404)
+
+    def test_scans_are_scoped_to_the_user(self):
+        url = reverse('nfc-tag-scans', args=[self.nfc_tag.uid])
+        self.assertEqual(self.api.get(url).status_code, 404)
+
+        NFCTag.objects.filter(pk=self.nfc_tag.pk).update(user=self.user)
+        self.assertEqual(self.api.get(url).status_code, 200)
+
+    def test_provisioning_needs_staff(self):
+        response = self.api.post(reverse('nfc-tag-provision'), 'uid\n04E141124C2891\n', content_type='text/csv')
+        self.assertEqual(response.status_code, 403)
+
+    def test_invalid_uids_are_rejected(self):
+        self.assertEqual(self.api.get(reverse('nfc-tag-scans', args=['zz'])).status_code, 404)
+
+        create = NFCTagAPIViewSet.as_view({'post': 'create'})
+        for uid in ('zz', 12345678901234):
+            request = APIRequestFactory().post('/', {'uid': uid}, format='json')
+            force_authenticate(request, self.user)
+            self.assertEqual(create(request).status_code, 400)
+
+        request = APIRequestFactory().post('/', {'uid': '04e141124c2892'}, format='json')
+        force_authenticate(request, self.user)
+        self.assertEqual(create(request).status_code, 201)
+        self.assertTrue(NFCTag.objects.filter(uid='04E141124C2892').exists())
+
+
+class NFCTaggableManagerTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Page.get_first_root_node().add_child(instance=HomePage(title="Home", slug="home-test"))
+        User = get_user_model()
+        cls.user = User.objects.create_user(username="tagger", password="password")
+        other_user = User.objects.create_user(username="other", password="password")
+
+        box = InventoryBox.objects.child_of(cls.user.get_page()).first()
+        cls.tagged = UserPlant.objects.create(box=box, name="Tagged")
+        cls.untagged = UserPlant.objects.create(box=box, name="Untagged")
+        cls.other = UserPlant.objects.create(
+            box=InventoryBox.objects.child_of(other_user.get_page()).first(), name="Other"
+        )
+
+        cls.nfc_tag = NFCTag.objects.create(uid="04E141124C2893", user=cls.user, content_object=cls.tagged)
+        # A tag on another content type that shares the untagged plant's id
+        NFCTag.objects.create(
+            uid="04E141124C2894",
+            content_type=ContentType.objects.get_for_model(InventoryBox),
+            object_id=cls.untagged.pk
+        )
+
+    def get_item_choices(self, instance):
+        class Form(NFCTagForm):
+            class Meta(NFCTagForm.Meta):
+                model = NFCTag
+
+        form = Form(instance=instance, for_user=self.user)
+        return form, set(form.fields['item'].queryset)
+
+    def test_with_and_without_nfc_tag(self):
+        self.assertEqual(set(UserPlant.objects.with_nfc_tag()), {self.tagged})
+        self.assertEqual(set(UserPlant.objects.without_nfc_tag()), {self.untagged, self.other})
+        self.assertEqual(set(UserPlant.objects.without_nfc_tag(self.user)), {self.untagged})
+
+    def test_nfc_tag_flag(self):
+        flags = dict(UserPlant.objects.with_nfc_tag_flag().values_list('pk', 'has_nfc_tag'))
+        self.assertEqual(flags, {self.tagged.pk: True, self.untagged.pk: False, self.other.pk: False})
+
+    def test_item_choices_are_the_users_untagged_plants(self):
+        form, choices = self.get_item_choices(NFCTag(uid="04E141124C2895"))
+        self.assertEqual(choices, {self.untagged})
+        self.assertIsNone(form.fields['item'].initial)
+
+    def test_item_choices_keep_the_linked_plant(self):
+        form, choices = self.get_item_choices(self.nfc_tag)
+        self.assertEqual(choices, {self.tagged, self.untagged})
+        self.assertEqual(form.fields['item'].initial, self.tagged.pk)
+
+
+class NFCTaggableRegistryTest(TestCase):
+    def test_registry_resolves_taggable_models(self):
+        from botany.models import UserPlant
+
+        self.assertEqual(nfc_taggable_models.models, [UserPlant])
+        self.assertEqual(
+            list(ContentType.objects.filter(get_nfc_taggable_models())),
+            [ContentType.objects.get_for_model(UserPlant)]
+        )
+
+    def test_content_type_ids_are_resolved_once(self):
+        get_nfc_taggable_model_classes()
+        with self.assertNumQueries(0):
+            get_nfc_taggable_model_classes()
+            get_nfc_taggable_models()
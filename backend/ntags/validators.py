@@ -41,7 +41,7 @@ def validate_ascii_mirror_uid(value):
     Each byte should be represented by 2 characters so the total length should be 14 characters.
     """
     pattern = re.compile(r'^[0-9A-Fa-f]{14}$')
-    if not pattern.match(value):
+    if not isinstance(value, str) or not pattern.match(value):
         raise ValidationError(
             '%(value)s is not a valid UID (Serial Number).',
             params={'value': value},
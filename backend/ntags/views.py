@@ -1,15 +1,34 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ValidationError
+from django.http import Http404
 from django.shortcuts import redirect, render, get_object_or_404
 from django.utils.translation import gettext_lazy as _
 
 from . import get_nfc_tag_model, get_nfc_tag_fallback_url
-from .validators import validate_ascii_mirror
+from .bloom import get_uid_filter
+from .cache import get_nfc_tag_resolution, get_nfc_tag_from_resolution
+from .forms import NFCTagRegistrationForm
+from .validators import validate_ascii_mirror, validate_ascii_mirror_uid
 
 NFCTag = get_nfc_tag_model()
 
 
+def get_scan_context(request, nfc_tag, resolution):
+    """
+    Build the template context for a scan. The tag's owner gets the full
+    context with admin actions and forms; everyone else is served from
+    the cached resolution without reading the database.
+    """
+    if resolution['user'] is None:
+        return {'form': {'register': NFCTagRegistrationForm()}}
+
+    if resolution['user'] == request.user.pk:
+        return nfc_tag.build_context(request)
+
+    return {'details': resolution['details']}
+
+
 def link_nfc_tag(request):
     """
     Link an NTAG using the ASCII Mirror embedded in the NTAG's URL.
@@ -27,17 +46,24 @@ def link_nfc_tag(request):
         messages.error(request, _(f'Invalid ASCII Mirror value: {e}'))
         return redirect(get_nfc_tag_fallback_url())
 
-    # Check that the NFC Tag exists
-    nfc_tag = NFCTag.object.get(uid=uid)
-    if not nfc_tag:
+    # Check that the NFC Tag exists, rejecting unknown UIDs before touching the database
+    uid_filter = get_uid_filter()
+    if uid_filter is not None and not uid_filter.might_contain(uid):
+        resolution = None
+    else:
+        resolution = get_nfc_tag_resolution(uid)
+
+    if resolution is None:
         messages.error(request, _('Invalid serial number. NFC Tag ASCII mirror improperly configured.'))
         return redirect(get_nfc_tag_fallback_url())
 
+    nfc_tag = get_nfc_tag_from_resolution(resolution)
+
     scan = {'counter': counter}
     if request.user.is_authenticated:
         scan.update({'user': request.user})
 
-    context = nfc_tag.build_context(request)
+    context = get_scan_context(request, nfc_tag, resolution)
 
     # Attempt to log the scan and return the response
     try:
@@ -53,6 +79,11 @@ def register_nfc_tag(request, uid):
     """
     Register an NFC Tag with the given UID and link it to the current user.
     """
+    # A UID that is not hex can never match a tag
+    try:
+        validate_ascii_mirror_uid(uid)
+    except ValidationError:
+        raise Http404
     nfc_tag = get_object_or_404(NFCTag, uid=uid)
 
     # Set the user field to the current user if not already set
@@ -28,4 +28,4 @@ class NFCTagSnippetViewSet(SnippetViewSet):
         if qs is None:
             qs = self.model.objects.all()
 
-        return qs.filter(user=request.user)
+        return qs.filter(user=request.user).with_content_objects()